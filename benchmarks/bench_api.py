@@ -0,0 +1,156 @@
+"""Teste de carga do serviço HTTP (brief_mpi.servico): latência p50/p99 e requisições/s.
+
+Sobe o serviço local (ou usa um já no ar, com --url) e dispara, por alguns
+segundos em cada cenário, requisições de várias conexões simultâneas com
+keep-alive: um paciente por vez (JSON) e lotes em JSON, NDJSON e Arrow. O
+cliente é um HTTP/1.1 mínimo sobre asyncio, para que o custo do lado de cá
+atrapalhe o mínimo a medição; com muitos workers, rode-o em outra máquina ou
+deixe núcleos livres para ele.
+
+Uso:
+    python benchmarks/bench_api.py                        # 2 workers, 32 conexões
+    python benchmarks/bench_api.py --workers 4 --conexoes 64 --segundos 10
+    python benchmarks/bench_api.py --url http://127.0.0.1:8000 --lote 5000
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np  # noqa: E402
+
+from benchmarks.sintetico import gerar_dominios  # noqa: E402
+
+
+# ---------- Cargas ----------
+def _arrow(df) -> bytes:
+    import pyarrow as pa
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    buffer = io.BytesIO()
+    with pa.ipc.new_stream(buffer, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return buffer.getvalue()
+
+
+def cenarios(lote: int) -> list:
+    """(nome, caminho, Content-Type, corpos, pacientes por requisição)."""
+    pacientes = gerar_dominios(1000, seed=1)
+    individuais = [json.dumps(p).encode() for p in pacientes.to_dict("records")]
+    df = gerar_dominios(lote, seed=2)
+    return [
+        ("individual (JSON)", "/pontuar", "application/json", individuais, 1),
+        (f"lote {lote:,} (JSON)", "/pontuar/lote", "application/json",
+         [df.to_json(orient="records").encode()], lote),
+        (f"lote {lote:,} (NDJSON)", "/pontuar/lote", "application/x-ndjson",
+         [df.to_json(orient="records", lines=True).encode()], lote),
+        (f"lote {lote:,} (Arrow)", "/pontuar/lote", "application/vnd.apache.arrow.stream",
+         [_arrow(df)], lote),
+    ]
+
+
+# ---------- Cliente ----------
+async def _ler_resposta(leitor) -> int:
+    """Lê uma resposta HTTP/1.1 com Content-Length; devolve o status."""
+    cabecalho = await leitor.readuntil(b"\r\n\r\n")
+    linhas = cabecalho.decode("latin-1").split("\r\n")
+    status = int(linhas[0].split()[1])
+    tamanho = 0
+    for linha in linhas[1:]:
+        if linha.lower().startswith("content-length:"):
+            tamanho = int(linha.split(":", 1)[1])
+    await leitor.readexactly(tamanho)
+    return status
+
+
+async def _conexao(host, porta, pedidos, fim, latencias, erros):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        i = 0
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            escritor.write(pedidos[i % len(pedidos)])
+            status = await _ler_resposta(leitor)
+            latencias.append(time.perf_counter() - inicio)
+            if status != 200:
+                erros.append(status)
+            i += 1
+    finally:
+        escritor.close()
+
+
+async def disparar(url: str, caminho: str, tipo: str, corpos: list,
+                   conexoes: int, segundos: float) -> tuple:
+    """Latências (s), status de erro e duração real de `conexoes` clientes durante `segundos`."""
+    partes = urllib.parse.urlsplit(url)
+    host, porta = partes.hostname, partes.port or 80
+    pedidos = [(f"POST {caminho} HTTP/1.1\r\nHost: {host}\r\nContent-Type: {tipo}\r\n"
+                f"Content-Length: {len(corpo)}\r\n\r\n").encode() + corpo for corpo in corpos]
+    latencias, erros = [], []
+    inicio = time.perf_counter()
+    fim = inicio + segundos
+    await asyncio.gather(*(_conexao(host, porta, pedidos[k:] + pedidos[:k], fim, latencias, erros)
+                           for k in range(conexoes)))
+    return latencias, erros, time.perf_counter() - inicio
+
+
+# ---------- Servidor ----------
+def subir_servidor(porta: int, workers: int) -> subprocess.Popen:
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "brief_mpi", "servir", "--porta", str(porta),
+         "--workers", str(workers)], cwd=RAIZ, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{porta}/saude"
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                # Dá tempo aos demais workers de terminarem a inicialização
+                time.sleep(1.0)
+                return processo
+        except OSError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError("O serviço não respondeu em 60 s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="serviço já no ar (padrão: sobe um local)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("-w", "--workers", type=int, default=2)
+    parser.add_argument("--conexoes", type=int, default=32, help="conexões simultâneas")
+    parser.add_argument("--segundos", type=float, default=5.0, help="duração de cada cenário")
+    parser.add_argument("--lote", type=int, default=1000, help="pacientes por requisição de lote")
+    args = parser.parse_args()
+
+    processo = None if args.url else subir_servidor(args.porta, args.workers)
+    url = args.url or f"http://127.0.0.1:{args.porta}"
+    try:
+        print(f"{'cenário':<22} {'req/s':>9} {'pacientes/s':>12} {'p50 ms':>8} "
+              f"{'p99 ms':>8} {'erros':>6}")
+        for nome, caminho, tipo, corpos, por_requisicao in cenarios(args.lote):
+            # A mesma carga por 1 s antes de medir (conexões e caches aquecidos)
+            asyncio.run(disparar(url, caminho, tipo, corpos, args.conexoes, 1.0))
+            latencias, erros, duracao = asyncio.run(
+                disparar(url, caminho, tipo, corpos, args.conexoes, args.segundos))
+            ms = np.asarray(latencias) * 1000
+            rps = len(latencias) / duracao
+            print(f"{nome:<22} {rps:>9,.0f} {rps * por_requisicao:>12,.0f} "
+                  f"{np.percentile(ms, 50):>8.2f} {np.percentile(ms, 99):>8.2f} {len(erros):>6}")
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+
+
+if __name__ == "__main__":
+    main()
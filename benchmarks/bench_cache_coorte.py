@@ -0,0 +1,109 @@
+"""Custo de abrir uma coorte já pontuada: ler e pontuar de novo vs. cache em disco (brief_mpi.cache_coorte).
+
+Gera uma planilha CSV sintética (com colunas de texto, como paciente e
+instituição) e mede, cada um num processo novo:
+- sem cache: ler o CSV e pontuar, como cada sessão fazia antes;
+- com cache: abrir a coorte do cache (já gravada por um processo anterior),
+  em vários processos ao mesmo tempo, como analistas diferentes ou workers.
+
+Em cada processo a coorte inteira é percorrida (somas, contagens, tamanho dos
+textos), para que as páginas mapeadas sejam de fato lidas. A memória privada é
+o RssAnon do processo menos o que ele já usava depois dos imports; a
+compartilhada (RssFile) são as páginas do cache do sistema, as mesmas para
+todos os processos.
+
+Uso:
+    python benchmarks/bench_cache_coorte.py
+    python benchmarks/bench_cache_coorte.py --linhas 2000000 --processos 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.sintetico import gerar_dominios  # noqa: E402
+
+
+def _memoria() -> dict:
+    """RssAnon e RssFile do processo atual, em MB."""
+    with open("/proc/self/status") as f:
+        campos = dict(linha.split(":", 1) for linha in f)
+    return {c: int(campos[c].split()[0]) / 1024 for c in ("RssAnon", "RssFile")}
+
+
+def _percorrer(res: pd.DataFrame) -> float:
+    return (float(res["MPI"].sum()) + res["risk"].value_counts().sum()
+            + res["Paciente"].str.len().sum() + res["Instituição"].str.len().sum())
+
+
+def processo(modo: str, planilha: str, diretorio: str):
+    """Corpo de um processo medido; imprime uma linha JSON."""
+    from brief_mpi.cache_coorte import CacheCoortes, chave_coorte
+    from brief_mpi.ingest import pontuar_lote
+
+    antes = _memoria()
+    inicio = time.perf_counter()
+    if modo == "sem cache":
+        res = pontuar_lote(pd.read_csv(planilha))
+    else:
+        cache = CacheCoortes(diretorio)
+        res = cache.obter_ou_calcular(chave_coorte(planilha),
+                                      lambda: pontuar_lote(pd.read_csv(planilha)))
+    abrir = time.perf_counter() - inicio
+    _percorrer(res)
+    depois = _memoria()
+    print(json.dumps({"modo": modo, "abrir_s": abrir, "total_s": time.perf_counter() - inicio,
+                      "privada_mb": depois["RssAnon"] - antes["RssAnon"],
+                      "compartilhada_mb": depois["RssFile"] - antes["RssFile"]}))
+
+
+def _disparar(modo: str, planilha: str, diretorio: str, n: int) -> list:
+    processos = [subprocess.Popen([sys.executable, __file__, "--processo", modo,
+                                   "--planilha", planilha, "--diretorio", diretorio],
+                                  stdout=subprocess.PIPE, text=True) for _ in range(n)]
+    return [json.loads(p.communicate()[0]) for p in processos]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--processos", type=int, default=2, help="processos abrindo a mesma coorte")
+    parser.add_argument("--processo", help=argparse.SUPPRESS)
+    parser.add_argument("--planilha", help=argparse.SUPPRESS)
+    parser.add_argument("--diretorio", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.processo:
+        return processo(args.processo, args.planilha, args.diretorio)
+
+    pasta = tempfile.mkdtemp()
+    planilha = os.path.join(pasta, "coorte.csv")
+    df = gerar_dominios(args.linhas, seed=5)
+    df["Paciente"] = "P-" + df["Paciente"].astype(str).str.zfill(8)
+    df["Instituição"] = np.random.default_rng(5).choice(
+        ["Hospital A", "Hospital B", "ILPI Central", "Clínica Norte"], size=len(df))
+    df.to_csv(planilha, index=False)
+    diretorio = os.path.join(pasta, "coortes")
+
+    print(f"{args.linhas:,} pacientes")
+    print(f"{'':<30} {'abrir (s)':>10} {'total (s)':>10} {'privada MB':>11} {'compart. MB':>12}")
+    medidas = [("ler + pontuar (sem cache)", _disparar("sem cache", planilha, diretorio, 1)),
+               ("1º acesso (grava o cache)", _disparar("cache", planilha, diretorio, 1)),
+               (f"{args.processos} processos (cache)",
+                _disparar("cache", planilha, diretorio, args.processos))]
+    for nome, resultados in medidas:
+        for r in resultados:
+            print(f"{nome:<30} {r['abrir_s']:>10.3f} {r['total_s']:>10.3f} "
+                  f"{r['privada_mb']:>11.1f} {r['compartilhada_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
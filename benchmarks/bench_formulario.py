@@ -0,0 +1,185 @@
+"""Reexecuções e CPU por avaliação individual preenchida no app (brief_mpi_app.py).
+
+Preenche o formulário inteiro pelo AppTest do Streamlit (as 15 perguntas
+sim/não, comorbidades, fármacos, co-habitação, identificação e "Calcular MPI")
+e conta, por avaliação completa, as execuções do script inteiro, as execuções
+só de um fragmento, as mensagens enviadas ao navegador e o tempo de CPU do
+processo.
+
+O AppTest sozinho sempre reexecuta o script inteiro; aqui cada interação leva
+o id do fragmento do widget alterado, como faz o navegador. O modo "sem
+fragmentos" omite esse id, o que equivale ao formulário antigo (toda resposta
+reexecuta o app inteiro). Com --antes, mede também o app de uma revisão do git.
+O tempo de CPU inclui o custo do próprio AppTest, igual nos dois modos.
+
+Uso:
+    python benchmarks/bench_formulario.py
+    python benchmarks/bench_formulario.py --avaliacoes 10 --antes HEAD~1
+"""
+import argparse
+import dataclasses
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+# As avaliações salvas vão para um banco descartável
+os.environ["MPI_BANCO"] = os.path.join(tempfile.mkdtemp(), "avaliacoes.sqlite3")
+
+from streamlit.runtime.scriptrunner_utils.script_requests import (  # noqa: E402
+    RerunData, ScriptRequests)
+from streamlit.runtime.scriptrunner import ScriptRunnerEvent  # noqa: E402
+from streamlit.testing.v1 import AppTest, app_test  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner  # noqa: E402
+
+MODO_AVALIACAO = "📝 Avaliação individual"
+
+# (tipo de widget, rótulo, valor) na ordem em que o formulário é preenchido
+RESPOSTAS = [
+    *[("radio", rotulo, "Não") for rotulo in [
+        "Comer sozinho?", "Vestir-se sozinho?", "Controle de urina/fezes?",
+        "Usa telefone sozinho?", "Responsável pela medicação?", "Faz compras sozinho?",
+        "Levantar-se sozinho?", "Andar 3 metros?", "Subir/descer escadas?",
+        "Sabe a data?", "Sabe a idade correta?", "Conta de 20 para trás de 3 em 3?"]],
+    *[("radio", rotulo, "Sim") for rotulo in [
+        "Perda de peso 3 meses?", "IMC < 21?", "Ingestão alimentar diminuída?"]],
+    ("number_input", "Nº de doenças crônicas:", 2),
+    ("number_input", "Nº de fármacos (princípios ativos):", 6),
+    ("radio", "Vive com:", "Sozinho"),
+    ("text_input", "Identificação do paciente", "P-0001"),
+    ("text_input", "Instituição", "Hospital A"),
+    ("button", "Calcular MPI", None),
+]
+
+
+class _Executor(LocalScriptRunner):
+    """LocalScriptRunner que reexecuta só o fragmento do widget alterado.
+
+    Como o navegador, guarda a página entre as execuções (`pagina`: caminho do
+    elemento -> mensagem): uma execução completa a substitui, e a de um
+    fragmento troca só os elementos dele. Registra o fragmento de cada widget
+    e o nº de mensagens enviadas ao navegador em cada execução.
+    """
+
+    fragmento = None
+    fragmentos = {}
+    pagina = {}
+    ultimo = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _Executor.ultimo = self
+        if _Executor.fragmento:
+            # Descarta a execução completa pedida no construtor, que tomaria o
+            # lugar da execução só do fragmento
+            self._requests = ScriptRequests()
+
+    def request_rerun(self, rerun_data: RerunData) -> bool:
+        if _Executor.fragmento:
+            rerun_data = dataclasses.replace(rerun_data, fragment_id_queue=[_Executor.fragmento])
+        return super().request_rerun(rerun_data)
+
+    def forward_msgs(self) -> list:
+        pagina = {}
+        if _Executor.fragmento:
+            pagina = {caminho: msg for caminho, msg in _Executor.pagina.items()
+                      if msg.delta.fragment_id != _Executor.fragmento}
+        for msg in super().forward_msgs():
+            if msg.HasField("delta"):
+                pagina[tuple(msg.metadata.delta_path)] = msg
+            else:
+                pagina[msg.WhichOneof("type")] = msg
+        _Executor.pagina = pagina
+        # Na ordem da página (os blocos antes dos elementos de dentro deles)
+        return sorted(pagina.values(), key=lambda msg: (bool(msg.HasField("delta")),
+                                                        list(msg.metadata.delta_path)))
+
+    def mensagens(self) -> int:
+        """Mensagens enviadas ao navegador nesta execução."""
+        return sum(1 for evento in self.events if evento == ScriptRunnerEvent.ENQUEUE_FORWARD_MSG)
+
+    def mapear_fragmentos(self):
+        for msg in _Executor.pagina.values():
+            if msg.HasField("delta") and msg.delta.HasField("new_element"):
+                elemento = msg.delta.new_element
+                widget = getattr(elemento, elemento.WhichOneof("type"))
+                if getattr(widget, "id", "") and msg.delta.fragment_id:
+                    _Executor.fragmentos[widget.id] = msg.delta.fragment_id
+
+
+app_test.LocalScriptRunner = _Executor
+
+
+def _widget(at: AppTest, tipo: str, rotulo: str):
+    return next(w for w in getattr(at, tipo) if w.label == rotulo)
+
+
+def preencher(script: str, fragmentos: bool) -> dict:
+    """Preenche uma avaliação e devolve as contagens e a CPU gasta nas interações."""
+    at = AppTest.from_file(script, default_timeout=60)
+    at.run()
+    at.sidebar.radio[0].set_value(MODO_AVALIACAO).run()
+    _Executor.fragmentos = {}
+    _Executor.ultimo.mapear_fragmentos()
+
+    contagem = {"completas": 0, "fragmento": 0, "mensagens": 0, "cpu_ms": 0.0}
+    for tipo, rotulo, valor in RESPOSTAS:
+        widget = _widget(at, tipo, rotulo)
+        if tipo == "button":
+            widget.click()
+        else:
+            widget.set_value(valor)
+        _Executor.fragmento = _Executor.fragmentos.get(widget.id) if fragmentos else None
+        cpu = time.process_time()
+        at.run()
+        contagem["cpu_ms"] += (time.process_time() - cpu) * 1000
+        contagem["fragmento" if _Executor.fragmento else "completas"] += 1
+        contagem["mensagens"] += _Executor.ultimo.mensagens()
+        _Executor.ultimo.mapear_fragmentos()
+        _Executor.fragmento = None
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    if not any(s.value.startswith("MPI = ") for s in at.success):
+        raise RuntimeError("O formulário não chegou ao resultado do MPI")
+    return contagem
+
+
+def medir(nome: str, script: str, fragmentos: bool, avaliacoes: int):
+    preencher(script, fragmentos)  # aquecimento (imports e caches)
+    total = {"completas": 0, "fragmento": 0, "mensagens": 0, "cpu_ms": 0.0}
+    for _ in range(avaliacoes):
+        for chave, valor in preencher(script, fragmentos).items():
+            total[chave] += valor
+    print(f"{nome:<28} {total['completas'] / avaliacoes:>9.1f} "
+          f"{total['fragmento'] / avaliacoes:>10.1f} {total['mensagens'] / avaliacoes:>10.0f} "
+          f"{total['cpu_ms'] / avaliacoes:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--avaliacoes", type=int, default=5, help="avaliações por modo")
+    parser.add_argument("--script", default=os.path.join(RAIZ, "brief_mpi_app.py"))
+    parser.add_argument("--antes", help="revisão do git cujo app também é medido")
+    args = parser.parse_args()
+    os.chdir(RAIZ)  # o app de revisões antigas (--antes) abre o logo por caminho relativo
+
+    print(f"{'por avaliação':<28} {'completas':>9} {'fragmento':>10} {'mensagens':>10} "
+          f"{'CPU (ms)':>10}")
+    if args.antes:
+        conteudo = subprocess.run(["git", "show", f"{args.antes}:brief_mpi_app.py"],
+                                  cwd=RAIZ, check=True, capture_output=True).stdout
+        with tempfile.NamedTemporaryFile("wb", suffix=".py", dir=RAIZ, delete=False) as f:
+            f.write(conteudo)
+        try:
+            medir(f"app em {args.antes}", f.name, False, args.avaliacoes)
+        finally:
+            os.remove(f.name)
+    medir("sem fragmentos", args.script, False, args.avaliacoes)
+    medir("com fragmentos", args.script, True, args.avaliacoes)
+
+
+if __name__ == "__main__":
+    main()
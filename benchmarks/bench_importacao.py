@@ -0,0 +1,138 @@
+"""Partida a frio dos apps Streamlit: tempo de importação (python -X importtime) e 1ª execução.
+
+Cada medição é um processo novo, que importa o Streamlit e roda o app uma vez
+pelo AppTest, como na primeira visita a um contêiner recém-criado. São
+registrados:
+- importacao_ms: soma das importações feitas pelo app (as de primeiro nível
+  do -X importtime, depois do Streamlit já carregado);
+- execucao_ms: a 1ª execução completa do script, com as importações;
+- reexecucao_ms: mediana de três execuções seguintes (caches e módulos já
+  carregados), o custo de cada rerun completo;
+- processo_ms: o processo inteiro (interpretador, Streamlit e as execuções);
+- as importações mais caras, para saber o que carregar sob demanda.
+
+As medianas são comparadas com o orçamento de cada app em
+benchmarks/orcamento_importacao.json (o comando termina com erro se algum
+passar) e gravadas em --saida com o commit, como na suite.py.
+
+Uso:
+    python benchmarks/bench_importacao.py
+    python benchmarks/bench_importacao.py --repeticoes 9 brief_mpi_app.py
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+ORCAMENTO = os.path.join(RAIZ, "benchmarks", "orcamento_importacao.json")
+APPS = ["brief_mpi_app.py", "mpi_calculator.py", "teste.py"]
+METRICAS = ["importacao_ms", "execucao_ms", "reexecucao_ms", "processo_ms"]
+
+# Roda no processo medido: o marcador separa as importações do app das do Streamlit
+_PROCESSO = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+sys.stderr.write("#app\\n")
+sys.stderr.flush()
+inicio = time.perf_counter()
+at = AppTest.from_file({script!r}, default_timeout=120)
+at.run()
+sys.stderr.write(f"#execucao {{time.perf_counter() - inicio}}\\n")
+reexecucoes = []
+for _ in range(3):
+    inicio = time.perf_counter()
+    at.run()
+    reexecucoes.append(time.perf_counter() - inicio)
+sys.stderr.write(f"#reexecucao {{sorted(reexecucoes)[1]}}\\n")
+if at.exception:
+    sys.stderr.write(f"#erro {{at.exception[0].value}}\\n")
+"""
+# "import time: <próprio> | <acumulado> | <módulo>"; o nível é a indentação do nome
+_LINHA = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)")
+
+
+def medir(script: str) -> dict:
+    """Uma partida a frio do app num processo novo."""
+    ambiente = {**os.environ, "PYTHONPATH": RAIZ,
+                # O histórico e o cache de coortes vão para uma pasta descartável
+                "MPI_BANCO": os.path.join(tempfile.mkdtemp(), "avaliacoes.sqlite3"),
+                "MPI_CACHE_COORTES": tempfile.mkdtemp()}
+    inicio = time.perf_counter()
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROCESSO.format(script=script)],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True)
+    processo_ms = (time.perf_counter() - inicio) * 1000
+    linhas = processo.stderr.splitlines()
+    if "#app" not in linhas or processo.returncode:
+        raise RuntimeError(f"{script}: o processo falhou\n{processo.stderr[-2000:]}")
+
+    importacoes, tempos = {}, {}
+    for linha in linhas[linhas.index("#app") + 1:]:
+        if linha.startswith("#erro"):
+            raise RuntimeError(f"{script}: {linha[6:]}")
+        if linha.startswith(("#execucao", "#reexecucao")):
+            nome, segundos = linha[1:].split()
+            tempos[f"{nome}_ms"] = float(segundos) * 1000
+        m = _LINHA.match(linha)
+        if m and not m.group(2):  # só as de primeiro nível (as demais estão no acumulado)
+            importacoes[m.group(3)] = int(m.group(1)) / 1000
+    return {"importacao_ms": sum(importacoes.values()), **tempos,
+            "processo_ms": processo_ms, "importacoes": importacoes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("apps", nargs="*", default=APPS, help="scripts medidos (padrão: todos)")
+    parser.add_argument("--repeticoes", type=int, default=5, help="processos por app (mediana)")
+    parser.add_argument("--maiores", type=int, default=5, help="importações mais caras listadas")
+    parser.add_argument("--orcamento", default=ORCAMENTO)
+    parser.add_argument("--saida", default=os.path.join(RAIZ, "benchmarks", "resultados.jsonl"))
+    args = parser.parse_args()
+
+    from benchmarks.suite import metadados
+
+    with open(args.orcamento, encoding="utf-8") as f:
+        orcamento = json.load(f)
+    meta = metadados()
+    acima, registros = [], []
+    print(f"{'app':<20} {'importação':>11} {'1ª execução':>12} {'rerun':>8} {'processo':>10}"
+          "   (ms, mediana)")
+    for app in args.apps:
+        medidas = [medir(app) for _ in range(args.repeticoes)]
+        mediana = {m: statistics.median(x[m] for x in medidas) for m in METRICAS}
+        limites = orcamento.get(app, {})
+        marcas = {m: "!" if m in limites and mediana[m] > limites[m] else " " for m in METRICAS}
+        acima += [f"{app}: {m} {mediana[m]:.0f} ms > {limites[m]} ms"
+                  for m in METRICAS if marcas[m] == "!"]
+        print(f"{app:<20} {mediana['importacao_ms']:>10.0f}{marcas['importacao_ms']} "
+              f"{mediana['execucao_ms']:>11.0f}{marcas['execucao_ms']} "
+              f"{mediana['reexecucao_ms']:>7.0f}{marcas['reexecucao_ms']} "
+              f"{mediana['processo_ms']:>9.0f}{marcas['processo_ms']}")
+        # Importações mais caras (mediana do acumulado entre as repetições)
+        modulos = {nome for x in medidas for nome in x["importacoes"]}
+        custo = {nome: statistics.median(x["importacoes"].get(nome, 0) for x in medidas)
+                 for nome in modulos}
+        maiores = sorted(custo.items(), key=lambda item: -item[1])[:args.maiores]
+        print("    " + ", ".join(f"{nome} {ms:.0f}" for nome, ms in maiores))
+        registros.append({"medicao": "partida_a_frio", "app": app, **mediana,
+                          "orcamento": limites, "maiores": dict(maiores)})
+
+    with open(args.saida, "a", encoding="utf-8") as f:
+        for registro in registros:
+            f.write(json.dumps({**meta, **registro}, ensure_ascii=False) + "\n")
+    if acima:
+        print("Acima do orçamento:\n  " + "\n  ".join(acima), file=sys.stderr)
+        sys.exit(1)
+    print(f"Dentro do orçamento ({args.orcamento}).")
+
+
+if __name__ == "__main__":
+    main()
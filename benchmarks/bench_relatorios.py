@@ -0,0 +1,53 @@
+"""Micro-benchmark da latência por relatório PDF (export_pdf).
+
+Compara o modelo em cache (estilos e logo montados uma vez por processo) com
+a mesma geração descartando o cache a cada relatório, que equivale a montar
+tudo de novo em toda chamada.
+
+Uso: python benchmarks/bench_relatorios.py [-n 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brief_mpi.reports import export_pdf, limpar_modelo  # noqa: E402
+
+DADOS = {
+    "ADL": 0.5, "IADL": 1, "Mobility": 0, "Cognitive": 0.5,
+    "Nutritional": 0, "Comorbidity": 0.5, "Drugs": 1, "Cohabitation": 0,
+    "MPI": 0.44, "risk": "Moderate (MPI 2)",
+}
+
+
+def medir(n: int, com_cache: bool) -> list:
+    tempos = []
+    limpar_modelo()
+    export_pdf(DADOS)  # aquecimento (imports e fontes do ReportLab)
+    for _ in range(n):
+        if not com_cache:
+            limpar_modelo()
+        inicio = time.perf_counter()
+        export_pdf(DADOS)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=200, help="relatórios por cenário")
+    args = parser.parse_args()
+
+    print(f"{'cenário':<12} {'média (ms)':>11} {'mediana (ms)':>13} {'p95 (ms)':>9}")
+    for nome, com_cache in (("sem cache", False), ("com cache", True)):
+        tempos = sorted(medir(args.n, com_cache))
+        p95 = tempos[int(0.95 * (len(tempos) - 1))]
+        print(f"{nome:<12} {statistics.mean(tempos):>11.2f} "
+              f"{statistics.median(tempos):>13.2f} {p95:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
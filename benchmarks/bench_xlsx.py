@@ -0,0 +1,108 @@
+"""Benchmark da leitura de .xlsx: pd.read_excel contra o leitor rápido (brief_mpi.xlsx).
+
+Gera pastas de trabalho "largas", como as exportadas pelos prontuários: as 8
+dimensões (ou as respostas item a item), paciente, instituição e data, e
+várias colunas que não entram no cálculo. Cada cenário é conferido contra o
+pd.read_excel antes de medir.
+
+Uso:
+    python benchmarks/bench_xlsx.py                     # 10k e 100k linhas
+    python benchmarks/bench_xlsx.py --tamanhos 200000 --extras 40 --itens
+    python benchmarks/bench_xlsx.py --arquivo planilha.xlsx
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.sintetico import gerar_dominios, gerar_itens  # noqa: E402
+from brief_mpi.validacao import coluna_necessaria  # noqa: E402
+from brief_mpi.xlsx import ler_xlsx, ler_xlsx_em_lotes  # noqa: E402
+
+
+def gerar_planilha(n: int, extras: int, itens: bool) -> bytes:
+    """Conteúdo de um .xlsx com `n` linhas e `extras` colunas fora do cálculo."""
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(0)
+    df = gerar_itens(n) if itens else gerar_dominios(n)
+    df.insert(1, "Nome", [f"Paciente {i}" for i in range(n)])
+    df["Instituição"] = rng.choice(["Hospital A", "Hospital B", "UBS Centro"], size=n)
+    df["Data"] = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+    for k in range(extras):
+        df[f"Observação {k + 1}"] = rng.random(n) if k % 2 else rng.choice(["sim", "não"], n)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Avaliações")
+    ws.append(list(df.columns))
+    for linha in df.itertuples(index=False, name=None):
+        ws.append([v.to_pydatetime() if isinstance(v, pd.Timestamp) else v for v in linha])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _lotes(dados: bytes):
+    for _ in ler_xlsx_em_lotes(io.BytesIO(dados), colunas=coluna_necessaria):
+        pass
+
+
+CENARIOS = [
+    ("pd.read_excel", lambda dados: pd.read_excel(io.BytesIO(dados))),
+    ("ler_xlsx (todas)", lambda dados: ler_xlsx(io.BytesIO(dados))),
+    ("ler_xlsx (projeção)", lambda dados: ler_xlsx(io.BytesIO(dados), colunas=coluna_necessaria)),
+    ("em lotes (projeção)", _lotes),
+]
+
+
+def conferir(dados: bytes):
+    """O leitor rápido devolve o mesmo que o pd.read_excel (nas colunas lidas)."""
+    referencia = pd.read_excel(io.BytesIO(dados)).dropna(how="all").reset_index(drop=True)
+    referencia.columns = [str(c) for c in referencia.columns]
+    for colunas in (None, coluna_necessaria):
+        df = ler_xlsx(io.BytesIO(dados), colunas=colunas)
+        pd.testing.assert_frame_equal(df, referencia[df.columns], check_dtype=False)
+
+
+def medir(dados: bytes, linhas: int):
+    base = None
+    for nome, funcao in CENARIOS:
+        inicio = time.perf_counter()
+        funcao(dados)
+        segundos = time.perf_counter() - inicio
+        base = base or segundos
+        print(f"{nome:<22} {linhas:>10,} linhas {segundos:>9.3f} s "
+              f"{linhas / segundos:>12,.0f} linhas/s {base / segundos:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--extras", type=int, default=20,
+                        help="colunas que não entram no cálculo")
+    parser.add_argument("--itens", action="store_true",
+                        help="respostas item a item em vez das 8 dimensões")
+    parser.add_argument("--arquivo", help="mede um .xlsx existente em vez de gerar")
+    args = parser.parse_args()
+
+    if args.arquivo:
+        with open(args.arquivo, "rb") as f:
+            dados = f.read()
+        conferir(dados)
+        medir(dados, len(ler_xlsx(io.BytesIO(dados), colunas=coluna_necessaria)))
+        return
+    for n in args.tamanhos:
+        dados = gerar_planilha(n, args.extras, args.itens)
+        print(f"-- {n:,} linhas, {args.extras} colunas extras, {len(dados) / 2**20:.1f} MB")
+        conferir(dados)
+        medir(dados, n)
+
+
+if __name__ == "__main__":
+    main()
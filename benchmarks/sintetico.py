@@ -0,0 +1,27 @@
+"""Geradores de coortes sintéticas para os benchmarks."""
+import numpy as np
+import pandas as pd
+
+from brief_mpi.encoding import COLUNAS_ITENS, COLUNA_COHABITACAO, COLUNA_COMORBIDADES, COLUNA_FARMACOS
+from brief_mpi.scoring import DOMAINS
+
+
+def gerar_dominios(n: int, seed: int = 0) -> pd.DataFrame:
+    """n pacientes com as 8 dimensões já codificadas (0, 0.5, 1)."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.choice([0, 0.5, 1], size=(n, len(DOMAINS))), columns=DOMAINS)
+    df.insert(0, "Paciente", np.arange(1, n + 1))
+    return df
+
+
+def gerar_itens(n: int, seed: int = 0) -> pd.DataFrame:
+    """n pacientes com as respostas item a item do questionário."""
+    rng = np.random.default_rng(seed)
+    sim_nao = [c for c in COLUNAS_ITENS
+               if c not in (COLUNA_COMORBIDADES, COLUNA_FARMACOS, COLUNA_COHABITACAO)]
+    df = pd.DataFrame({c: rng.choice(["Sim", "Não"], size=n) for c in sim_nao})
+    df[COLUNA_COMORBIDADES] = rng.integers(0, 6, size=n)
+    df[COLUNA_FARMACOS] = rng.integers(0, 12, size=n)
+    df[COLUNA_COHABITACAO] = rng.choice(["Com família", "Instituição", "Sozinho"], size=n)
+    df.insert(0, "Paciente", np.arange(1, n + 1))
+    return df
@@ -0,0 +1,187 @@
+"""Suíte de benchmarks: pontuação, leitura, exportação e relatórios PDF.
+
+Cada medição registra tempo, vazão e pico de memória (tracemalloc) e é gravada
+como uma linha JSON em --saida, junto com o commit e as versões das bibliotecas,
+para comparar execuções ao longo do tempo.
+
+Uso:
+    python benchmarks/suite.py                       # 10k, 100k e 1M linhas
+    python benchmarks/suite.py --tamanhos 10000 --pdfs 50
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from benchmarks.sintetico import gerar_dominios, gerar_itens  # noqa: E402
+from brief_mpi.coorte import CoorteCompacta  # noqa: E402
+from brief_mpi.encoding import encode_domains_batch  # noqa: E402
+from brief_mpi.export import exportar  # noqa: E402
+from brief_mpi.scoring import DOMAINS, compute_brief_mpi_batch, compute_brief_mpi_from_domains  # noqa: E402
+from brief_mpi.xlsx import ler_xlsx  # noqa: E402
+
+# Linhas usadas na referência escalar (o laço por linha é lento demais para 1M)
+LINHAS_ESCALAR = 10_000
+
+
+def medir(nome: str, linhas: int, funcao, **extra) -> dict:
+    """Executa `funcao` duas vezes, uma cronometrada e outra sob tracemalloc.
+
+    O tracemalloc deixa operações com muitas alocações pequenas (to_csv, por
+    exemplo) várias vezes mais lentas, por isso tempo e memória são medidos à parte.
+    """
+    inicio = time.perf_counter()
+    funcao()
+    segundos = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    registro = {
+        "medicao": nome,
+        "linhas": linhas,
+        "segundos": round(segundos, 6),
+        "linhas_por_segundo": round(linhas / segundos, 1) if segundos else None,
+        "pico_memoria_mb": round(pico / 2**20, 2),
+        **extra,
+    }
+    print(f"{nome:<28} {linhas:>10,} linhas {segundos:>9.3f} s "
+          f"{registro['pico_memoria_mb']:>9.1f} MB")
+    return registro
+
+
+def _escalar(df: pd.DataFrame):
+    for valores in df[DOMAINS].itertuples(index=False, name=None):
+        compute_brief_mpi_from_domains(dict(zip(DOMAINS, valores)))
+
+
+def bench_coorte(n: int, max_xlsx: int) -> list:
+    """Medições que dependem do tamanho da coorte."""
+    registros = []
+    dominios = gerar_dominios(n)
+    itens = gerar_itens(n)
+
+    amostra = dominios.head(LINHAS_ESCALAR)
+    registros.append(medir("pontuacao_escalar", len(amostra), lambda: _escalar(amostra)))
+    registros.append(medir("pontuacao_lote", n, lambda: compute_brief_mpi_batch(dominios)))
+    registros.append(medir("codificacao_itens", n, lambda: encode_domains_batch(itens)))
+
+    res = pd.concat([dominios, compute_brief_mpi_batch(dominios)], axis=1)
+    pontuacao = res[[*DOMAINS, "MPI", "risk"]]
+    registros.append(medir(
+        "coorte_compacta", n, lambda: CoorteCompacta.de_dataframe(pontuacao).para_dataframe(),
+        memoria_dataframe_mb=round(pontuacao.memory_usage(deep=True).sum() / 2**20, 2),
+        memoria_compacta_mb=round(CoorteCompacta.de_dataframe(pontuacao).nbytes / 2**20, 2)))
+
+    csv = res.to_csv(index=False).encode()
+    registros.append(medir("leitura_csv", n, lambda: pd.read_csv(io.BytesIO(csv)),
+                           bytes=len(csv)))
+    if n <= max_xlsx:
+        xlsx = io.BytesIO()
+        dominios.to_excel(xlsx, index=False)
+        registros.append(medir("leitura_xlsx", n,
+                               lambda: pd.read_excel(io.BytesIO(xlsx.getvalue())),
+                               bytes=len(xlsx.getvalue())))
+        registros.append(medir("leitura_xlsx_rapida", n,
+                               lambda: ler_xlsx(io.BytesIO(xlsx.getvalue())),
+                               bytes=len(xlsx.getvalue())))
+
+    for formato in ("csv", "parquet"):
+        registros.append(medir(f"exportacao_{formato}", n,
+                               lambda: exportar(res, formato).ler()))
+    return registros
+
+
+def bench_pdf(n_pdfs: int, workers: int) -> list:
+    """Latência de um relatório e vazão do lote em ZIP."""
+    from brief_mpi.reports import export_pdf, gerar_relatorios_zip
+
+    dominios = gerar_dominios(n_pdfs)
+    res = pd.concat([dominios, compute_brief_mpi_batch(dominios)], axis=1)
+    registros = res.to_dict("records")
+    export_pdf(registros[0])  # aquecimento: modelo do relatório em cache
+
+    tempos = []
+    for registro in registros[:50]:
+        inicio = time.perf_counter()
+        export_pdf(registro)
+        tempos.append(time.perf_counter() - inicio)
+    individual = {
+        "medicao": "pdf_individual",
+        "linhas": len(tempos),
+        "latencia_mediana_ms": round(float(np.median(tempos)) * 1000, 3),
+        "latencia_p95_ms": round(float(np.percentile(tempos, 95)) * 1000, 3),
+    }
+    print(f"{'pdf_individual':<28} mediana {individual['latencia_mediana_ms']:.2f} ms, "
+          f"p95 {individual['latencia_p95_ms']:.2f} ms")
+
+    with tempfile.TemporaryFile() as destino:
+        stats = gerar_relatorios_zip(registros, destino, workers=workers)
+    lote = {
+        "medicao": "pdf_lote_zip",
+        "linhas": stats["relatorios"],
+        "segundos": stats["segundos"],
+        "linhas_por_segundo": stats["relatorios_por_segundo"],
+        "processos": stats["processos"],
+    }
+    print(f"{'pdf_lote_zip':<28} {lote['linhas']:>10,} PDFs   {lote['segundos']:>9.3f} s "
+          f"({lote['processos']} processos)")
+    return [individual, lote]
+
+
+def metadados() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "execucao": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--max-xlsx", type=int, default=100_000,
+                        help="maior coorte para a leitura de .xlsx (gerar o arquivo é lento)")
+    parser.add_argument("--pdfs", type=int, default=200, help="relatórios no lote em ZIP")
+    parser.add_argument("--workers", type=int, default=None, help="processos do lote de PDFs")
+    parser.add_argument("--saida", default=os.path.join(RAIZ, "benchmarks", "resultados.jsonl"))
+    args = parser.parse_args()
+
+    meta = metadados()
+    registros = []
+    for n in args.tamanhos:
+        registros.extend(bench_coorte(n, args.max_xlsx))
+    if args.pdfs:
+        registros.extend(bench_pdf(args.pdfs, args.workers))
+
+    with open(args.saida, "a", encoding="utf-8") as f:
+        for registro in registros:
+            f.write(json.dumps({**meta, **registro}, ensure_ascii=False) + "\n")
+    print(f"{len(registros)} medições gravadas em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
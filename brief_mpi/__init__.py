@@ -0,0 +1,66 @@
+"""Brief-MPI sem Streamlit: pontuação, codificação, leitura, exportação e relatórios.
+
+Os submódulos são importados sob demanda, de modo que ``import brief_mpi`` é
+instantâneo e o ReportLab só é carregado quando algum PDF é gerado.
+
+Uso em linha de comando: ``python -m brief_mpi --help``.
+"""
+import importlib
+
+# nome público -> submódulo que o define
+_EXPORTS = {
+    "DOMAINS": "scoring",
+    "RISCOS": "scoring",
+    "RISCOS_PT": "scoring",
+    "VERSAO_REGRAS": "scoring",
+    "classificar": "scoring",
+    "compute_brief_mpi_from_domains": "scoring",
+    "compute_brief_mpi_batch": "scoring",
+    "compute_brief_mpi_lookup": "scoring",
+    "combinacoes": "scoring",
+    "verificar_tabela": "scoring",
+    "verificar_conformidade": "scoring",
+    "CoorteCompacta": "coorte",
+    "REGRAS_EMBUTIDAS": "regras",
+    "ErroRegras": "regras",
+    "Regras": "regras",
+    "aplicar_regras": "regras",
+    "comparar_regras": "regras",
+    "obter_regras": "regras",
+    "encode_domains_batch": "encoding",
+    "tem_itens": "encoding",
+    "ler_em_lotes": "ingest",
+    "pontuar_lote": "ingest",
+    "pontuar_em_lotes": "ingest",
+    "ErroEsquema": "validacao",
+    "ler_cabecalho": "validacao",
+    "validar": "validacao",
+    "validar_cabecalho": "validacao",
+    "coluna_necessaria": "validacao",
+    "abas": "xlsx",
+    "ler_xlsx": "xlsx",
+    "ler_xlsx_em_lotes": "xlsx",
+    "FORMATOS": "export",
+    "Exportador": "export",
+    "exportar": "export",
+    "pontuar_arquivos": "batch",
+    "resumo_por_instituicao": "batch",
+    "impressoes": "incremental",
+    "pontuar_incremental": "incremental",
+    "FilaTarefas": "tarefas",
+    "export_pdf": "reports",
+    "gerar_relatorios_zip": "reports",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(nome):
+    if nome in _EXPORTS:
+        modulo = importlib.import_module(f".{_EXPORTS[nome]}", __name__)
+        return getattr(modulo, nome)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,101 @@
+"""Resumo de uma coorte pontuada para o painel do app.
+
+Os agregados (pacientes por faixa, prevalência de 0/0.5/1 em cada dimensão,
+histograma do MPI e faixas por instituição) saem de uma única passada sobre
+os códigos das dimensões (valor ×2: 0, 1, 2, como na CoorteCompacta): cada
+contagem é um np.bincount. O tamanho do resumo é fixo, qualquer que seja a
+coorte. As linhas individuais só vão para a interface em páginas ou amostras.
+"""
+import numpy as np
+import pandas as pd
+
+from .colunas import COLUNA_INSTITUICAO
+from .coorte import FAIXA_POR_NUMERADOR, MPI_POR_NUMERADOR, NUMERADOR_MAXIMO
+from .scoring import DOMAINS, RISCOS
+
+# Linhas por página (e por amostra) na visualização da coorte
+TAMANHO_PAGINA = 100
+VALORES = [0, 0.5, 1]
+SEM_INSTITUICAO = "(sem instituição)"
+
+
+# ---------- Agregados ----------
+def resumo_coorte(res: pd.DataFrame, coluna_grupo: str = COLUNA_INSTITUICAO) -> dict:
+    """Agregados de uma coorte pontuada (saída de pontuar_lote), numa passada só.
+
+    Devolve um dict com:
+    - pacientes, validas (com MPI) e mpi_medio;
+    - faixas: Series com o nº de pacientes por faixa (RISCOS);
+    - histograma: Series com o nº de pacientes por valor do MPI (os 17 possíveis);
+    - dominios: DataFrame DOMAINS x (0, 0.5, 1) com a proporção de cada valor;
+    - grupos: DataFrame `coluna_grupo` x faixas, com o total (None sem a coluna).
+    Linhas sem MPI (valores inválidos) ficam fora das contagens.
+    """
+    codigos = res[DOMAINS].to_numpy(dtype=float) * 2
+    validas = res["MPI"].notna().to_numpy() & ((codigos == 0) | (codigos == 1)
+                                               | (codigos == 2)).all(axis=1)
+    codigos = codigos[validas].astype(np.intp)
+    n = len(codigos)
+
+    numerador = codigos.sum(axis=1)
+    faixa = FAIXA_POR_NUMERADOR[numerador]
+    por_numerador = np.bincount(numerador, minlength=NUMERADOR_MAXIMO + 1)
+    por_valor = np.bincount((codigos + 3 * np.arange(len(DOMAINS))).ravel(),
+                            minlength=3 * len(DOMAINS)).reshape(len(DOMAINS), 3)
+
+    grupos = None
+    if coluna_grupo in res.columns:
+        rotulos = res[coluna_grupo].to_numpy()[validas]
+        cod_grupo, nomes = pd.factorize(rotulos)
+        if (cod_grupo < 0).any():
+            cod_grupo = np.where(cod_grupo < 0, len(nomes), cod_grupo)
+            nomes = [*nomes, SEM_INSTITUICAO]
+        contagem = np.bincount(cod_grupo * len(RISCOS) + faixa,
+                               minlength=len(nomes) * len(RISCOS)).reshape(-1, len(RISCOS))
+        grupos = pd.DataFrame(contagem, index=pd.Index(nomes, name=coluna_grupo), columns=RISCOS)
+        grupos["Total"] = grupos.sum(axis=1)
+        grupos = grupos.sort_index()
+
+    return {
+        "pacientes": len(res),
+        "validas": n,
+        "mpi_medio": float(por_numerador @ MPI_POR_NUMERADOR / n) if n else float("nan"),
+        "faixas": pd.Series(np.bincount(faixa, minlength=len(RISCOS)), index=RISCOS),
+        "histograma": pd.Series(por_numerador, index=pd.Index(MPI_POR_NUMERADOR, name="MPI")),
+        "dominios": pd.DataFrame(por_valor / max(n, 1), index=DOMAINS, columns=VALORES),
+        "grupos": grupos,
+    }
+
+
+# ---------- Linhas ----------
+def _selecao(res: pd.DataFrame, faixa: str | None) -> np.ndarray | None:
+    """Posições das linhas da `faixa` (None = todas, sem montar o array)."""
+    if faixa is None:
+        return None
+    return np.flatnonzero(res["risk"].to_numpy() == faixa)
+
+
+def contar(res: pd.DataFrame, faixa: str | None = None) -> int:
+    """Nº de linhas da `faixa` (None = todas)."""
+    selecao = _selecao(res, faixa)
+    return len(res) if selecao is None else len(selecao)
+
+
+def pagina(res: pd.DataFrame, numero: int, tamanho: int = TAMANHO_PAGINA,
+           faixa: str | None = None) -> pd.DataFrame:
+    """Linhas da página `numero` (a partir de 0), opcionalmente só de uma faixa."""
+    inicio = numero * tamanho
+    selecao = _selecao(res, faixa)
+    if selecao is None:
+        return res.iloc[inicio:inicio + tamanho]
+    return res.iloc[selecao[inicio:inicio + tamanho]]
+
+
+def amostra(res: pd.DataFrame, n: int = TAMANHO_PAGINA, faixa: str | None = None,
+            semente: int = 0) -> pd.DataFrame:
+    """Amostra aleatória (reprodutível pela `semente`) de até `n` linhas, na ordem original."""
+    selecao = _selecao(res, faixa)
+    total = len(res) if selecao is None else len(selecao)
+    escolhidas = np.sort(np.random.default_rng(semente).choice(total, min(n, total),
+                                                               replace=False))
+    return res.iloc[escolhidas if selecao is None else selecao[escolhidas]]
@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+
+from . import metricas
+from .colunas import COLUNA_FONTE, COLUNA_INSTITUICAO
+from .ingest import pontuar_lote
+from .validacao import coluna_necessaria, ler_cabecalho, validar_cabecalho
+
+
+# ---------- Vários arquivos ----------
+def ler_planilha(nome: str, dados, colunas=None, aba=None) -> pd.DataFrame:
+    """Lê uma planilha inteira a partir de um caminho ou do conteúdo em bytes.
+
+    `colunas` (lista de nomes ou função nome -> bool) limita as colunas lidas;
+    `aba` escolhe a aba do .xlsx (padrão: a primeira).
+    """
+    if isinstance(dados, (bytes, bytearray)):
+        dados = BytesIO(dados)
+    with metricas.trecho("ler_planilha", arquivo=os.path.basename(nome)) as t:
+        if nome.lower().endswith(".csv"):
+            df = pd.read_csv(dados, usecols=colunas if colunas is None or callable(colunas)
+                             else set(colunas).__contains__)
+        else:
+            from .xlsx import ler_xlsx
+
+            df = ler_xlsx(dados, colunas=colunas, aba=aba)
+        t.registrar(linhas=len(df))
+    return df
+
+
+def pontuar_fonte(nome: str, dados, pontuar=pontuar_lote) -> pd.DataFrame:
+    """Lê e pontua um arquivo, marcando a origem de cada linha.
+
+    A coluna "Instituição", quando existe, é mantida; linhas sem instituição
+    (ou arquivos sem a coluna) recebem o nome do arquivo sem extensão. Com o
+    `pontuar` padrão, o esquema é conferido pelo cabeçalho antes de ler o arquivo
+    e só as colunas usadas no cálculo e na identificação são lidas.
+    """
+    colunas = None
+    if pontuar is pontuar_lote:
+        validar_cabecalho(ler_cabecalho(dados, nome))
+        colunas = coluna_necessaria
+    res = pontuar(ler_planilha(nome, dados, colunas))
+    instituicao = os.path.splitext(os.path.basename(nome))[0]
+    if COLUNA_INSTITUICAO in res.columns:
+        res[COLUNA_INSTITUICAO] = res[COLUNA_INSTITUICAO].fillna(instituicao)
+    else:
+        res.insert(0, COLUNA_INSTITUICAO, instituicao)
+    res.insert(0, COLUNA_FONTE, os.path.basename(nome))
+    return res
+
+
+def _pontuar_fonte_seguro(nome: str, dados, pontuar) -> tuple:
+    """Executado nos processos: devolve (resultado, None) ou (None, mensagem de erro)."""
+    try:
+        return pontuar_fonte(nome, dados, pontuar), None
+    except (KeyError, ValueError, OSError) as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def pontuar_arquivos(fontes: list, workers: int | None = None, pontuar=pontuar_lote) -> tuple:
+    """Pontua vários arquivos em paralelo, um por processo, e junta os resultados.
+
+    `fontes` é uma lista de pares (nome, caminho ou bytes). Devolve
+    (DataFrame consolidado, {nome: erro}) para os arquivos que falharam.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(fontes)) or 1
+    nomes = [nome for nome, _ in fontes]
+    if workers == 1:
+        resultados = [_pontuar_fonte_seguro(nome, dados, pontuar) for nome, dados in fontes]
+    else:
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as pool:
+            resultados = list(pool.map(_pontuar_fonte_seguro, nomes,
+                                       [dados for _, dados in fontes],
+                                       [pontuar] * len(fontes)))
+
+    erros = {nome: erro for nome, (_, erro) in zip(nomes, resultados) if erro}
+    partes = [res for res, _ in resultados if res is not None]
+    df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    return df, erros
+
+
+# ---------- Resumo por instituição ----------
+def resumo_por_instituicao(df: pd.DataFrame, coluna_risco: str = "risk") -> pd.DataFrame:
+    """Contagem de pacientes por instituição e faixa de MPI, com total por linha."""
+    resumo = pd.crosstab(df[COLUNA_INSTITUICAO], df[coluna_risco])
+    resumo["Total"] = resumo.sum(axis=1)
+    return resumo
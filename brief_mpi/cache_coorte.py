@@ -0,0 +1,205 @@
+"""Cache em disco de coortes pontuadas, compartilhado entre sessões e processos.
+
+Cada coorte fica numa pasta com o nome da chave (hash do conteúdo enviado):
+as colunas numéricas, de data e os códigos das categóricas viram arquivos .npy,
+as demais (texto) um arquivo Arrow IPC, e um manifesto JSON descreve as
+colunas. Ao abrir, tudo é mapeado em memória (memory-map) e somente leitura:
+nada é lido nem pontuado de novo, e as sessões e processos que abrem a mesma
+coorte usam as mesmas páginas do cache do sistema operacional, sem uma cópia
+por sessão.
+
+A pasta é gravada com outro nome e renomeada no fim, de modo que ninguém vê
+uma coorte pela metade. O último acesso de cada coorte é o mtime do manifesto;
+ao passar do orçamento de disco, as usadas há mais tempo são apagadas (LRU).
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from . import metricas
+from .scoring import VERSAO_REGRAS
+
+DIRETORIO_PADRAO = os.environ.get("MPI_CACHE_COORTES", os.path.join("dados", "coortes"))
+# Orçamento de disco do cache inteiro (MB)
+ORCAMENTO_PADRAO_MB = int(os.environ.get("MPI_CACHE_COORTES_MB", "2048"))
+MANIFESTO = "coorte.json"
+ARQUIVO_TEXTO = "texto.arrow"
+
+
+def chave_coorte(*partes) -> str:
+    """Chave de uma coorte: hash das partes (ex.: hash do arquivo, aba) e da versão das regras."""
+    h = hashlib.sha256(VERSAO_REGRAS.encode())
+    for parte in partes:
+        h.update(b"\0" + str(parte).encode())
+    return h.hexdigest()
+
+
+def _vai_para_numpy(dtype) -> bool:
+    """Colunas guardadas como .npy: números, booleanos e datas sem fuso (sem tipos "nullable")."""
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufmM"
+
+
+# ---------- Gravação e leitura ----------
+def _gravar(pasta: str, df: pd.DataFrame):
+    import pyarrow as pa
+
+    colunas, texto = [], {}
+    for i, (nome, serie) in enumerate(df.items()):
+        coluna = {"nome": nome}
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(pasta, f"{i}.npy"), serie.cat.codes.to_numpy())
+            coluna.update(tipo="categoria", categorias=serie.cat.categories.tolist(),
+                          ordenada=bool(serie.cat.ordered))
+        elif _vai_para_numpy(serie.dtype):
+            np.save(os.path.join(pasta, f"{i}.npy"), serie.to_numpy())
+            coluna.update(tipo="numpy")
+        else:
+            # Texto como large_string: o pandas o usa direto do arquivo, sem cópia
+            valores = pa.array(serie, from_pandas=True)
+            if pa.types.is_string(valores.type):
+                valores = valores.cast(pa.large_string())
+            texto[str(i)] = valores
+            coluna.update(tipo="arrow")
+        colunas.append(coluna)
+
+    if texto:
+        tabela = pa.table(texto)
+        with pa.OSFile(os.path.join(pasta, ARQUIVO_TEXTO), "wb") as f:
+            with pa.ipc.new_file(f, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+    with open(os.path.join(pasta, MANIFESTO), "w", encoding="utf-8") as f:
+        json.dump({"linhas": len(df), "colunas": colunas}, f, ensure_ascii=False)
+
+
+def _abrir(pasta: str) -> pd.DataFrame:
+    with open(os.path.join(pasta, MANIFESTO), encoding="utf-8") as f:
+        manifesto = json.load(f)
+    texto = None
+    if any(c["tipo"] == "arrow" for c in manifesto["colunas"]):
+        import pyarrow as pa
+
+        texto = pa.ipc.open_file(pa.memory_map(os.path.join(pasta, ARQUIVO_TEXTO))).read_all()
+
+    dados = {}
+    for i, coluna in enumerate(manifesto["colunas"]):
+        if coluna["tipo"] == "arrow":
+            dados[i] = texto.column(str(i)).to_pandas()
+            continue
+        valores = np.load(os.path.join(pasta, f"{i}.npy"), mmap_mode="r")
+        if coluna["tipo"] == "categoria":
+            valores = pd.Categorical.from_codes(valores, categories=coluna["categorias"],
+                                                ordered=coluna["ordenada"])
+        dados[i] = valores
+    df = pd.DataFrame(dados, index=pd.RangeIndex(manifesto["linhas"]), copy=False)
+    df.columns = [c["nome"] for c in manifesto["colunas"]]
+    return df
+
+
+# ---------- Cache ----------
+class CacheCoortes:
+    """Coortes pontuadas em disco, abertas por memory-map, com descarte LRU por tamanho.
+
+    Uma instância por processo (no app, via st.cache_resource); várias
+    instâncias, em processos diferentes, podem usar a mesma pasta.
+    """
+
+    def __init__(self, diretorio: str | None = None, orcamento_mb: int = ORCAMENTO_PADRAO_MB):
+        self.diretorio = diretorio or DIRETORIO_PADRAO
+        self.orcamento = orcamento_mb * 2**20
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _pasta(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave)
+
+    def obter(self, chave: str) -> pd.DataFrame | None:
+        """A coorte guardada com esta chave (somente leitura), ou None."""
+        pasta = self._pasta(chave)
+        try:
+            with metricas.trecho("abrir_coorte") as t:
+                df = _abrir(pasta)
+                t.registrar(linhas=len(df))
+            os.utime(os.path.join(pasta, MANIFESTO))
+        except FileNotFoundError:  # ausente ou apagada agora por outro processo
+            return None
+        return df
+
+    def guardar(self, chave: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Grava a coorte e devolve-a já aberta do disco (no lugar da cópia em memória).
+
+        Levanta ValueError/TypeError se alguma coluna não puder ser gravada
+        (ex.: objetos de tipos misturados).
+        """
+        pasta = self._pasta(chave)
+        if not os.path.exists(pasta):
+            temporaria = os.path.join(self.diretorio, f".{chave}.{uuid.uuid4().hex[:8]}")
+            os.makedirs(temporaria)
+            try:
+                with metricas.trecho("gravar_coorte", linhas=len(df)):
+                    _gravar(temporaria, df.reset_index(drop=True))
+                os.rename(temporaria, pasta)
+            except OSError:
+                # Outro processo gravou a mesma coorte antes: vale a dele
+                if not os.path.exists(pasta):
+                    raise
+            finally:
+                shutil.rmtree(temporaria, ignore_errors=True)
+            self.limpar(manter=chave)
+        return self.obter(chave)
+
+    def obter_ou_calcular(self, chave: str, calcular) -> pd.DataFrame:
+        """A coorte do cache ou, na falta dela, calcular() gravado no cache.
+
+        Se o resultado não puder ser gravado, é devolvido como está, em memória.
+        """
+        df = self.obter(chave)
+        if df is not None:
+            return df
+        df = calcular()
+        try:
+            return self.guardar(chave, df)
+        except (TypeError, ValueError, OSError):
+            return df
+
+    # ---------- Consultas e limpeza ----------
+    def listar(self) -> list:
+        """Coortes guardadas, da usada mais recentemente para a mais antiga."""
+        coortes = []
+        for chave in os.listdir(self.diretorio):
+            pasta = self._pasta(chave)
+            try:
+                acesso = os.path.getmtime(os.path.join(pasta, MANIFESTO))
+                tamanho = sum(e.stat().st_size for e in os.scandir(pasta))
+            except (FileNotFoundError, NotADirectoryError):  # temporária ou apagada
+                continue
+            coortes.append({"chave": chave, "bytes": tamanho, "acesso": acesso})
+        return sorted(coortes, key=lambda c: c["acesso"], reverse=True)
+
+    def tamanho(self) -> int:
+        return sum(c["bytes"] for c in self.listar())
+
+    def remover(self, chave: str):
+        # Quem já mapeou os arquivos continua lendo (o sistema só libera no fim)
+        shutil.rmtree(self._pasta(chave), ignore_errors=True)
+
+    def limpar(self, orcamento: int | None = None, manter: str | None = None):
+        """Apaga as coortes usadas há mais tempo até o total caber no orçamento (bytes)."""
+        orcamento = self.orcamento if orcamento is None else orcamento
+        coortes = self.listar()
+        total = sum(c["bytes"] for c in coortes)
+        for coorte in reversed(coortes):
+            if total <= orcamento:
+                break
+            if coorte["chave"] != manter:
+                self.remover(coorte["chave"])
+                total -= coorte["bytes"]
+        # Temporárias abandonadas (processo interrompido no meio da gravação)
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            if nome.startswith(".") and time.time() - os.path.getmtime(caminho) > 3600:
+                shutil.rmtree(caminho, ignore_errors=True)
@@ -0,0 +1,251 @@
+"""Linha de comando do Brief-MPI (sem Streamlit).
+
+Exemplos:
+    python -m brief_mpi pontuar planilha.xlsx
+    python -m brief_mpi pontuar dados/ -o resultados/ -f parquet
+    python -m brief_mpi consolidar dados/ -o rede.parquet --resumo resumo.csv
+    python -m brief_mpi verificar
+    python -m brief_mpi comparar coorte.csv -r brief-mpi -r local.yaml -o comparacao.csv
+    python -m brief_mpi servir --porta 8000 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+from . import metricas
+
+EXTENSOES = (".csv", ".xlsx")
+
+
+def listar_arquivos(entradas: list) -> list:
+    """Expande diretórios nas planilhas .csv/.xlsx que contêm (sem recursão)."""
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos.extend(sorted(
+                os.path.join(entrada, nome) for nome in os.listdir(entrada)
+                if nome.lower().endswith(EXTENSOES)))
+        else:
+            arquivos.append(entrada)
+    return arquivos
+
+
+def caminho_saida(arquivo: str, pasta: str, formato: str) -> str:
+    from .export import FORMATOS
+
+    base = os.path.splitext(os.path.basename(arquivo))[0]
+    return os.path.join(pasta, f"{base}_mpi{FORMATOS[formato][1]}")
+
+
+def pontuar_arquivo(arquivo: str, saida: str, formato: str, tamanho: int,
+                    aba=None, todas_colunas: bool = False) -> int:
+    """Pontua uma planilha em lotes, gravando direto em `saida`; devolve o nº de linhas."""
+    from .export import Exportador
+    from .ingest import pontuar_em_lotes
+    from .validacao import coluna_necessaria
+
+    with open(arquivo, "rb") as entrada, open(saida, "wb") as destino:
+        return pontuar_em_lotes(entrada, arquivo.lower(), Exportador(formato, destino),
+                                tamanho=tamanho, aba=aba,
+                                colunas=None if todas_colunas else coluna_necessaria)
+
+
+def cmd_pontuar(args) -> int:
+    arquivos = listar_arquivos(args.entradas)
+    if not arquivos:
+        print("Nenhuma planilha .csv/.xlsx encontrada.", file=sys.stderr)
+        return 1
+    os.makedirs(args.saida, exist_ok=True)
+
+    erros = 0
+    for arquivo in arquivos:
+        saida = caminho_saida(arquivo, args.saida, args.formato)
+        inicio = time.perf_counter()
+        try:
+            with metricas.execucao("cli:pontuar", arquivo=arquivo):
+                linhas = pontuar_arquivo(arquivo, saida, args.formato, args.tamanho_lote,
+                                         args.aba, args.todas_colunas)
+        except (KeyError, ValueError, OSError) as e:
+            erros += 1
+            print(f"{arquivo}: erro: {e}", file=sys.stderr)
+            if os.path.exists(saida):
+                os.remove(saida)
+            continue
+        print(f"{arquivo}: {linhas:,} linhas -> {saida} "
+              f"({time.perf_counter() - inicio:.2f} s)")
+    return 1 if erros else 0
+
+
+def cmd_consolidar(args) -> int:
+    from .batch import pontuar_arquivos, resumo_por_instituicao
+    from .export import exportar
+
+    arquivos = listar_arquivos(args.entradas)
+    if not arquivos:
+        print("Nenhuma planilha .csv/.xlsx encontrada.", file=sys.stderr)
+        return 1
+
+    inicio = time.perf_counter()
+    df, erros = pontuar_arquivos([(a, a) for a in arquivos], workers=args.workers)
+    for arquivo, erro in erros.items():
+        print(f"{arquivo}: erro: {erro}", file=sys.stderr)
+    if df.empty:
+        return 1
+
+    formato = args.formato or _formato_pela_extensao(args.saida)
+    with open(args.saida, "wb") as destino:
+        exportar(df, formato, arquivo=destino)
+    print(f"{len(arquivos) - len(erros)} arquivos, {len(df):,} linhas -> {args.saida} "
+          f"({time.perf_counter() - inicio:.2f} s)")
+
+    resumo = resumo_por_instituicao(df)
+    if args.resumo:
+        resumo.to_csv(args.resumo)
+    else:
+        print(resumo.to_string())
+    return 1 if erros else 0
+
+
+def cmd_verificar(args) -> int:
+    from .export import verificar_exportacao
+    from .regras import verificar_regras
+    from .scoring import N_COMBINACOES, verificar_conformidade
+
+    divergencias = verificar_conformidade() + verificar_regras() + verificar_exportacao()
+    for caso, dominios, esperado, obtido in divergencias:
+        print(f"{caso}: {dominios}: esperado {esperado}, obtido {obtido}", file=sys.stderr)
+    if divergencias:
+        print(f"{len(divergencias)} divergências entre os cálculos.", file=sys.stderr)
+        return 1
+    print(f"Lote e tabela de consulta conferem com o cálculo escalar nas {N_COMBINACOES} "
+          "combinações e nos valores fora da grade; as regras embutidas do Brief-MPI, "
+          "com o pontuar_lote; a exportação em lotes, com tipos que mudam entre eles.")
+    return 0
+
+
+def cmd_comparar(args) -> int:
+    import pandas as pd
+
+    from .batch import ler_planilha
+    from .colunas import COLUNA_DATA, COLUNA_INSTITUICAO, COLUNAS_IDENTIFICACAO
+    from .export import exportar
+    from .regras import ErroRegras, aplicar_regras, comparar_regras, concordancia, obter_regras
+
+    try:
+        conjuntos = [obter_regras(r) for r in args.regras or ["brief-mpi"]]
+    except (ErroRegras, OSError) as e:
+        print(f"erro nas regras: {e}", file=sys.stderr)
+        return 1
+    colunas = None
+    if not args.todas_colunas:
+        colunas = {c for regras in conjuntos for c in regras.colunas}
+        colunas.update([*COLUNAS_IDENTIFICACAO, COLUNA_INSTITUICAO, COLUNA_DATA])
+        colunas = colunas.__contains__
+
+    inicio = time.perf_counter()
+    try:
+        df = ler_planilha(args.entrada, args.entrada, colunas=colunas, aba=args.aba)
+        with metricas.execucao("cli:comparar", arquivo=args.entrada, linhas=len(df)):
+            res = aplicar_regras(df, conjuntos, dominios=args.dominios)
+    except (KeyError, ValueError, OSError) as e:
+        print(f"{args.entrada}: erro: {e}", file=sys.stderr)
+        return 1
+    print(f"{len(df):,} pacientes, {len(conjuntos)} conjunto(s) de regras "
+          f"({time.perf_counter() - inicio:.2f} s)")
+
+    referencia = conjuntos[0].nome
+    for regras in conjuntos[1:]:
+        c = concordancia(res, referencia, regras.nome)
+        print(f"\n{referencia} x {regras.nome}: {c['mesma_faixa']:.1%} na mesma faixa, "
+              f"diferença média de MPI {c['diferenca_mpi']:+.3f} ({c['pacientes']:,} pacientes)")
+        print(comparar_regras(res, referencia, regras.nome).to_string())
+    if len(conjuntos) == 1:
+        print(res[f"risk {referencia}"].value_counts(sort=False).to_string())
+    if args.saida:
+        saida = pd.concat([df, res], axis=1)
+        with open(args.saida, "wb") as destino:
+            exportar(saida, args.formato or _formato_pela_extensao(args.saida), arquivo=destino)
+    return 0
+
+
+def cmd_servir(args) -> int:
+    import uvicorn
+
+    uvicorn.run("brief_mpi.servico:app", host=args.host, port=args.porta,
+                workers=args.workers or os.cpu_count() or 1,
+                access_log=args.log_acessos, log_level="info")
+    return 0
+
+
+def _formato_pela_extensao(caminho: str) -> str:
+    from .export import FORMATOS
+
+    ext = os.path.splitext(caminho)[1].lower()
+    for formato, (_, extensao, _) in FORMATOS.items():
+        if ext == extensao:
+            return formato
+    return "csv"
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    from .export import FORMATOS
+    from .ingest import TAMANHO_LOTE
+
+    parser = argparse.ArgumentParser(prog="brief_mpi", description="Brief-MPI em lote, sem interface.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("pontuar", help="calcula o MPI de planilhas .csv/.xlsx")
+    p.add_argument("entradas", nargs="+", help="arquivos ou diretórios com planilhas")
+    p.add_argument("-o", "--saida", default=".", help="diretório de saída (padrão: atual)")
+    p.add_argument("-f", "--formato", choices=list(FORMATOS), default="csv")
+    p.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE,
+                   help="linhas lidas e pontuadas por vez")
+    p.add_argument("--aba", help="aba das planilhas .xlsx (padrão: a primeira)")
+    p.add_argument("--todas-colunas", action="store_true",
+                   help="mantém na saída as colunas que não entram no cálculo")
+    p.set_defaults(func=cmd_pontuar)
+
+    p = sub.add_parser("consolidar",
+                       help="pontua várias planilhas em paralelo e junta por instituição")
+    p.add_argument("entradas", nargs="+", help="arquivos ou diretórios com planilhas")
+    p.add_argument("-o", "--saida", required=True,
+                   help="arquivo consolidado (.csv, .parquet ou .arrow)")
+    p.add_argument("-f", "--formato", choices=list(FORMATOS),
+                   help="formato da saída (padrão: pela extensão)")
+    p.add_argument("-w", "--workers", type=int, help="nº de processos (padrão: nº de CPUs)")
+    p.add_argument("--resumo", help="CSV com a contagem por instituição e faixa de MPI")
+    p.set_defaults(func=cmd_consolidar)
+
+    p = sub.add_parser("verificar",
+                       help="confere lote e tabela de consulta contra o cálculo escalar")
+    p.set_defaults(func=cmd_verificar)
+
+    p = sub.add_parser("comparar",
+                       help="aplica vários conjuntos de regras à mesma coorte, lado a lado")
+    p.add_argument("entrada", help="planilha .csv ou .xlsx")
+    p.add_argument("-r", "--regras", action="append",
+                   help="conjunto embutido (brief-mpi, brief-mpi-dominios, mpi) ou arquivo "
+                        ".json/.yaml; repetir para comparar (o primeiro é a referência)")
+    p.add_argument("-o", "--saida", help="arquivo com a planilha e as colunas de cada conjunto")
+    p.add_argument("-f", "--formato", choices=list(FORMATOS),
+                   help="formato da saída (padrão: pela extensão)")
+    p.add_argument("--dominios", action="store_true",
+                   help="inclui na saída as dimensões calculadas por cada conjunto")
+    p.add_argument("--aba", help="aba da planilha .xlsx (padrão: a primeira)")
+    p.add_argument("--todas-colunas", action="store_true",
+                   help="mantém na saída as colunas que não entram no cálculo")
+    p.set_defaults(func=cmd_comparar)
+
+    p = sub.add_parser("servir", help="serviço HTTP de pontuação (individual e em lote)")
+    p.add_argument("--host", default="127.0.0.1", help="endereço (padrão: 127.0.0.1)")
+    p.add_argument("--porta", type=int, default=8000)
+    p.add_argument("-w", "--workers", type=int, help="nº de processos (padrão: nº de CPUs)")
+    p.add_argument("--log-acessos", action="store_true", help="registra cada requisição")
+    p.set_defaults(func=cmd_servir)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = criar_parser().parse_args(argv)
+    return args.func(args)
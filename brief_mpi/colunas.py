@@ -0,0 +1,17 @@
+"""Nomes das colunas de identificação usadas nas planilhas (sem dependências)."""
+
+# Colunas procuradas (nesta ordem) para identificar o paciente
+COLUNAS_IDENTIFICACAO = ["Paciente", "Nome", "ID"]
+COLUNA_INSTITUICAO = "Instituição"
+COLUNA_DATA = "Data"
+COLUNA_FONTE = "Fonte"
+# Colunas com valor inválido em cada linha (vazio quando a linha está correta)
+COLUNA_ERROS = "Erros"
+
+
+def coluna_paciente(colunas) -> str | None:
+    """Primeira coluna de identificação presente em `colunas`, ou None."""
+    for coluna in COLUNAS_IDENTIFICACAO:
+        if coluna in colunas:
+            return coluna
+    return None
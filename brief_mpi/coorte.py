@@ -0,0 +1,83 @@
+"""Representação compacta de uma coorte pontuada.
+
+As dimensões só valem 0, 0.5 ou 1 e a faixa tem 3 níveis, então uma coorte
+cabe em 10 bytes por paciente:
+
+- dimensões ×2 em int8 (0, 1, 2), uma coluna por dimensão;
+- numerador do MPI em uint8: soma das dimensões ×2 (0 a 16), isto é, MPI×16
+  (MPI×8 seria a soma das dimensões, que pode ser fracionária);
+- código da faixa em uint8, com os rótulos em RISCOS.
+
+As demais colunas (identificação, instituição...) são guardadas como vieram.
+"""
+import numpy as np
+import pandas as pd
+
+from .scoring import DOMAINS, LIMIARES, RISCOS
+
+# MPI arredondado para cada numerador possível (soma ×2 de 0 a 16)
+NUMERADOR_MAXIMO = 2 * len(DOMAINS)
+MPI_POR_NUMERADOR = np.array([round(n / NUMERADOR_MAXIMO, 2)
+                              for n in range(NUMERADOR_MAXIMO + 1)])
+FAIXA_POR_NUMERADOR = np.searchsorted(
+    LIMIARES, np.arange(NUMERADOR_MAXIMO + 1) / NUMERADOR_MAXIMO, side="left").astype(np.uint8)
+
+
+class CoorteCompacta:
+    """Coorte pontuada em arrays numéricos pequenos, conversível de/para DataFrame sem perda."""
+
+    def __init__(self, dominios: np.ndarray, outras: pd.DataFrame | None = None,
+                 colunas: list | None = None, index: pd.Index | None = None):
+        self.dominios = np.ascontiguousarray(dominios, dtype=np.int8).reshape(-1, len(DOMAINS))
+        self.numerador = self.dominios.sum(axis=1, dtype=np.uint8)
+        self.faixa = FAIXA_POR_NUMERADOR[self.numerador]
+        n = len(self.dominios)
+        self.outras = outras if outras is not None else pd.DataFrame(index=pd.RangeIndex(n))
+        self.colunas = colunas or [*self.outras.columns, *DOMAINS, "MPI", "risk"]
+        self.index = index if index is not None else pd.RangeIndex(n)
+
+    def __len__(self) -> int:
+        return len(self.dominios)
+
+    @property
+    def mpi(self) -> np.ndarray:
+        """MPI arredondado (float64), igual ao de compute_brief_mpi_from_domains."""
+        return MPI_POR_NUMERADOR[self.numerador]
+
+    @property
+    def risco(self) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.faixa, categories=RISCOS)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes dos arrays da pontuação (sem as demais colunas)."""
+        return self.dominios.nbytes + self.numerador.nbytes + self.faixa.nbytes
+
+    # ---------- Conversão ----------
+    @classmethod
+    def de_dataframe(cls, df: pd.DataFrame) -> "CoorteCompacta":
+        """Compacta um DataFrame com as 8 DOMAINS (e, opcionalmente, MPI e risk).
+
+        Levanta ValueError se alguma dimensão não for 0, 0.5 ou 1, ou se o MPI/risco
+        da planilha não for o que as dimensões dão (a conversão perderia informação).
+        """
+        valores = df[DOMAINS].to_numpy(dtype=float) * 2
+        if not np.isin(valores, (0, 1, 2)).all():
+            raise ValueError("As dimensões devem valer 0, 0.5 ou 1 (sem valores vazios)")
+        coorte = cls(valores.astype(np.int8),
+                     outras=df.drop(columns=[*DOMAINS, "MPI", "risk"], errors="ignore"),
+                     colunas=list(df.columns), index=df.index)
+
+        if "MPI" in df.columns and not np.array_equal(df["MPI"].to_numpy(dtype=float), coorte.mpi):
+            raise ValueError("A coluna MPI não corresponde às dimensões")
+        if "risk" in df.columns and not (df["risk"].astype(str).to_numpy()
+                                         == np.asarray(RISCOS)[coorte.faixa]).all():
+            raise ValueError("A coluna risk não corresponde às dimensões")
+        return coorte
+
+    def para_dataframe(self) -> pd.DataFrame:
+        """DataFrame no formato de pontuar_lote: DOMAINS em float, MPI e risk categórico."""
+        df = self.outras.set_axis(self.index).assign(
+            **{d: self.dominios[:, j] / 2 for j, d in enumerate(DOMAINS)},
+            MPI=self.mpi, risk=self.risco)
+        return df[self.colunas + [c for c in ("MPI", "risk") if c not in self.colunas]]
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from .scoring import DOMAINS
+
+# ---------- Itens do questionário ----------
+# Nomes das colunas = chaves dos widgets em avaliacao_individual
+ITENS_SIM_NAO = {
+    "ADL": ["adl1", "adl2", "adl3"],
+    "IADL": ["iadl1", "iadl2", "iadl3"],
+    "Mobility": ["mob1", "mob2", "mob3"],
+    "Cognitive": ["cog1", "cog2", "cog3"],
+    "Nutritional": ["nut1", "nut2", "nut3"],
+}
+COLUNA_COMORBIDADES = "comorbidities_count"
+COLUNA_FARMACOS = "drugs_count"
+COLUNA_COHABITACAO = "cohab"
+
+COLUNAS_ITENS = ([c for itens in ITENS_SIM_NAO.values() for c in itens]
+                 + [COLUNA_COMORBIDADES, COLUNA_FARMACOS, COLUNA_COHABITACAO])
+
+# Valor do domínio indexado pelo nº de respostas "Sim" (0 a 3), como no formulário.
+# Na cognição conta-se os erros, ou seja, as respostas diferentes de "Sim".
+VALOR_POR_CONTAGEM = {
+    "ADL": np.array([1, 0.5, 0.5, 0]),
+    "IADL": np.array([1, 0.5, 0.5, 0]),
+    "Mobility": np.array([1, 0.5, 0, 0]),
+    "Cognitive": np.array([0, 0.5, 1, 1]),
+    "Nutritional": np.array([0, 0.5, 1, 1]),
+}
+VALOR_COHABITACAO = {"Com família": 0, "Instituição": 0.5}
+# Contagens (comorbidades e fármacos): cortes inclusivos -> 0, 0.5 ou 1
+# (0 | 1-2 | 3+ doenças crônicas; 0-3 | 4-6 | 7+ fármacos)
+VALORES_POR_CORTE = np.array([0, 0.5, 1])
+CORTES_COMORBIDADES = np.array([0, 2])
+CORTES_FARMACOS = np.array([3, 6])
+
+_RESPOSTAS_SIM = {"sim", "s", "1", "1.0", "true"}
+
+
+def _eh_sim(col: pd.Series) -> np.ndarray:
+    """Marca as respostas afirmativas ("Sim", 1 ou True) de uma coluna de itens."""
+    return col.astype(str).str.strip().str.lower().isin(_RESPOSTAS_SIM).to_numpy()
+
+
+def valor_por_cortes(cortes: np.ndarray, contagem):
+    """Valor do domínio (0, 0.5, 1) de uma contagem ou array de contagens (vazio -> 1)."""
+    return VALORES_POR_CORTE[np.searchsorted(cortes, contagem, side="left")]
+
+
+def tem_itens(df: pd.DataFrame) -> bool:
+    """Indica se a planilha traz as respostas item a item do questionário."""
+    return all(c in df.columns for c in COLUNAS_ITENS)
+
+
+# ---------- Codificação em lote ----------
+def encode_domains_batch(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte respostas item a item nas 8 dimensões do Brief-MPI (0, 0.5, 1).
+
+    Aplica as mesmas regras de avaliacao_individual, coluna a coluna, e devolve
+    um DataFrame com as colunas de DOMAINS alinhado ao índice de entrada.
+    """
+    out = {}
+    for dominio, itens in ITENS_SIM_NAO.items():
+        sim = np.zeros(len(df), dtype=np.int8)
+        for item in itens:
+            sim += _eh_sim(df[item])
+        contagem = len(itens) - sim if dominio == "Cognitive" else sim
+        out[dominio] = VALOR_POR_CONTAGEM[dominio][contagem]
+
+    comorb = pd.to_numeric(df[COLUNA_COMORBIDADES], errors="coerce").to_numpy(dtype=float)
+    out["Comorbidity"] = valor_por_cortes(CORTES_COMORBIDADES, comorb)
+
+    drugs = pd.to_numeric(df[COLUNA_FARMACOS], errors="coerce").to_numpy(dtype=float)
+    out["Drugs"] = valor_por_cortes(CORTES_FARMACOS, drugs)
+
+    cohab = df[COLUNA_COHABITACAO].astype(str).str.strip()
+    out["Cohabitation"] = cohab.map(VALOR_COHABITACAO).fillna(1).to_numpy(dtype=float)
+
+    return pd.DataFrame(out, index=df.index)[DOMAINS]
@@ -0,0 +1,240 @@
+import tempfile
+
+import pandas as pd
+
+from . import metricas
+from .colunas import COLUNA_ERROS, COLUNA_FONTE, COLUNA_INSTITUICAO, COLUNAS_IDENTIFICACAO
+from .encoding import COLUNA_COMORBIDADES, COLUNA_FARMACOS, COLUNAS_ITENS
+from .scoring import DOMAINS, RISCOS
+
+# formato -> (rótulo, extensão, mime)
+FORMATOS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "arrow": ("Arrow IPC", ".arrow", "application/vnd.apache.arrow.file"),
+}
+
+# Acima deste tamanho o arquivo temporário passa da memória para o disco
+LIMITE_MEMORIA = 32 * 1024 * 1024
+# Nº de linhas escritas por vez ao exportar um DataFrame inteiro
+TAMANHO_BLOCO = 50_000
+# Tipos fixos no Parquet/Arrow das colunas conhecidas, qualquer que seja o 1º lote
+# (um lote só com linhas inválidas traz MPI todo vazio; um só com IDs numéricos, números)
+COLUNAS_NUMERO = {*DOMAINS, "MPI", COLUNA_COMORBIDADES, COLUNA_FARMACOS}
+COLUNAS_TEXTO = ({*COLUNAS_IDENTIFICACAO, COLUNA_INSTITUICAO, COLUNA_FONTE, COLUNA_ERROS,
+                  *COLUNAS_ITENS} - COLUNAS_NUMERO)
+# Colunas de faixa gravadas como dicionário, com as categorias fixas
+CATEGORIAS_CONHECIDAS = {"risk": RISCOS}
+
+
+# ---------- Exportação incremental ----------
+class Exportador:
+    """Grava resultados lote a lote num arquivo temporário, em CSV, Parquet ou Arrow IPC.
+
+    O arquivo fica em memória até LIMITE_MEMORIA e depois passa para o disco, de
+    modo que nunca existe uma cópia em string/bytes do resultado inteiro.
+    """
+
+    def __init__(self, formato: str = "csv", arquivo=None):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconhecido: {formato}")
+        self.formato = formato
+        # Sem `arquivo` (um arquivo binário já aberto), grava num temporário
+        if arquivo is None:
+            arquivo = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA)
+        self.arquivo = arquivo
+        self.linhas = 0
+        self._escritor = None
+        self._schema = None
+        self._categorias = None
+
+    @property
+    def extensao(self) -> str:
+        return FORMATOS[self.formato][1]
+
+    @property
+    def mime(self) -> str:
+        return FORMATOS[self.formato][2]
+
+    def escrever(self, df: pd.DataFrame) -> None:
+        """Acrescenta um lote de linhas ao arquivo."""
+        if self.formato == "csv":
+            df.to_csv(self.arquivo, header=(self.linhas == 0), index=False)
+        else:
+            self._escrever_arrow(df)
+        self.linhas += len(df)
+
+    def _escrever_arrow(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+
+        if self._escritor is None:
+            self._schema, self._categorias = _esquema_arrow(df)
+            if self.formato == "parquet":
+                import pyarrow.parquet as pq
+                self._escritor = pq.ParquetWriter(self.arquivo, self._schema)
+            else:
+                self._escritor = pa.ipc.new_file(self.arquivo, self._schema)
+        self._escritor.write_table(_tabela_arrow(df, self._schema, self._categorias))
+
+    def fechar(self) -> None:
+        """Finaliza o arquivo (rodapé do Parquet/Arrow); o conteúdo continua disponível."""
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+
+    def ler(self) -> bytes:
+        """Conteúdo final do arquivo, lido só no momento do download."""
+        self.fechar()
+        self.arquivo.seek(0)
+        return self.arquivo.read()
+
+
+# ---------- Esquema do Parquet/Arrow ----------
+# O tipo inferido de uma coluna pode mudar entre lotes (Instituição vazia num
+# lote -> float NaN, texto no seguinte). As colunas conhecidas (dimensões, MPI,
+# faixa, erros, identificação) têm tipo fixo; só as demais saem do 1º lote, com
+# texto e colunas vazias em string e números em float64. As colunas de
+# categorias viram dicionários com as mesmas categorias em todos os lotes (o
+# Arrow IPC não aceita trocar o dicionário no meio do arquivo).
+def _esquema_arrow(df: pd.DataFrame) -> tuple:
+    """(esquema do arquivo inteiro, {coluna: categorias}) a partir do 1º lote."""
+    import pyarrow as pa
+
+    campos, categorias = [], {}
+    for c in df.columns:
+        col, nome = df[c], str(c)
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            categorias[nome] = [str(v) for v in col.cat.categories]
+        elif nome in CATEGORIAS_CONHECIDAS:
+            categorias[nome] = CATEGORIAS_CONHECIDAS[nome]
+        if nome in categorias:
+            indice = pa.int8() if len(categorias[nome]) < 128 else pa.int32()
+            campos.append((nome, pa.dictionary(indice, pa.string())))
+        else:
+            campos.append((nome, _tipo_arrow(col)))
+    return pa.schema(campos), categorias
+
+
+def _tipo_arrow(col: pd.Series):
+    """Tipo Arrow de uma coluna (fora as de categorias) no arquivo inteiro."""
+    import pyarrow as pa
+
+    nome = str(col.name)
+    if nome in COLUNAS_NUMERO or nome.startswith("MPI "):
+        return pa.float64()
+    if nome in COLUNAS_TEXTO or col.isna().all():
+        return pa.string()
+    if pd.api.types.is_bool_dtype(col):
+        return pa.bool_()
+    if pd.api.types.is_numeric_dtype(col):
+        return pa.float64()
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return pa.Array.from_pandas(col).type
+    return pa.string()
+
+
+def _texto(col: pd.Series) -> pd.Series:
+    """Coluna como texto, com vazios preservados (IDs 1.0, 2.0 -> "1", "2")."""
+    if pd.api.types.is_float_dtype(col) and (col.dropna() % 1 == 0).all():
+        col = col.astype("Int64")
+    return col.astype("string")
+
+
+def _categorizar(col: pd.Series, categorias: list, tipo):
+    """Coluna como dicionário com as `categorias` fixas do arquivo."""
+    import pyarrow as pa
+
+    codigos = pd.Index(categorias).get_indexer(_texto(col))  # -1: vazio ou fora delas
+    fora = (codigos < 0) & col.notna().to_numpy()
+    if fora.any():
+        raise ValueError(f"Coluna {col.name}: valores fora das categorias {categorias}: "
+                         f"{sorted(set(_texto(col)[fora]))[:5]}")
+    return pa.DictionaryArray.from_arrays(
+        pa.array(codigos, type=tipo.index_type, mask=codigos < 0),
+        pa.array(categorias, type=pa.string()))
+
+
+def _tabela_arrow(df: pd.DataFrame, schema, categorias: dict):
+    """Um lote convertido para o esquema fixo do arquivo."""
+    import pyarrow as pa
+
+    colunas = []
+    for campo in schema:
+        col = df[campo.name]
+        try:
+            if campo.name in categorias:
+                colunas.append(_categorizar(col, categorias[campo.name], campo.type))
+            elif col.isna().all():
+                colunas.append(pa.nulls(len(col), campo.type))
+            elif pa.types.is_string(campo.type):
+                colunas.append(pa.array(_texto(col), type=campo.type, from_pandas=True))
+            else:
+                colunas.append(pa.array(col, type=campo.type, from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise ValueError(f"Coluna {campo.name}: valores de tipo {col.dtype} depois de "
+                             f"um 1º lote em {campo.type} ({e})") from None
+    return pa.Table.from_arrays(colunas, schema=schema)
+
+
+def tabela_arrow(df: pd.DataFrame):
+    """Um DataFrame inteiro como tabela Arrow, com os tipos do Exportador.
+
+    Colunas de objetos com tipos misturados (IDs ora texto, ora número) viram
+    string, em vez do erro do pa.Table.from_pandas.
+    """
+    return _tabela_arrow(df, *_esquema_arrow(df))
+
+
+def verificar_exportacao() -> list:
+    """Confere a exportação em lotes com tipos que mudam entre eles.
+
+    O 1º lote tem Instituição e uma coluna extra vazias, IDs numéricos,
+    contagens vazias e só linhas inválidas (MPI e faixa vazios); o seguinte
+    traz texto, IDs alfanuméricos, contagens e faixas. Devolve as divergências
+    entre o arquivo e os dados.
+    """
+    import io
+
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    vazio = float("nan")
+    lotes = [
+        pd.DataFrame({"Paciente": [1, 2], COLUNA_INSTITUICAO: [vazio] * 2, "Obs": [None, None],
+                      COLUNA_FARMACOS: [vazio] * 2, "MPI": [vazio] * 2, "risk": [None, None],
+                      COLUNA_ERROS: ["ADL", "IADL"]}),
+        pd.DataFrame({"Paciente": ["A3", None], COLUNA_INSTITUICAO: ["X", None],
+                      "Obs": ["ok", None], COLUNA_FARMACOS: [3, 7], "MPI": [vazio, 0.5],
+                      "risk": pd.Categorical([None, RISCOS[1]], categories=RISCOS),
+                      COLUNA_ERROS: ["MPI", ""]}),
+    ]
+    esperado = {"Paciente": ["1", "2", "A3", None], COLUNA_INSTITUICAO: [None, None, "X", None],
+                "Obs": [None, None, "ok", None], COLUNA_FARMACOS: [None, None, 3.0, 7.0],
+                "MPI": [None, None, None, 0.5], "risk": [None, None, None, RISCOS[1]],
+                COLUNA_ERROS: ["ADL", "IADL", "MPI", ""]}
+    divergencias = []
+    leitores = {"parquet": pq.read_table, "arrow": lambda f: ipc.open_file(f).read_all()}
+    for formato, ler in leitores.items():
+        exp = Exportador(formato, io.BytesIO())
+        try:
+            for lote in lotes:
+                exp.escrever(lote)
+            obtido = ler(io.BytesIO(exp.ler())).to_pydict()
+        except ValueError as e:
+            divergencias.append((f"exportação {formato}", "lotes", esperado, str(e)))
+            continue
+        if obtido != esperado:
+            divergencias.append((f"exportação {formato}", "lotes", esperado, obtido))
+    return divergencias
+
+
+def exportar(df: pd.DataFrame, formato: str = "csv", tamanho: int = TAMANHO_BLOCO,
+             arquivo=None) -> Exportador:
+    """Exporta um DataFrame já calculado, bloco a bloco."""
+    with metricas.trecho("exportar", linhas=len(df), formato=formato) as t:
+        exp = Exportador(formato, arquivo)
+        for inicio in range(0, max(len(df), 1), tamanho):
+            exp.escrever(df.iloc[inicio:inicio + tamanho])
+        exp.fechar()
+        t.registrar(bytes=exp.arquivo.tell())
+    return exp
@@ -0,0 +1,93 @@
+"""Reprocessamento incremental: só pontua as linhas novas ou alteradas.
+
+Cada linha recebe uma impressão digital (hash dos valores dos itens ou das
+dimensões). Comparada com a última avaliação gravada de cada paciente, ela
+separa as linhas em novas, alteradas e inalteradas; as inalteradas reaproveitam
+o resultado anterior.
+"""
+import numpy as np
+import pandas as pd
+
+from .colunas import COLUNA_ERROS, coluna_paciente
+from .encoding import COLUNAS_ITENS, tem_itens
+from .ingest import pontuar_lote
+from .scoring import DOMAINS, RISCOS
+from .validacao import validar
+
+COLUNA_IMPRESSAO = "impressao"
+COLUNA_SITUACAO = "Situação"
+COLUNA_RISCO_ANTERIOR = "Risco anterior"
+SITUACOES = ["novo", "alterado", "inalterado"]
+
+
+def colunas_impressao(df: pd.DataFrame) -> list:
+    """Colunas que entram na impressão: os itens do questionário, se houver, senão as dimensões."""
+    return COLUNAS_ITENS if tem_itens(df) else DOMAINS
+
+
+def _normalizar(col: pd.Series) -> pd.Series:
+    """Colunas numéricas viram float (1 e 1.0 têm o mesmo hash); as demais, texto sem espaços."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype(float)
+    return col.astype(str).str.strip()
+
+
+def impressoes(df: pd.DataFrame) -> np.ndarray:
+    """Hash (int64) dos valores de cada linha, estável entre execuções."""
+    valores = pd.DataFrame({c: _normalizar(df[c]) for c in colunas_impressao(df)})
+    return pd.util.hash_pandas_object(valores, index=False).to_numpy().view(np.int64)
+
+
+def pontuar_incremental(df: pd.DataFrame, anteriores: pd.DataFrame) -> pd.DataFrame:
+    """Pontua só as linhas novas ou alteradas em relação a `anteriores`.
+
+    `anteriores` tem uma linha por paciente (paciente, impressao, mpi, risco e as
+    DOMAINS, se a planilha não as trouxer), como devolvido por
+    store.ultimas_avaliacoes. O resultado é a planilha
+    pontuada, com as colunas "Situação" (novo/alterado/inalterado), "Risco
+    anterior" e a impressão de cada linha.
+    """
+    paciente = coluna_paciente(df.columns)
+    if paciente is None:
+        raise KeyError("A planilha não tem coluna de identificação do paciente "
+                       "(Paciente, Nome ou ID)")
+
+    df, _ = validar(df.reset_index(drop=True))
+    atual = impressoes(df)
+    anteriores = anteriores.drop_duplicates("paciente", keep="last").reset_index(drop=True)
+    # Posição de cada linha em `anteriores` (-1 = paciente sem avaliação gravada);
+    # sem reindex, para a impressão continuar int64 e comparar sem perda
+    posicao = pd.Index(anteriores["paciente"]).get_indexer(df[paciente].astype(str))
+    novo = posicao < 0
+    previa = anteriores.iloc[np.where(novo, 0, posicao)] if len(anteriores) else None
+    impressao_anterior = (previa[COLUNA_IMPRESSAO].to_numpy(dtype=np.int64)
+                          if previa is not None else np.zeros(len(df), dtype=np.int64))
+    inalterado = ~novo & (impressao_anterior == atual)
+    situacao = np.select([novo, inalterado], [0, 2], 1)
+
+    # Só as linhas novas/alteradas passam pela codificação e pelo cálculo
+    res = pontuar_lote(df.loc[~inalterado])
+    res.index = df.index[~inalterado]
+    if inalterado.any():
+        reaproveitado = df.loc[inalterado].copy()
+        for d in DOMAINS:
+            if d not in reaproveitado.columns:
+                reaproveitado[d] = previa[d].to_numpy()[inalterado]
+        reaproveitado["MPI"] = previa["mpi"].to_numpy()[inalterado]
+        reaproveitado["risk"] = pd.Categorical(previa["risco"].to_numpy()[inalterado],
+                                               categories=RISCOS)
+        res = pd.concat([res, reaproveitado]).sort_index()
+        res["risk"] = pd.Categorical(res["risk"], categories=RISCOS)
+
+    res[COLUNA_ERROS] = res[COLUNA_ERROS].fillna("")
+    res[COLUNA_SITUACAO] = pd.Categorical.from_codes(situacao, categories=SITUACOES)
+    res[COLUNA_RISCO_ANTERIOR] = (np.where(novo, None, previa["risco"].to_numpy())
+                                  if previa is not None else None)
+    res[COLUNA_IMPRESSAO] = atual
+    return res
+
+
+def mudaram_de_faixa(res: pd.DataFrame) -> pd.Series:
+    """Linhas alteradas cuja faixa de MPI é diferente da anterior."""
+    return ((res[COLUNA_SITUACAO] == "alterado")
+            & (res["risk"].astype(str) != res[COLUNA_RISCO_ANTERIOR]))
@@ -0,0 +1,92 @@
+import io
+import os
+
+import pandas as pd
+
+from . import metricas
+from .colunas import COLUNA_ERROS
+from .encoding import encode_domains_batch, tem_itens
+from .scoring import DOMAINS, compute_brief_mpi_batch
+from .validacao import (coluna_necessaria, descrever_erros, ler_cabecalho, validar,
+                        validar_cabecalho)
+
+# Nº de linhas por lote no modo streaming
+TAMANHO_LOTE = 50_000
+
+
+# ---------- Leitura em lotes ----------
+def ler_em_lotes(file, nome: str, tamanho: int = TAMANHO_LOTE, colunas=None, aba=None):
+    """Lê um .csv ou .xlsx em lotes de até `tamanho` linhas, sem carregar o arquivo inteiro.
+
+    `colunas` (lista de nomes ou função nome -> bool) limita as colunas lidas;
+    `aba` escolhe a aba do .xlsx. Gera pares (lote, fração lida), com a fração
+    entre 0 e 1 (ou None se desconhecida).
+    """
+    if nome.endswith(".csv"):
+        total = getattr(file, "size", None)
+        if total is None and hasattr(file, "fileno"):
+            try:
+                total = os.fstat(file.fileno()).st_size
+            except (OSError, io.UnsupportedOperation):  # io.BytesIO: progresso desconhecido
+                pass
+        usecols = colunas if colunas is None or callable(colunas) else set(colunas).__contains__
+        for lote in pd.read_csv(file, chunksize=tamanho, usecols=usecols):
+            yield lote, min(file.tell() / total, 1.0) if total else None
+    else:
+        from .xlsx import ler_xlsx_em_lotes
+
+        yield from ler_xlsx_em_lotes(file, tamanho, colunas=colunas, aba=aba)
+
+
+# ---------- Cálculo ----------
+def pontuar_lote(df: pd.DataFrame) -> pd.DataFrame:
+    """Acrescenta MPI e risco a um lote (codificando os itens do questionário, se preciso).
+
+    Os valores passam antes por validacao.validar; linhas com valor inválido
+    ficam sem MPI e risco, com as colunas problemáticas descritas em "Erros".
+    """
+    with metricas.trecho("validar", linhas=len(df)):
+        df, erros = validar(df.reset_index(drop=True))
+    if not all(c in df.columns for c in DOMAINS) and tem_itens(df):
+        # Respostas item a item: codificar as 8 dimensões antes do cálculo
+        with metricas.trecho("codificar_itens", linhas=len(df)):
+            df = pd.concat([df, encode_domains_batch(df)], axis=1)
+    with metricas.trecho("pontuar", linhas=len(df)):
+        res = compute_brief_mpi_batch(df)
+    invalidas = erros.to_numpy().any(axis=1)
+    if invalidas.any():
+        res.loc[invalidas, "MPI"] = float("nan")
+        res.loc[invalidas, "risk"] = None
+    res[COLUNA_ERROS] = descrever_erros(erros)
+    return pd.concat([df, res], axis=1)
+
+
+def pontuar_em_lotes(file, nome: str, destino, tamanho: int = TAMANHO_LOTE,
+                     pontuar=pontuar_lote, progresso=None, colunas=coluna_necessaria,
+                     aba=None) -> int:
+    """Lê, pontua e grava no `destino` (um export.Exportador) lote a lote.
+
+    A memória usada fica limitada ao tamanho do lote, qualquer que seja o arquivo.
+    Com o `pontuar` padrão, o esquema é conferido pelo cabeçalho antes de ler o corpo.
+    Por padrão só as colunas usadas no cálculo e na identificação são lidas
+    (`colunas=None` mantém todas). `progresso`, se informado, é chamado com
+    (linhas processadas, fração lida). Devolve o nº de linhas processadas.
+    """
+    if pontuar is pontuar_lote:
+        validar_cabecalho(ler_cabecalho(file, nome, aba))
+    linhas = 0
+    lotes = ler_em_lotes(file, nome, tamanho, colunas=colunas, aba=aba)
+    while True:
+        with metricas.trecho("ler_lote") as t:
+            lote, fracao = next(lotes, (None, None))
+            t.registrar(linhas=None if lote is None else len(lote))
+        if lote is None:
+            break
+        res = pontuar(lote)
+        with metricas.trecho("exportar_lote", linhas=len(res), formato=destino.formato):
+            destino.escrever(res)
+        linhas += len(res)
+        if progresso is not None:
+            progresso(linhas, fracao)
+    destino.fechar()
+    return linhas
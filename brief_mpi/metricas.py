@@ -0,0 +1,161 @@
+"""Instrumentação dos trechos críticos: leitura, validação, cálculo, exportação e PDF.
+
+Uma *execução* (uma rodada do script do app, uma tarefa em segundo plano...)
+reúne *trechos* cronometrados, com linhas e bytes processados, e o pico de
+memória. Cada execução terminada vai para o painel de desempenho do app e é
+gravada como uma linha JSON em ARQUIVO_PADRAO, fácil de coletar por outras
+ferramentas.
+
+Desligada (o padrão), cada trecho custa só uma verificação de booleano: as
+funções devolvem um objeto nulo compartilhado. Para ligar, use MPI_METRICAS=1
+(ou MPI_METRICAS=memoria, que mede o pico com o tracemalloc, bem mais caro)
+ou chame ativar().
+"""
+import contextvars
+import datetime
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ARQUIVO_PADRAO = os.environ.get("MPI_METRICAS_ARQUIVO", os.path.join("dados", "metricas.jsonl"))
+# Execuções guardadas em memória para o painel
+EXECUCOES_GUARDADAS = 50
+
+_modo = os.environ.get("MPI_METRICAS", "").strip().lower()
+_ativo = _modo not in ("", "0", "false", "nao", "não")
+_memoria = _modo == "memoria"
+_arquivo = ARQUIVO_PADRAO
+_atual = contextvars.ContextVar("execucao_metricas", default=None)
+_execucoes = deque(maxlen=EXECUCOES_GUARDADAS)
+_trava = threading.Lock()
+
+
+class _Nulo:
+    """Trecho/execução que não mede nada (instrumentação desligada)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def registrar(self, **info):
+        pass
+
+
+_NULO = _Nulo()
+
+
+def ativo() -> bool:
+    return _ativo
+
+
+def ativar(ligado: bool = True, memoria: bool = False, arquivo: str | None = None):
+    """Liga (ou desliga) a instrumentação no processo inteiro."""
+    global _ativo, _memoria, _arquivo
+    _ativo, _memoria = ligado, ligado and memoria
+    if arquivo is not None:
+        _arquivo = arquivo
+
+
+# ---------- Execuções e trechos ----------
+class _Trecho:
+    __slots__ = ("execucao", "nome", "info", "inicio")
+
+    def __init__(self, execucao, nome: str, info: dict):
+        self.execucao, self.nome, self.info = execucao, nome, info
+
+    def registrar(self, **info):
+        """Acrescenta contagens conhecidas só depois (ex.: linhas lidas)."""
+        self.info.update(info)
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self.inicio
+        self.execucao.trechos.append({"trecho": self.nome, "segundos": round(segundos, 6),
+                                      **{k: v for k, v in self.info.items() if v is not None}})
+        return False
+
+
+class _Execucao:
+    def __init__(self, nome: str, info: dict):
+        self.nome, self.info = nome, info
+        self.trechos = []
+
+    def registrar(self, **info):
+        self.info.update(info)
+
+    def __enter__(self):
+        self._token = _atual.set(self)
+        self._tracemalloc = _memoria and not tracemalloc.is_tracing()
+        if self._tracemalloc:
+            tracemalloc.start()
+        self.data = datetime.datetime.now().isoformat(timespec="milliseconds")
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_erro, *exc):
+        segundos = time.perf_counter() - self.inicio
+        _atual.reset(self._token)
+        registro = {"execucao": self.nome, "data": self.data, "segundos": round(segundos, 6),
+                    **self.info, "trechos": self.trechos}
+        if tipo_erro is not None:
+            registro["erro"] = tipo_erro.__name__
+        if self._tracemalloc:
+            registro["pico_memoria_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            tracemalloc.stop()
+        if resource is not None:
+            # ru_maxrss: pico do processo inteiro (KB no Linux)
+            registro["rss_maximo_mb"] = round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        _guardar(registro)
+        return False
+
+
+def execucao(nome: str, **info):
+    """Contexto que agrupa os trechos medidos durante uma execução."""
+    if not _ativo:
+        return _NULO
+    return _Execucao(nome, info)
+
+
+def trecho(nome: str, linhas: int | None = None, bytes: int | None = None, **info):
+    """Cronometra um trecho da execução atual (nada acontece fora de uma execução)."""
+    if not _ativo:
+        return _NULO
+    atual = _atual.get()
+    if atual is None:
+        return _NULO
+    return _Trecho(atual, nome, {"linhas": linhas, "bytes": bytes, **info})
+
+
+# ---------- Registro ----------
+def _guardar(registro: dict):
+    with _trava:
+        _execucoes.append(registro)
+        if not _arquivo:
+            return
+        try:
+            if os.path.dirname(_arquivo):
+                os.makedirs(os.path.dirname(_arquivo), exist_ok=True)
+            with open(_arquivo, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        except OSError:
+            pass  # a medição nunca derruba o app
+
+
+def ultimas_execucoes() -> list:
+    """Execuções terminadas neste processo, da mais recente para a mais antiga."""
+    with _trava:
+        return list(reversed(_execucoes))
@@ -0,0 +1,448 @@
+"""Regras de pontuação declarativas (JSON ou YAML), compiladas em cortes e tabelas.
+
+Um conjunto de regras diz de onde sai cada dimensão e como ela vira um valor
+(0, 0.5, 1...), e quais são os cortes das faixas de risco:
+
+    nome: brief-mpi-local
+    base: brief-mpi            # herda as demais dimensões e as faixas
+    dominios:
+      Drugs: {coluna: drugs_count, cortes: [4, 8], valores: [0, 0.5, 1], limites: [0, null]}
+    faixas:
+      cortes: [0.30, 0.60]
+      rotulos: [Mild (MPI 1), Moderate (MPI 2), High (MPI 3)]
+
+Cada dimensão tem uma de quatro formas:
+- itens: colunas sim/não; o valor é indexado pelo nº de "Sim" (contar: sim)
+  ou de respostas diferentes de "Sim" (contar: nao), como no formulário;
+- coluna + cortes: uma escala numérica; cortes crescentes e inclusivos
+  (x <= corte, como no pd.cut; "direita: false" faz x < corte), um valor a
+  mais que cortes; "limites" [mín, máx] marca o que fica fora como inválido;
+- coluna + pontos: só os números listados são aceitos (um valor para cada);
+  qualquer outro, como 0.3 numa dimensão em 0/0.5/1, invalida a linha;
+- coluna + categorias: texto -> valor, com "outros" para o que não estiver
+  na lista.
+Opcionais: "peso" por dimensão (MPI = média ponderada), "casas" do MPI
+arredondado (padrão 2) e "direita" nas faixas, que cortam o MPI bruto.
+
+Ao compilar, cada dimensão vira um índice na sua lista de valores (cortes ->
+searchsorted, pontos -> posição exata, categorias -> códigos) e o MPI e a faixa de todas as
+combinações desses índices vão para uma tabela. Em aplicar_regras, cada
+coluna da coorte é convertida uma única vez e compartilhada pelos conjuntos
+que a usam; cada conjunto só soma índices e consulta a sua tabela. As saídas
+ficam lado a lado ("MPI brief-mpi", "risk brief-mpi", ...), para comparar
+coluna a coluna (comparar_regras).
+
+Linhas com alguma entrada vazia, não numérica ou fora dos limites ficam sem
+MPI e risco naquele conjunto, como no pontuar_lote.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import metricas
+from .encoding import (COLUNA_COHABITACAO, COLUNA_COMORBIDADES, COLUNA_FARMACOS,
+                       CORTES_COMORBIDADES, CORTES_FARMACOS, ITENS_SIM_NAO, VALOR_COHABITACAO,
+                       VALOR_POR_CONTAGEM, VALORES_POR_CORTE, _eh_sim)
+from .scoring import DOMAINS, LIMIARES, RISCOS
+from .validacao import _numerico
+
+# Combinações aceitas na tabela de um conjunto (produto do nº de valores das dimensões)
+COMBINACOES_MAXIMAS = 2 ** 20
+
+_COHABITACAO = {"coluna": COLUNA_COHABITACAO, "categorias": VALOR_COHABITACAO, "outros": 1}
+_FAIXAS = {"cortes": LIMIARES.tolist(), "rotulos": RISCOS}
+
+# ---------- Conjuntos embutidos ----------
+REGRAS_EMBUTIDAS = {
+    # O formulário do app (avaliacao_individual) e o encode_domains_batch
+    "brief-mpi": {
+        "descricao": "Brief-MPI: itens sim/não, contagens e co-habitação do formulário",
+        "dominios": {
+            **{d: {"itens": itens, "contar": "nao" if d == "Cognitive" else "sim",
+                   "valores": VALOR_POR_CONTAGEM[d].tolist()}
+               for d, itens in ITENS_SIM_NAO.items()},
+            "Comorbidity": {"coluna": COLUNA_COMORBIDADES, "cortes": CORTES_COMORBIDADES.tolist(),
+                            "valores": VALORES_POR_CORTE.tolist(), "limites": [0, None]},
+            "Drugs": {"coluna": COLUNA_FARMACOS, "cortes": CORTES_FARMACOS.tolist(),
+                      "valores": VALORES_POR_CORTE.tolist(), "limites": [0, None]},
+            "Cohabitation": _COHABITACAO,
+        },
+        "faixas": _FAIXAS,
+    },
+    # Planilhas com as 8 dimensões já codificadas (só as faixas mudam entre variantes)
+    "brief-mpi-dominios": {
+        "descricao": "Brief-MPI a partir das 8 dimensões já em 0/0.5/1",
+        # Só 0, 0.5 e 1 exatos, como em validacao.validar (0.3 não vira 0.5)
+        "dominios": {d: {"coluna": d, "pontos": [0, 0.5, 1], "valores": [0, 0.5, 1]}
+                     for d in DOMAINS},
+        "faixas": _FAIXAS,
+    },
+    # MPI completo, com as escalas originais de cada dimensão
+    "mpi": {
+        "descricao": "MPI completo: Katz, Lawton, Exton-Smith, SPMSQ, MNA, CIRS, fármacos "
+                     "e co-habitação",
+        "dominios": {
+            "ADL": {"coluna": "katz", "cortes": [2, 4], "valores": [1, 0.5, 0],
+                    "limites": [0, 6]},
+            "IADL": {"coluna": "lawton", "cortes": [3, 5], "valores": [1, 0.5, 0],
+                     "limites": [0, 8]},
+            "Mobility": {"coluna": "exton_smith", "cortes": [9, 15], "valores": [1, 0.5, 0],
+                         "limites": [5, 20]},
+            "Cognitive": {"coluna": "spmsq_erros", "cortes": [3, 7], "valores": [0, 0.5, 1],
+                          "limites": [0, 10]},
+            "Nutritional": {"coluna": "mna", "cortes": [17, 24], "direita": False,
+                            "valores": [1, 0.5, 0], "limites": [0, 30]},
+            "Comorbidity": {"coluna": "cirs_ci", "cortes": [0, 2], "valores": [0, 0.5, 1],
+                            "limites": [0, 14]},
+            "Drugs": {"coluna": COLUNA_FARMACOS, "cortes": CORTES_FARMACOS.tolist(),
+                      "valores": VALORES_POR_CORTE.tolist(), "limites": [0, None]},
+            "Cohabitation": _COHABITACAO,
+        },
+        "faixas": _FAIXAS,
+    },
+}
+
+
+class ErroRegras(ValueError):
+    """Definição de regras inválida (chave desconhecida, cortes fora de ordem...)."""
+
+
+# ---------- Leitura e compilação ----------
+def ler_regras(caminho: str) -> dict:
+    """Definição de um arquivo .json, .yaml ou .yml (YAML requer o PyYAML)."""
+    with open(caminho, encoding="utf-8") as f:
+        if caminho.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ErroRegras(f"{caminho}: instale o PyYAML ou use JSON") from None
+            definicao = yaml.safe_load(f)
+        else:
+            definicao = json.load(f)
+    if not isinstance(definicao, dict):
+        raise ErroRegras(f"{caminho}: esperado um objeto com dominios e faixas")
+    definicao.setdefault("nome", os.path.splitext(os.path.basename(caminho))[0])
+    return definicao
+
+
+def obter_regras(regras) -> "Regras":
+    """Regras compiladas de um nome embutido, um arquivo, um dict ou um Regras."""
+    if isinstance(regras, Regras):
+        return regras
+    if isinstance(regras, dict):
+        return Regras(regras)
+    if regras in REGRAS_EMBUTIDAS:
+        return Regras({"nome": regras, **REGRAS_EMBUTIDAS[regras]})
+    if os.path.exists(regras):
+        return Regras(ler_regras(regras))
+    raise ErroRegras(f"Regras desconhecidas: {regras} (embutidas: {', '.join(REGRAS_EMBUTIDAS)})")
+
+
+def _herdar(definicao: dict) -> dict:
+    """Definição com as dimensões e faixas herdadas de "base" (um conjunto embutido)."""
+    base = definicao.get("base")
+    if base is None:
+        return definicao
+    if base not in REGRAS_EMBUTIDAS:
+        raise ErroRegras(f"Base desconhecida: {base}")
+    herdada = _herdar(REGRAS_EMBUTIDAS[base])
+    return {**herdada, **definicao,
+            "dominios": {**herdada["dominios"], **definicao.get("dominios", {})},
+            "faixas": {**herdada["faixas"], **definicao.get("faixas", {})}}
+
+
+def _crescentes(cortes, onde: str) -> np.ndarray:
+    cortes = np.asarray(cortes, dtype=float)
+    if cortes.ndim != 1 or np.isnan(cortes).any() or (np.diff(cortes) <= 0).any():
+        raise ErroRegras(f"{onde}: cortes devem ser números crescentes")
+    return cortes
+
+
+class _Dominio:
+    """Uma dimensão compilada: índice na lista de valores e entradas inválidas."""
+
+    CHAVES = {"itens", "contar", "coluna", "cortes", "direita", "limites", "pontos",
+              "categorias", "outros", "valores", "peso"}
+
+    def __init__(self, nome: str, regra: dict):
+        desconhecidas = set(regra) - self.CHAVES
+        if desconhecidas:
+            raise ErroRegras(f"{nome}: chaves desconhecidas {sorted(desconhecidas)}")
+        self.nome = nome
+        self.peso = float(regra.get("peso", 1))
+        if not self.peso > 0:
+            raise ErroRegras(f"{nome}: o peso deve ser positivo")
+        if any(k in regra for k in ("cortes", "pontos", "categorias")) and "coluna" not in regra:
+            raise ErroRegras(f"{nome}: informe a coluna da planilha")
+        if "itens" in regra:
+            self.tipo, self.itens = "itens", list(regra["itens"])
+            if regra.get("contar", "sim") not in ("sim", "nao"):
+                raise ErroRegras(f"{nome}: contar deve ser sim ou nao")
+            self.contar_nao = regra.get("contar") == "nao"
+            valores, esperados = regra.get("valores", []), len(self.itens) + 1
+        elif "cortes" in regra:
+            self.tipo, self.coluna = "cortes", regra["coluna"]
+            self.cortes = _crescentes(regra["cortes"], nome)
+            self.lado = "left" if regra.get("direita", True) else "right"
+            minimo, maximo = (list(regra.get("limites") or []) + [None, None])[:2]
+            self.minimo = -np.inf if minimo is None else float(minimo)
+            self.maximo = np.inf if maximo is None else float(maximo)
+            valores, esperados = regra.get("valores", []), len(self.cortes) + 1
+        elif "pontos" in regra:
+            self.tipo, self.coluna = "pontos", regra["coluna"]
+            self.pontos = _crescentes(regra["pontos"], nome)
+            valores, esperados = regra.get("valores", []), len(self.pontos)
+        elif "categorias" in regra:
+            if not isinstance(regra["categorias"], dict):
+                raise ErroRegras(f"{nome}: categorias deve mapear texto -> valor")
+            self.tipo, self.coluna = "categorias", regra["coluna"]
+            self.categorias = [str(c).strip() for c in regra["categorias"]]
+            valores = [*regra["categorias"].values(), regra.get("outros", np.nan)]
+            esperados = len(valores)
+        else:
+            raise ErroRegras(f"{nome}: informe itens, cortes, pontos ou categorias")
+        if len(valores) != esperados:
+            raise ErroRegras(f"{nome}: esperados {esperados} valores, há {len(valores)}")
+        self.valores = np.asarray(valores, dtype=float)
+
+    def indices(self, entradas: "_Entradas") -> tuple:
+        """(posição na lista de valores, máscara de linhas inválidas)."""
+        if self.tipo == "itens":
+            contagem, faltando = entradas.contagem(tuple(self.itens))
+            if self.contar_nao:
+                contagem = len(self.itens) - contagem
+            return contagem, faltando
+        if self.tipo == "cortes":
+            x = entradas.numero(self.coluna)
+            indices = np.searchsorted(self.cortes, x, side=self.lado)
+            return indices, ~((x >= self.minimo) & (x <= self.maximo))  # NaN também
+        if self.tipo == "pontos":
+            x = entradas.numero(self.coluna)
+            indices = np.minimum(np.searchsorted(self.pontos, x), len(self.pontos) - 1)
+            return indices, ~(self.pontos[indices] == x)  # NaN também
+        codigos, faltando = entradas.categoria(self.coluna, tuple(self.categorias))
+        indices = np.where(codigos < 0, len(self.categorias), codigos)
+        # "outros" sem valor: a categoria não listada invalida a linha
+        return indices, faltando | (np.isnan(self.valores[-1]) & (codigos < 0))
+
+
+class Regras:
+    """Um conjunto de regras compilado: dimensões, tabela de MPI/faixa e rótulos."""
+
+    CHAVES = {"nome", "descricao", "base", "dominios", "faixas", "casas"}
+
+    def __init__(self, definicao: dict):
+        definicao = _herdar(definicao)
+        desconhecidas = set(definicao) - self.CHAVES
+        if desconhecidas:
+            raise ErroRegras(f"Chaves desconhecidas: {sorted(desconhecidas)}")
+        self.nome = str(definicao.get("nome") or "regras")
+        self.descricao = definicao.get("descricao", "")
+        self.definicao = definicao
+        if not definicao.get("dominios"):
+            raise ErroRegras(f"{self.nome}: nenhuma dimensão definida")
+        self.dominios = [_Dominio(d, regra) for d, regra in definicao["dominios"].items()]
+        faixas = definicao.get("faixas") or {}
+        self.limiares = _crescentes(faixas.get("cortes", []), f"{self.nome}: faixas")
+        self.rotulos = list(faixas.get("rotulos", []))
+        if len(self.rotulos) != len(self.limiares) + 1:
+            raise ErroRegras(f"{self.nome}: as faixas precisam de um rótulo a mais que cortes")
+        self.lado = "left" if faixas.get("direita", True) else "right"
+        self.casas = int(definicao.get("casas", 2))
+        self._compilar()
+
+    def _compilar(self):
+        """Tabela de MPI e faixa de todas as combinações, por código de base mista."""
+        tamanhos = [len(d.valores) for d in self.dominios]
+        total = int(np.prod(tamanhos))
+        if total > COMBINACOES_MAXIMAS:
+            raise ErroRegras(f"{self.nome}: {total:,} combinações (máximo {COMBINACOES_MAXIMAS:,})")
+        self.bases = np.cumprod([1, *tamanhos[:-1]])
+        codigos = np.arange(total)
+        # Soma na ordem das dimensões, como o sum() de compute_brief_mpi_from_domains
+        soma = np.zeros(total)
+        for dominio, base, tamanho in zip(self.dominios, self.bases, tamanhos):
+            soma = soma + dominio.peso * dominio.valores[(codigos // base) % tamanho]
+        mpi_raw = soma / sum(d.peso for d in self.dominios)
+        # round() do Python, para bater com o cálculo escalar
+        unicos, inverso = np.unique(mpi_raw, return_inverse=True)
+        mpi = np.array([round(float(u), self.casas) for u in unicos])[inverso.reshape(-1)]
+        faixa = np.searchsorted(self.limiares, mpi_raw, side=self.lado)
+        # "outros" sem valor (NaN) nunca chega à tabela: a linha é inválida antes
+        faixa[np.isnan(mpi_raw)] = -1
+        self.mpi = mpi
+        self.faixa = faixa.astype(np.int8)
+        self.mpi.flags.writeable = self.faixa.flags.writeable = False
+
+    def __repr__(self) -> str:
+        return f"Regras({self.nome!r}, {len(self.dominios)} dimensões, {len(self.mpi):,} combinações)"
+
+    @property
+    def colunas(self) -> list:
+        """Colunas da planilha usadas por este conjunto."""
+        return list(dict.fromkeys(c for d in self.dominios
+                                  for c in (d.itens if d.tipo == "itens" else [d.coluna])))
+
+    def aplicar(self, entradas: "_Entradas", dominios: bool = False) -> dict:
+        """Colunas de saída deste conjunto ("MPI nome", "risk nome" e, se pedido, as dimensões)."""
+        codigo = np.zeros(entradas.linhas, dtype=np.int64)
+        invalidas = np.zeros(entradas.linhas, dtype=bool)
+        saida = {}
+        for dominio, base in zip(self.dominios, self.bases):
+            indices, faltando = dominio.indices(entradas)
+            codigo += indices * base
+            invalidas |= faltando
+            if dominios:
+                saida[f"{dominio.nome} {self.nome}"] = np.where(faltando, np.nan,
+                                                                dominio.valores[indices])
+        codigo[invalidas] = 0
+        mpi = np.where(invalidas, np.nan, self.mpi[codigo])
+        faixa = np.where(invalidas, -1, self.faixa[codigo])
+        return {**saida, f"MPI {self.nome}": mpi,
+                f"risk {self.nome}": pd.Categorical.from_codes(faixa, categories=self.rotulos)}
+
+
+# ---------- Aplicação ----------
+class _Entradas:
+    """Colunas da coorte já convertidas, compartilhadas entre os conjuntos de regras."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.linhas = len(df)
+        self._convertidas = {}
+
+    def _coluna(self, coluna: str) -> pd.Series:
+        if coluna not in self.df.columns:
+            raise KeyError(f"Coluna ausente na planilha: {coluna}")
+        return self.df[coluna]
+
+    def _memo(self, chave, calcular):
+        if chave not in self._convertidas:
+            self._convertidas[chave] = calcular()
+        return self._convertidas[chave]
+
+    def numero(self, coluna: str) -> np.ndarray:
+        """Coluna numérica (aceita vírgula decimal; vazio e texto viram NaN)."""
+        return self._memo(("numero", coluna),
+                          lambda: _numerico(self._coluna(coluna)).to_numpy(dtype=float))
+
+    def sim(self, coluna: str) -> tuple:
+        """(respostas "Sim", respostas vazias) de uma coluna de itens."""
+        def calcular():
+            col = self._coluna(coluna)
+            return _eh_sim(col), col.isna().to_numpy()
+        return self._memo(("sim", coluna), calcular)
+
+    def contagem(self, itens: tuple) -> tuple:
+        """(nº de "Sim", algum item vazio) de um grupo de itens."""
+        def calcular():
+            contagem = np.zeros(self.linhas, dtype=np.int8)
+            faltando = np.zeros(self.linhas, dtype=bool)
+            for item in itens:
+                sim, vazio = self.sim(item)
+                contagem += sim
+                faltando |= vazio
+            return contagem, faltando
+        return self._memo(("contagem", itens), calcular)
+
+    def categoria(self, coluna: str, categorias: tuple) -> tuple:
+        """(código de cada linha em `categorias`, -1 se fora delas; linhas vazias)."""
+        def calcular():
+            col = self._coluna(coluna)
+            texto = col.astype(str).str.strip()
+            codigos = pd.Index(list(categorias)).get_indexer(texto)  # -1 fora da lista
+            return codigos, col.isna().to_numpy()
+        return self._memo(("categoria", coluna, categorias), calcular)
+
+
+def aplicar_regras(df: pd.DataFrame, conjuntos, dominios: bool = False) -> pd.DataFrame:
+    """MPI e faixa de cada conjunto de regras, lado a lado, numa passada pela coorte.
+
+    `conjuntos` aceita nomes embutidos (REGRAS_EMBUTIDAS), arquivos JSON/YAML,
+    dicts ou Regras já compiladas. As colunas de entrada são convertidas uma
+    vez só, qualquer que seja o nº de conjuntos. Com `dominios`, as dimensões
+    de cada conjunto também vão para a saída.
+    """
+    conjuntos = [obter_regras(c) for c in conjuntos]
+    nomes = [r.nome for r in conjuntos]
+    if len(set(nomes)) != len(nomes):
+        raise ErroRegras(f"Conjuntos com o mesmo nome: {nomes}")
+    entradas = _Entradas(df)
+    saida = {}
+    with metricas.trecho("aplicar_regras", linhas=len(df), conjuntos=len(conjuntos)):
+        for regras in conjuntos:
+            saida.update(regras.aplicar(entradas, dominios))
+    return pd.DataFrame(saida, index=df.index)
+
+
+def comparar_regras(res: pd.DataFrame, referencia: str, outra: str) -> pd.DataFrame:
+    """Tabela cruzada das faixas de dois conjuntos já aplicados (linhas: referência)."""
+    return pd.crosstab(res[f"risk {referencia}"], res[f"risk {outra}"],
+                       margins=True, margins_name="Total", dropna=False)
+
+
+def concordancia(res: pd.DataFrame, referencia: str, outra: str) -> dict:
+    """Fração de pacientes na mesma faixa e diferença média de MPI entre dois conjuntos."""
+    validas = res[f"MPI {referencia}"].notna() & res[f"MPI {outra}"].notna()
+    a, b = res.loc[validas, f"risk {referencia}"], res.loc[validas, f"risk {outra}"]
+    mesma = (a.astype(str).to_numpy() == b.astype(str).to_numpy()).mean() if len(a) else np.nan
+    diferenca = (res.loc[validas, f"MPI {outra}"] - res.loc[validas, f"MPI {referencia}"]).mean()
+    return {"pacientes": int(validas.sum()), "mesma_faixa": float(mesma),
+            "diferenca_mpi": float(diferenca)}
+
+
+# ---------- Conformidade ----------
+def verificar_regras(linhas: int = 20_000) -> list:
+    """Confere os conjuntos embutidos do Brief-MPI contra o cálculo do pacote.
+
+    "brief-mpi-dominios" nas 6561 combinações (contra tabela_mpi) e em valores
+    fora da grade (contra o pontuar_lote, que os deixa sem MPI), e
+    "brief-mpi" numa coorte sorteada de itens (contra o pontuar_lote, que
+    codifica com encode_domains_batch). Devolve a lista de divergências.
+    """
+    from .ingest import pontuar_lote
+    from .scoring import _casos_fora_da_grade, combinacoes
+
+    divergencias = []
+    todas = combinacoes()
+    res = aplicar_regras(todas[DOMAINS], ["brief-mpi-dominios"])
+    for codigo in np.flatnonzero((res["MPI brief-mpi-dominios"] != todas["MPI"]).to_numpy()
+                                 | (res["risk brief-mpi-dominios"] != todas["risk"]).to_numpy()):
+        divergencias.append((f"brief-mpi-dominios {codigo}", todas.iloc[codigo][DOMAINS].to_dict(),
+                             todas.iloc[codigo]["MPI"], res.iloc[codigo].tolist()))
+
+    # Fora da grade (0.3, 0.499..., vírgula decimal, vazio): inválidas nos dois
+    fora = pd.DataFrame(_casos_fora_da_grade(), columns=DOMAINS).astype(object)
+    fora = pd.concat([fora, todas[DOMAINS].iloc[::50].astype(object)], ignore_index=True)
+    fora.loc[::7, "IADL"] = "0,5"
+    fora.loc[::11, "Drugs"] = None
+    fora.loc[::13, "ADL"] = "x"
+    divergencias += _divergencias("brief-mpi-dominios", fora, pontuar_lote(fora),
+                                  aplicar_regras(fora, ["brief-mpi-dominios"]))
+
+    rng = np.random.default_rng(0)
+    itens = pd.DataFrame({c: rng.choice(["Sim", "Não"], size=linhas)
+                          for grupo in ITENS_SIM_NAO.values() for c in grupo})
+    itens[COLUNA_COMORBIDADES] = rng.integers(0, 8, size=linhas)
+    itens[COLUNA_FARMACOS] = rng.integers(0, 15, size=linhas)
+    itens[COLUNA_COHABITACAO] = rng.choice([*VALOR_COHABITACAO, "Sozinho"], size=linhas)
+    # Algumas linhas inválidas (item vazio, contagem negativa), que ficam sem MPI
+    itens.loc[::97, "adl1"] = None
+    itens.loc[::89, COLUNA_FARMACOS] = -1
+    divergencias += _divergencias("brief-mpi", itens, pontuar_lote(itens),
+                                  aplicar_regras(itens, ["brief-mpi"]))
+    return divergencias
+
+
+def _divergencias(nome: str, entrada: pd.DataFrame, esperado: pd.DataFrame,
+                  res: pd.DataFrame) -> list:
+    """Linhas em que MPI ou faixa de um conjunto diferem do pontuar_lote (vazio = vazio)."""
+    mpi, risco = res[f"MPI {nome}"], res[f"risk {nome}"].astype(object)
+    diferentes = ((mpi != esperado["MPI"]) & ~(mpi.isna() & esperado["MPI"].isna())
+                  | (risco != esperado["risk"].astype(object)) & ~(risco.isna()
+                                                                   & esperado["risk"].isna()))
+    return [(f"{nome} linha {i}", entrada.iloc[i].to_dict(),
+             (esperado.at[i, "MPI"], esperado.at[i, "risk"]), (mpi[i], risco[i]))
+            for i in np.flatnonzero(diferentes.to_numpy())]
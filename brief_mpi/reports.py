@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab import rl_config
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+
+from . import metricas
+from .colunas import COLUNAS_IDENTIFICACAO
+
+LOGO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                    "logo", "logo_projeto.png")
+LARGURA_LOGO = 3 * cm
+
+# Imagens em binário: a codificação ASCII85 (em Python puro) custava mais que o resto do relatório
+rl_config.useA85 = 0
+
+# Nº de relatórios enviados a cada processo por tarefa
+RELATORIOS_POR_TAREFA = 16
+
+
+# ---------- Modelo do relatório (montado uma vez por processo) ----------
+@lru_cache(maxsize=None)
+def _estilos():
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=None)
+def _logo():
+    """Logo reduzido e convertido para JPEG uma única vez (o PNG original tem 1920x1200).
+
+    O JPEG é embutido no PDF sem recodificação, ao contrário do PNG com transparência.
+    Devolve (bytes do JPEG, (largura, altura)).
+    """
+    if not os.path.exists(LOGO):
+        return None
+    from PIL import Image
+
+    with Image.open(LOGO) as im:
+        im.thumbnail((300, 300))
+        fundo = Image.new("RGB", im.size, "white")
+        fundo.paste(im, mask=im.convert("RGBA").getchannel("A"))
+    jpeg = BytesIO()
+    fundo.save(jpeg, "JPEG", quality=90)
+    return jpeg.getvalue(), fundo.size
+
+
+def _moldura(canvas, doc):
+    """Elementos fixos da página: logo no canto superior e rodapé."""
+    canvas.saveState()
+    logo = _logo()
+    if logo is not None:
+        jpeg, (largura, altura) = logo
+        h = LARGURA_LOGO * altura / largura
+        canvas.drawImage(ImageReader(BytesIO(jpeg)),
+                         A4[0] - doc.rightMargin - LARGURA_LOGO, A4[1] - h - 1 * cm,
+                         width=LARGURA_LOGO, height=h)
+    canvas.setFont("Helvetica", 8)
+    canvas.drawString(doc.leftMargin, 1 * cm, "Brief-MPI - Índice Prognóstico Multidimensional")
+    canvas.restoreState()
+
+
+# ---------- Relatório individual ----------
+def export_pdf(data: dict) -> BytesIO:
+    """Gera PDF simples com resumo"""
+    with metricas.trecho("pdf") as t:
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        styles = _estilos()
+        story = []
+        story.append(Paragraph("Relatório Brief-MPI", styles["Title"]))
+        story.append(Spacer(1, 12))
+        for k,v in data.items():
+            story.append(Paragraph(f"<b>{k}:</b> {v}", styles["Normal"]))
+            story.append(Spacer(1, 6))
+        doc.build(story, onFirstPage=_moldura, onLaterPages=_moldura)
+        t.registrar(bytes=buffer.tell())
+    buffer.seek(0)
+    return buffer
+
+
+def limpar_modelo():
+    """Descarta estilos e logo em cache (usado no benchmark)."""
+    for f in (_estilos, _logo):
+        f.cache_clear()
+
+
+def nome_relatorio(data: dict, posicao: int) -> str:
+    """Nome do arquivo PDF de um paciente dentro do ZIP."""
+    for coluna in COLUNAS_IDENTIFICACAO:
+        if data.get(coluna) not in (None, ""):
+            nome = re.sub(r"[^\w.-]+", "_", str(data[coluna])).strip("_")
+            return f"{posicao:06d}_{nome}.pdf"
+    return f"{posicao:06d}_paciente.pdf"
+
+
+def _renderizar_tarefa(tarefa: list) -> list:
+    """Executado nos processos: gera os PDFs de uma tarefa."""
+    return [(nome, export_pdf(data).getvalue()) for nome, data in tarefa]
+
+
+# ---------- Relatórios em lote ----------
+def _tarefas(registros, tamanho: int):
+    tarefa = []
+    for posicao, data in enumerate(registros, start=1):
+        tarefa.append((nome_relatorio(data, posicao), data))
+        if len(tarefa) == tamanho:
+            yield tarefa
+            tarefa = []
+    if tarefa:
+        yield tarefa
+
+
+def gerar_relatorios_zip(registros, destino, workers: int | None = None,
+                         progresso=None) -> dict:
+    """Gera um PDF por registro num pool de processos e grava cada um no ZIP `destino`.
+
+    `registros` pode ser qualquer iterável de dicts (é consumido aos poucos). Só
+    algumas tarefas ficam em andamento por vez, então a memória não cresce com o
+    tamanho da coorte. `progresso`, se informado, recebe o nº de PDFs gravados.
+    Devolve estatísticas de vazão para dimensionar o nº de processos.
+    """
+    workers = workers or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    gerados = 0
+    contexto = multiprocessing.get_context("spawn")
+    with (metricas.trecho("relatorios_zip", processos=workers) as t,
+          ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as pool,
+          zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED) as zf):
+        limite = 2 * workers
+        pendentes = deque()
+
+        def gravar_mais_antiga():
+            nonlocal gerados
+            for nome, pdf in pendentes.popleft().result():
+                zf.writestr(nome, pdf)
+                gerados += 1
+            if progresso is not None:
+                progresso(gerados)
+
+        for tarefa in _tarefas(registros, RELATORIOS_POR_TAREFA):
+            pendentes.append(pool.submit(_renderizar_tarefa, tarefa))
+            if len(pendentes) >= limite:
+                gravar_mais_antiga()
+        while pendentes:
+            gravar_mais_antiga()
+        t.registrar(linhas=gerados)
+    segundos = time.perf_counter() - inicio
+    return {
+        "relatorios": gerados,
+        "processos": workers,
+        "segundos": round(segundos, 3),
+        "relatorios_por_segundo": round(gerados / segundos, 1) if segundos else 0.0,
+    }
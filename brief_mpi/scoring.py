@@ -0,0 +1,214 @@
+import itertools
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ---------- Constantes do Brief-MPI ----------
+DOMAINS = ["ADL", "IADL", "Mobility", "Cognitive", "Nutritional",
+           "Comorbidity", "Drugs", "Cohabitation"]
+
+# Pontos de corte do MPI bruto (inclusivos, como em compute_brief_mpi_from_domains)
+LIMIARES = np.array([0.33, 0.66])
+RISCOS = ['Mild (MPI 1)', 'Moderate (MPI 2)', 'High (MPI 3)']
+# Rótulos em português das mesmas faixas (calculadora por dimensões)
+RISCOS_PT = ['Baixo risco (MPI 1)', 'Risco moderado (MPI 2)', 'Alto risco (MPI 3)']
+ROTULO_PT = dict(zip(RISCOS, RISCOS_PT))
+
+# Incrementar sempre que as regras de pontuação mudarem (invalida resultados em cache)
+VERSAO_REGRAS = "2"
+
+
+# ---------- Cálculo individual ----------
+def classificar(mpi_raw: float) -> str:
+    """Faixa de risco do MPI bruto (antes de arredondar)."""
+    if mpi_raw <= 0.33:
+        return 'Mild (MPI 1)'
+    elif mpi_raw <= 0.66:
+        return 'Moderate (MPI 2)'
+    return 'High (MPI 3)'
+
+
+def compute_brief_mpi_from_domains(domains: dict) -> dict:
+    """Recebe um dict com os 8 valores (0,0.5,1) e devolve escore + risco.
+
+    É a referência das regras: o lote e a tabela de consulta são conferidos
+    contra ela (verificar_conformidade). A faixa sai do MPI bruto; só o
+    escore devolvido é arredondado.
+    """
+    vals = list(domains.values())
+    mpi_raw = sum(vals) / 8
+    return {"MPI": round(mpi_raw, 2), "risk": classificar(mpi_raw)}
+
+
+# ---------- Cálculo em lote ----------
+def compute_brief_mpi_batch(domains) -> pd.DataFrame:
+    """Versão vetorizada de compute_brief_mpi_from_domains para uma coorte inteira.
+
+    Recebe um DataFrame com as 8 colunas de DOMAINS (ou um array (n, 8) na mesma
+    ordem) e devolve um DataFrame com "MPI" e "risk", alinhado às linhas de entrada.
+    """
+    if isinstance(domains, pd.DataFrame):
+        index = domains.index
+        valores = domains[DOMAINS].to_numpy(dtype=float)
+    else:
+        valores = np.asarray(domains, dtype=float).reshape(-1, len(DOMAINS))
+        index = pd.RangeIndex(len(valores))
+
+    # Caso comum (só 0, 0.5 e 1): consulta direta à tabela pré-calculada
+    codigos = codificar_base3(valores)
+    if codigos is not None:
+        mpi, faixas = tabela_mpi()
+        return pd.DataFrame({
+            "MPI": mpi[codigos],
+            "risk": pd.Categorical.from_codes(faixas[codigos], categories=RISCOS),
+        }, index=index)
+
+    mpi, codigos = _calcular_aritmetico(valores)
+    return pd.DataFrame({
+        "MPI": mpi,
+        "risk": pd.Categorical.from_codes(codigos, categories=RISCOS),
+    }, index=index)
+
+
+def _calcular_aritmetico(valores: np.ndarray) -> tuple:
+    """(MPI arredondado, código da faixa) de um array (n, 8) com valores quaisquer."""
+    # Soma coluna a coluna, na mesma ordem do sum() da versão escalar
+    soma = np.zeros(len(valores))
+    for j in range(len(DOMAINS)):
+        soma = soma + valores[:, j]
+    mpi_raw = soma / 8
+
+    # searchsorted à esquerda: <= 0.33 -> 0, <= 0.66 -> 1, resto (e NaN) -> 2
+    codigos = np.searchsorted(LIMIARES, mpi_raw, side="left")
+
+    # round() do Python em poucos valores distintos, para bater com a versão escalar
+    unicos, inverso = np.unique(mpi_raw, return_inverse=True)
+    mpi = np.array([round(float(u), 2) for u in unicos])[inverso.reshape(-1)]
+    return mpi, codigos
+
+
+# ---------- Tabela de consulta ----------
+# Só existem 3^8 = 6561 combinações das dimensões; cada uma tem um código em
+# base 3 (dígito = dimensão ×2, ADL no dígito menos significativo)
+N_COMBINACOES = 3 ** len(DOMAINS)
+PESOS_BASE3 = 3 ** np.arange(len(DOMAINS))
+
+
+def codificar_base3(valores) -> np.ndarray | None:
+    """Código base 3 de cada linha de um array (n, 8); None se houver valor fora de 0/0.5/1."""
+    duplos = np.asarray(valores, dtype=float).reshape(-1, len(DOMAINS)) * 2
+    if not ((duplos == 0) | (duplos == 1) | (duplos == 2)).all():  # NaN também cai aqui
+        return None
+    return (duplos @ PESOS_BASE3.astype(float)).astype(np.intp)
+
+
+@lru_cache(maxsize=None)
+def tabela_mpi() -> tuple:
+    """(MPI, código da faixa) de todas as combinações, indexados pelo código base 3.
+
+    Montada uma vez com compute_brief_mpi_from_domains, a referência das regras.
+    """
+    mpi = np.empty(N_COMBINACOES)
+    faixas = np.empty(N_COMBINACOES, dtype=np.uint8)
+    for codigo, valores in enumerate(_combinacoes()):
+        res = compute_brief_mpi_from_domains(dict(zip(DOMAINS, valores)))
+        mpi[codigo] = res["MPI"]
+        faixas[codigo] = RISCOS.index(res["risk"])
+    mpi.flags.writeable = faixas.flags.writeable = False
+    return mpi, faixas
+
+
+def _combinacoes():
+    """As 6561 combinações na ordem dos códigos (ADL varia mais rápido)."""
+    for digitos in itertools.product((0, 1, 2), repeat=len(DOMAINS)):
+        yield [d / 2 for d in reversed(digitos)]
+
+
+def compute_brief_mpi_lookup(domains: dict) -> dict:
+    """Como compute_brief_mpi_from_domains, mas por consulta à tabela (valores 0, 0.5 ou 1)."""
+    codigo = codificar_base3([domains[d] for d in DOMAINS])
+    if codigo is None:
+        return compute_brief_mpi_from_domains(domains)
+    mpi, faixas = tabela_mpi()
+    return {"MPI": float(mpi[codigo[0]]), "risk": RISCOS[faixas[codigo[0]]]}
+
+
+def combinacoes(risco: str | None = None, mpi: float | None = None) -> pd.DataFrame:
+    """Consulta reversa: combinações de dimensões que dão um risco e/ou um MPI.
+
+    Ex.: combinacoes(risco="High (MPI 3)"). Devolve uma linha por combinação,
+    com o código base 3 como índice.
+    """
+    tab_mpi, faixas = tabela_mpi()
+    filtro = np.ones(N_COMBINACOES, dtype=bool)
+    if risco is not None:
+        if risco not in RISCOS:
+            raise ValueError(f"Risco desconhecido: {risco}")
+        filtro &= faixas == RISCOS.index(risco)
+    if mpi is not None:
+        filtro &= tab_mpi == mpi
+    codigos = np.flatnonzero(filtro)
+    digitos = (codigos[:, None] // PESOS_BASE3) % 3
+    df = pd.DataFrame(digitos / 2, columns=DOMAINS, index=pd.Index(codigos, name="codigo"))
+    df["MPI"] = tab_mpi[codigos]
+    df["risk"] = pd.Categorical.from_codes(faixas[codigos], categories=RISCOS)
+    return df
+
+
+def verificar_tabela() -> list:
+    """Confere tabela, versão em lote e decodificação contra a função escalar.
+
+    Devolve a lista de divergências (vazia quando tudo confere).
+    """
+    divergencias = []
+    todas = combinacoes()
+    lote = compute_brief_mpi_batch(todas[DOMAINS])
+    for codigo, valores in zip(todas.index, todas[DOMAINS].itertuples(index=False, name=None)):
+        dominios = dict(zip(DOMAINS, valores))
+        esperado = compute_brief_mpi_from_domains(dominios)
+        obtido = {"MPI": lote.at[codigo, "MPI"], "risk": lote.at[codigo, "risk"]}
+        if obtido != esperado or compute_brief_mpi_lookup(dominios) != esperado:
+            divergencias.append((codigo, dominios, esperado, obtido))
+        if codificar_base3(list(valores))[0] != codigo:
+            divergencias.append((codigo, dominios, "código", codificar_base3(list(valores))[0]))
+    return divergencias
+
+
+# ---------- Conformidade ----------
+# Valores fora de 0/0.5/1 (que não passam pela tabela) usados para conferir a
+# via aritmética do lote: vizinhança dos pontos de corte e sorteio fixo
+def _casos_fora_da_grade() -> np.ndarray:
+    uniformes = np.repeat(np.round(np.linspace(0, 1, 301), 4)[:, None], len(DOMAINS), axis=1)
+    cortes = np.concatenate([LIMIARES + d for d in (-1e-9, -0.005, 0, 0.005, 1e-9)])
+    perto = np.repeat(cortes[:, None], len(DOMAINS), axis=1)
+    sorteados = np.random.default_rng(0).choice(np.round(np.arange(0, 1.0001, 0.01), 2),
+                                                size=(5000, len(DOMAINS)))
+    return np.vstack([uniformes, perto, sorteados])
+
+
+def verificar_conformidade() -> list:
+    """Confere os três caminhos de cálculo (escalar, lote e tabela) entre si.
+
+    Além de verificar_tabela, roda a via aritmética do lote nas 6561
+    combinações e compara lote, consulta e cálculo escalar em valores fora da
+    grade, onde a faixa depende do MPI bruto (antes de arredondar). Devolve a
+    lista de divergências (vazia quando tudo confere).
+    """
+    divergencias = verificar_tabela()
+
+    tab_mpi, faixas = tabela_mpi()
+    mpi, codigos = _calcular_aritmetico(combinacoes()[DOMAINS].to_numpy())
+    for codigo in np.flatnonzero((mpi != tab_mpi) | (codigos != faixas)):
+        divergencias.append((f"aritmético {codigo}", "combinação",
+                             (tab_mpi[codigo], faixas[codigo]), (mpi[codigo], codigos[codigo])))
+
+    valores = _casos_fora_da_grade()
+    lote = compute_brief_mpi_batch(valores)
+    for i, linha in enumerate(valores.tolist()):
+        dominios = dict(zip(DOMAINS, linha))
+        esperado = compute_brief_mpi_from_domains(dominios)
+        obtido = {"MPI": lote.at[i, "MPI"], "risk": lote.at[i, "risk"]}
+        if obtido != esperado or compute_brief_mpi_lookup(dominios) != esperado:
+            divergencias.append((f"fora da grade {i}", dominios, esperado, obtido))
+    return divergencias
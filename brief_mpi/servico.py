@@ -0,0 +1,203 @@
+"""Serviço HTTP de pontuação, para o prontuário eletrônico calcular o MPI sem o Streamlit.
+
+Endpoints (mesmo núcleo de cálculo do app e da linha de comando):
+- POST /pontuar: um paciente, objeto JSON com as 8 dimensões (nomes ou
+  apelidos) ou as respostas item a item. Devolve os campos com os nomes
+  padrão, como no lote (apelidos viram os nomes de DOMAINS; respostas item a
+  item ganham as 8 dimensões), com "MPI", "risk" e "Erros".
+- POST /pontuar/lote: vários pacientes em JSON (lista de objetos), NDJSON
+  (um objeto por linha) ou Arrow IPC (stream ou arquivo), conforme o
+  Content-Type. A resposta sai no formato pedido em Accept ou, sem ele, no
+  mesmo formato da entrada.
+- GET /saude: situação e versão das regras.
+
+Rode com ``python -m brief_mpi servir --workers 4``: cada worker é um processo
+do uvicorn com o seu laço assíncrono, e a tabela de consulta é montada uma vez
+por processo, na inicialização. Só a consulta à tabela roda no laço; os lotes
+e os pacientes que passam pelo pontuar_lote são pontuados numa thread, sem
+travar o laço para as demais requisições.
+"""
+import contextlib
+import io
+import json
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from . import metricas
+from .colunas import COLUNA_ERROS
+from .export import tabela_arrow
+from .ingest import pontuar_lote
+from .scoring import DOMAINS, VERSAO_REGRAS, compute_brief_mpi_lookup, tabela_mpi
+from .validacao import ErroEsquema
+
+# Content-Type -> formato do lote
+TIPOS_LOTE = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+}
+# formato -> Content-Type da resposta
+MIME_RESPOSTA = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+# Pacientes aceitos por requisição de lote
+LINHAS_MAXIMAS = 100_000
+
+
+class ErroEntrada(ValueError):
+    """Corpo da requisição ilegível ou fora do formato esperado."""
+
+
+def preparar():
+    """Monta a tabela de consulta e carrega o caminho do lote, uma vez por processo."""
+    tabela_mpi()
+    pontuar_lote(pd.DataFrame([dict.fromkeys(DOMAINS, 0)]))
+
+
+@contextlib.asynccontextmanager
+async def _ciclo_de_vida(app):
+    preparar()
+    yield
+
+
+# ---------- Entrada e saída ----------
+def _formato(cabecalho: str | None) -> str | None:
+    """Formato de um Content-Type/Accept (ignorando parâmetros como charset)."""
+    for tipo in (cabecalho or "").split(","):
+        formato = TIPOS_LOTE.get(tipo.split(";")[0].strip().lower())
+        if formato:
+            return formato
+    return None
+
+
+def ler_lote(corpo: bytes, formato: str) -> pd.DataFrame:
+    """DataFrame com os pacientes do corpo de uma requisição de lote."""
+    try:
+        if formato == "arrow":
+            import pyarrow as pa
+
+            leitor = pa.ipc.open_stream if corpo[:6] != b"ARROW1" else pa.ipc.open_file
+            return leitor(pa.py_buffer(corpo)).read_all().to_pandas()
+        if formato == "ndjson":
+            # Uma chamada ao json.loads para o lote inteiro, e não uma por linha
+            linhas = [linha for linha in corpo.splitlines() if linha.strip()]
+            registros = json.loads(b"[" + b",".join(linhas) + b"]")
+        else:
+            registros = json.loads(corpo)
+    except (ValueError, OSError) as e:  # JSON inválido ou ArrowInvalid
+        raise ErroEntrada(f"Corpo ilegível como {formato}: {e}") from e
+    if not isinstance(registros, list) or not all(isinstance(r, dict) for r in registros):
+        raise ErroEntrada("Esperada uma lista de objetos, um por paciente")
+    return pd.DataFrame.from_records(registros)
+
+
+def escrever_lote(res: pd.DataFrame, formato: str) -> bytes:
+    """Corpo da resposta de um lote pontuado."""
+    if formato == "arrow":
+        import pyarrow as pa
+
+        tabela = tabela_arrow(res)
+        buffer = io.BytesIO()
+        with pa.ipc.new_stream(buffer, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        return buffer.getvalue()
+    return res.to_json(orient="records", lines=formato == "ndjson",
+                       force_ascii=False, date_format="iso").encode("utf-8")
+
+
+# ---------- Cálculo ----------
+def consultar_paciente(paciente: dict) -> dict | None:
+    """Caminho rápido de pontuar_paciente: as 8 dimensões já em 0/0.5/1 (None se não)."""
+    valores = [paciente.get(d) for d in DOMAINS]
+    if all(type(v) in (int, float) and v in (0, 0.5, 1) for v in valores):
+        return {**paciente, **compute_brief_mpi_lookup(dict(zip(DOMAINS, valores))),
+                COLUNA_ERROS: ""}
+    return None
+
+
+def pontuar_paciente(paciente: dict) -> dict:
+    """MPI, risco e erros de um paciente, com os campos nos nomes padrão (como no lote).
+
+    Com as 8 dimensões já em 0/0.5/1 (o caso comum) é uma consulta à tabela e
+    os campos voltam como vieram. Apelidos, vírgula decimal e respostas item a
+    item passam pelo pontuar_lote: os apelidos voltam com os nomes de DOMAINS
+    e as respostas item a item ganham as 8 dimensões codificadas.
+    """
+    res = consultar_paciente(paciente)
+    if res is not None:
+        return res
+    res = pontuar_lote(pd.DataFrame([paciente]))
+    return json.loads(res.to_json(orient="records", force_ascii=False, date_format="iso"))[0]
+
+
+def pontuar_corpo(corpo: bytes, entrada: str, saida: str) -> bytes:
+    """Lê, pontua e serializa um lote (roda numa thread do pool)."""
+    with metricas.execucao("api:lote", formato=entrada) as execucao:
+        df = ler_lote(corpo, entrada)
+        if len(df) > LINHAS_MAXIMAS:
+            raise ErroEntrada(f"Lote com {len(df):,} pacientes; o máximo é {LINHAS_MAXIMAS:,}")
+        execucao.registrar(linhas=len(df))
+        res = pontuar_lote(df)
+        with metricas.trecho("exportar", linhas=len(res), formato=saida):
+            return escrever_lote(res, saida)
+
+
+# ---------- Endpoints ----------
+def _erro(mensagem: str, status: int) -> JSONResponse:
+    return JSONResponse({"erro": mensagem}, status_code=status)
+
+
+async def saude(request: Request) -> JSONResponse:
+    return JSONResponse({"situacao": "ok", "versao_regras": VERSAO_REGRAS})
+
+
+async def pontuar(request: Request) -> Response:
+    try:
+        paciente = json.loads(await request.body())
+    except ValueError as e:
+        return _erro(f"JSON inválido: {e}", 400)
+    if not isinstance(paciente, dict):
+        return _erro("Esperado um objeto com as dimensões do paciente", 400)
+    try:
+        # Consulta à tabela no laço; o pontuar_lote (mais lento) numa thread
+        res = consultar_paciente(paciente)
+        if res is None:
+            res = await run_in_threadpool(pontuar_paciente, paciente)
+    except ErroEsquema as e:
+        return _erro(str(e), 422)
+    return JSONResponse(res)
+
+
+async def pontuar_em_lote(request: Request) -> Response:
+    entrada = _formato(request.headers.get("content-type"))
+    if entrada is None:
+        return _erro("Content-Type deve ser JSON, NDJSON ou Arrow IPC", 415)
+    saida = _formato(request.headers.get("accept")) or entrada
+    corpo = await request.body()
+    try:
+        conteudo = await run_in_threadpool(pontuar_corpo, corpo, entrada, saida)
+    except ErroEntrada as e:
+        return _erro(str(e), 400)
+    except ErroEsquema as e:
+        return _erro(str(e), 422)
+    return Response(conteudo, media_type=MIME_RESPOSTA[saida])
+
+
+def criar_app() -> Starlette:
+    return Starlette(routes=[
+        Route("/saude", saude, methods=["GET"]),
+        Route("/pontuar", pontuar, methods=["POST"]),
+        Route("/pontuar/lote", pontuar_em_lote, methods=["POST"]),
+    ], lifespan=_ciclo_de_vida)
+
+
+app = criar_app()
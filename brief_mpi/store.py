@@ -0,0 +1,182 @@
+"""Histórico de avaliações num arquivo SQLite local (sem serviço externo).
+
+A tabela `avaliacoes` guarda todas as avaliações, indexada por paciente e por
+instituição (ambos com a data). A tabela `ultimas` guarda só a avaliação mais
+recente de cada paciente e é atualizada a cada gravação, de modo que a
+distribuição atual das faixas de MPI sai em milissegundos, sem varrer o histórico.
+Cada avaliação guarda também a impressão digital dos valores de origem (ver
+incremental.py), usada para reprocessar só o que mudou num novo envio.
+"""
+import datetime
+import os
+import sqlite3
+from itertools import islice
+
+import pandas as pd
+
+from . import metricas
+from .colunas import COLUNA_DATA, COLUNA_FONTE, COLUNA_INSTITUICAO, coluna_paciente
+from .incremental import COLUNA_IMPRESSAO, impressoes
+from .scoring import DOMAINS
+
+BANCO_PADRAO = os.environ.get("MPI_BANCO", os.path.join("dados", "avaliacoes.sqlite3"))
+# Linhas inseridas por transação na gravação em lote
+LOTE_INSERCAO = 10_000
+
+_COLUNAS = ["paciente", "instituicao", "data", *DOMAINS, "mpi", "risco", "fonte", "impressao"]
+_INSERIR = "INSERT INTO avaliacoes ({}) VALUES ({})".format(
+    ", ".join(f'"{c}"' for c in _COLUNAS), ", ".join("?" * len(_COLUNAS)))
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS avaliacoes (
+    id INTEGER PRIMARY KEY,
+    paciente TEXT NOT NULL,
+    instituicao TEXT,
+    data TEXT NOT NULL,
+    {", ".join(f'"{d}" REAL' for d in DOMAINS)},
+    mpi REAL NOT NULL,
+    risco TEXT NOT NULL,
+    fonte TEXT,
+    impressao INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_paciente ON avaliacoes (paciente, data);
+CREATE INDEX IF NOT EXISTS idx_avaliacoes_instituicao ON avaliacoes (instituicao, data);
+CREATE TABLE IF NOT EXISTS ultimas (
+    paciente TEXT PRIMARY KEY,
+    avaliacao_id INTEGER NOT NULL,
+    instituicao TEXT,
+    data TEXT NOT NULL,
+    mpi REAL NOT NULL,
+    risco TEXT NOT NULL,
+    impressao INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_ultimas_instituicao ON ultimas (instituicao, risco);
+"""
+
+# Leva as avaliações novas (id > ?) para `ultimas`, mantendo só a mais recente por paciente
+_ATUALIZAR_ULTIMAS = """
+INSERT INTO ultimas (paciente, avaliacao_id, instituicao, data, mpi, risco, impressao)
+SELECT paciente, id, instituicao, data, mpi, risco, impressao FROM avaliacoes
+WHERE id > ? ORDER BY data, id
+ON CONFLICT (paciente) DO UPDATE SET
+    avaliacao_id = excluded.avaliacao_id, instituicao = excluded.instituicao,
+    data = excluded.data, mpi = excluded.mpi, risco = excluded.risco,
+    impressao = excluded.impressao
+WHERE excluded.data >= ultimas.data
+"""
+
+
+def conectar(caminho: str | None = None) -> sqlite3.Connection:
+    """Abre (e cria, se preciso) o banco de avaliações."""
+    caminho = caminho or BANCO_PADRAO
+    if os.path.dirname(caminho):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    con = sqlite3.connect(caminho)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(_ESQUEMA)
+    _migrar(con)
+    return con
+
+
+def _migrar(con: sqlite3.Connection):
+    """Acrescenta a coluna `impressao` a bancos criados antes dela."""
+    for tabela in ("avaliacoes", "ultimas"):
+        colunas = {c for (_, c, *_) in con.execute(f"PRAGMA table_info({tabela})")}
+        if "impressao" not in colunas:
+            with con:
+                con.execute(f"ALTER TABLE {tabela} ADD COLUMN impressao INTEGER")
+
+
+# ---------- Gravação ----------
+def salvar_avaliacoes(con: sqlite3.Connection, df: pd.DataFrame, data=None,
+                      fonte: str | None = None, lote: int = LOTE_INSERCAO) -> int:
+    """Grava avaliações já pontuadas (DOMAINS, MPI e risk) em transações de `lote` linhas.
+
+    O paciente vem da primeira coluna de identificação presente (Paciente, Nome
+    ou ID); instituição, data e fonte vêm das colunas correspondentes, quando
+    existem, ou dos argumentos (a data padrão é hoje). Linhas sem MPI (com valores
+    inválidos) não são gravadas. Devolve o nº de linhas gravadas.
+    """
+    paciente = coluna_paciente(df.columns)
+    if paciente is None:
+        raise KeyError("A planilha não tem coluna de identificação do paciente "
+                       "(Paciente, Nome ou ID)")
+    df = df[df["MPI"].notna()]
+
+    data = (data or datetime.date.today()).isoformat()
+    n = len(df)
+    tabela = pd.DataFrame({
+        "paciente": df[paciente].astype(str).to_numpy(),
+        "instituicao": (df[COLUNA_INSTITUICAO].astype("string")
+                        .to_numpy(dtype=object, na_value=None)
+                        if COLUNA_INSTITUICAO in df.columns else [None] * n),
+        "data": (pd.to_datetime(df[COLUNA_DATA], errors="coerce").dt.strftime("%Y-%m-%d")
+                 .fillna(data).to_numpy()
+                 if COLUNA_DATA in df.columns else [data] * n),
+        **{d: df[d].astype(float).to_numpy() for d in DOMAINS},
+        "mpi": df["MPI"].astype(float).to_numpy(),
+        "risco": df["risk"].astype(str).to_numpy(),
+        "fonte": (df[COLUNA_FONTE].astype(str).to_numpy()
+                  if COLUNA_FONTE in df.columns else [fonte] * n),
+        "impressao": (df[COLUNA_IMPRESSAO].to_numpy()
+                      if COLUNA_IMPRESSAO in df.columns else impressoes(df)).tolist(),
+    })
+
+    linhas = tabela.itertuples(index=False, name=None)
+    with metricas.trecho("salvar_historico", linhas=n):
+        while True:
+            bloco = list(islice(linhas, lote))
+            if not bloco:
+                break
+            with con:
+                (ultimo_id,) = con.execute("SELECT COALESCE(MAX(id), 0) FROM avaliacoes").fetchone()
+                con.executemany(_INSERIR, bloco)
+                con.execute(_ATUALIZAR_ULTIMAS, (ultimo_id,))
+    return n
+
+
+# ---------- Consultas ----------
+def versao_banco(con: sqlite3.Connection) -> int:
+    """Id da avaliação mais recente; muda a cada gravação (útil como chave de cache)."""
+    (versao,) = con.execute("SELECT COALESCE(MAX(id), 0) FROM avaliacoes").fetchone()
+    return versao
+
+
+def historico_paciente(con: sqlite3.Connection, paciente: str) -> pd.DataFrame:
+    """Todas as avaliações de um paciente, da mais antiga para a mais recente."""
+    return pd.read_sql_query(
+        "SELECT * FROM avaliacoes WHERE paciente = ? ORDER BY data, id",
+        con, params=(str(paciente),), parse_dates=["data"])
+
+
+def ultimas_avaliacoes(con: sqlite3.Connection, pacientes, dominios: bool = True) -> pd.DataFrame:
+    """Última avaliação (MPI, risco, impressão e, se pedido, dimensões) de cada paciente da lista."""
+    with con:
+        con.execute("CREATE TEMP TABLE IF NOT EXISTS _consulta (paciente TEXT PRIMARY KEY)")
+        con.execute("DELETE FROM _consulta")
+        con.executemany("INSERT OR IGNORE INTO _consulta VALUES (?)",
+                        ((str(p),) for p in pacientes))
+    if dominios:
+        colunas = "".join(f', a."{d}"' for d in DOMAINS)
+        juncao = "JOIN avaliacoes a ON a.id = u.avaliacao_id"
+    else:
+        colunas = juncao = ""
+    return pd.read_sql_query(f"""
+        SELECT u.paciente, COALESCE(u.impressao, 0) AS impressao{colunas}, u.mpi, u.risco
+        FROM _consulta c JOIN ultimas u ON u.paciente = c.paciente {juncao}
+    """, con)
+
+
+def distribuicao_atual(con: sqlite3.Connection, instituicao: str | None = None) -> pd.DataFrame:
+    """Nº de pacientes por instituição e faixa de MPI, pela última avaliação de cada um."""
+    filtro, params = ("WHERE instituicao = ?", (instituicao,)) if instituicao else ("", ())
+    return pd.read_sql_query(f"""
+        SELECT instituicao, risco, COUNT(*) AS pacientes FROM ultimas {filtro}
+        GROUP BY instituicao, risco ORDER BY instituicao, risco
+    """, con, params=params)
+
+
+def listar_instituicoes(con: sqlite3.Connection) -> list:
+    """Instituições com alguma avaliação gravada."""
+    return [i for (i,) in con.execute(
+        "SELECT DISTINCT instituicao FROM avaliacoes WHERE instituicao IS NOT NULL ORDER BY 1")]
@@ -0,0 +1,315 @@
+"""Fila de tarefas em segundo plano: pontuação de planilhas grandes e lotes de relatórios.
+
+As tarefas rodam num pool de threads do próprio processo (os relatórios ainda
+abrem o seu pool de processos), fora da thread do script do Streamlit. Cada
+tarefa tem uma pasta em disco com a entrada e o artefato gerado. A situação e
+o progresso ficam numa tabela SQLite na mesma pasta, de modo que a interface
+só consulta o andamento, sem refazer o trabalho, e os resultados continuam
+disponíveis para download depois de prontos.
+"""
+import datetime
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+import pandas as pd
+
+from . import metricas
+
+DIRETORIO_PADRAO = os.environ.get("MPI_TAREFAS", os.path.join("dados", "tarefas"))
+# Tarefas executadas ao mesmo tempo
+WORKERS_PADRAO = 2
+# Intervalo mínimo (s) entre gravações do progresso de uma tarefa
+INTERVALO_PROGRESSO = 0.5
+# Tarefas terminadas há mais tempo que isso são apagadas ao abrir a fila
+RETENCAO_DIAS = 7
+# Cada fila renova o batimento das suas tarefas ativas a cada INTERVALO_BATIMENTO s;
+# uma tarefa ativa sem batimento há LIMITE_BATIMENTO s tem o dono dado como encerrado
+INTERVALO_BATIMENTO = 10
+LIMITE_BATIMENTO = 60
+
+SITUACOES_ATIVAS = ("pendente", "executando")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tarefas (
+    id TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    nome TEXT,
+    chave TEXT,
+    parametros TEXT NOT NULL,
+    situacao TEXT NOT NULL,
+    progresso REAL NOT NULL DEFAULT 0,
+    mensagem TEXT,
+    artefato TEXT,
+    criada TEXT NOT NULL,
+    iniciada TEXT,
+    terminada TEXT,
+    dono TEXT,
+    batimento REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tarefas_criada ON tarefas (criada);
+CREATE INDEX IF NOT EXISTS idx_tarefas_chave ON tarefas (chave);
+"""
+
+
+def _agora() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def _migrar(con: sqlite3.Connection):
+    """Acrescenta `dono` e `batimento` a bancos criados antes deles."""
+    colunas = {c for (_, c, *_) in con.execute("PRAGMA table_info(tarefas)")}
+    for coluna, tipo in (("dono", "TEXT"), ("batimento", "REAL")):
+        if coluna not in colunas:
+            con.execute(f"ALTER TABLE tarefas ADD COLUMN {coluna} {tipo}")
+
+
+def _processo_vivo(pid: int) -> bool:
+    """Se o processo `pid` (desta máquina) ainda existe."""
+    if os.name == "nt":  # no Windows o os.kill encerraria o processo: vale só o batimento
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # existe, de outro usuário
+        return True
+    return True
+
+
+def _bater(ref: weakref.ref, parar: threading.Event):
+    """Batimento da fila e recuperação das tarefas órfãs, enquanto a fila existir."""
+    while not parar.wait(INTERVALO_BATIMENTO):
+        fila = ref()
+        if fila is None:  # fila descartada e sem tarefas em andamento
+            return
+        try:
+            fila._renovar()
+            fila._recuperar()
+        except sqlite3.Error:  # banco ocupado: tenta de novo no próximo batimento
+            pass
+        del fila
+
+
+# ---------- Tipos de tarefa ----------
+# Cada tipo recebe (arquivo de entrada, pasta da tarefa, parâmetros, progresso)
+# e devolve o caminho do artefato; progresso(fração, mensagem) informa o andamento.
+def _tarefa_pontuar(entrada: str, pasta: str, parametros: dict, progresso) -> str:
+    from .export import FORMATOS, Exportador
+    from .ingest import pontuar_em_lotes
+    from .validacao import coluna_necessaria
+
+    formato = parametros.get("formato", "csv")
+    saida = os.path.join(pasta, "mpi_results" + FORMATOS[formato][1])
+    with open(entrada, "rb") as f, open(saida, "wb") as destino:
+        linhas = pontuar_em_lotes(
+            f, parametros["nome"].lower(), Exportador(formato, destino),
+            progresso=lambda n, fracao: progresso(fracao, f"{n:,} linhas processadas"),
+            aba=parametros.get("aba"),
+            colunas=None if parametros.get("todas_colunas") else coluna_necessaria)
+    progresso(1.0, f"{linhas:,} linhas processadas")
+    return saida
+
+
+def _tarefa_relatorios(entrada: str, pasta: str, parametros: dict, progresso) -> str:
+    from .reports import gerar_relatorios_zip
+
+    df = pd.read_parquet(entrada)
+    total = len(df)
+    colunas = list(df.columns)
+    registros = (dict(zip(colunas, valores)) for valores in df.itertuples(index=False, name=None))
+    saida = os.path.join(pasta, "mpi_relatorios.zip")
+    with open(saida, "wb") as destino:
+        stats = gerar_relatorios_zip(
+            registros, destino, workers=parametros.get("workers"),
+            progresso=lambda n: progresso(n / total if total else None,
+                                          f"{n:,} relatórios gerados"))
+    progresso(1.0, f"{stats['relatorios']:,} relatórios em {stats['segundos']} s")
+    return saida
+
+
+TIPOS = {
+    "pontuar": _tarefa_pontuar,
+    "relatorios": _tarefa_relatorios,
+}
+
+
+# ---------- Fila ----------
+class FilaTarefas:
+    """Executa tarefas em segundo plano e registra o andamento em disco.
+
+    Uma instância por processo (no app, via st.cache_resource), mas vários
+    processos (ou uma fila recriada com tarefas ainda rodando) podem usar a
+    mesma pasta. Cada tarefa guarda o dono (máquina, pid e a fila que a
+    executa) e um batimento renovado enquanto a fila existe. Só são marcadas
+    como "interrompida" as tarefas ativas cujo dono acabou: processo
+    inexistente nesta máquina ou batimento parado há LIMITE_BATIMENTO s. Isso é
+    conferido ao abrir a fila e a cada batimento.
+    """
+
+    def __init__(self, diretorio: str | None = None, workers: int = WORKERS_PADRAO):
+        self.diretorio = diretorio or DIRETORIO_PADRAO
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._banco = os.path.join(self.diretorio, "tarefas.sqlite3")
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mpi-tarefa")
+        self._trava = threading.Lock()
+        self.dono = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        with closing(self._conectar()) as con, con:
+            con.executescript(_ESQUEMA)
+            _migrar(con)
+        self._recuperar()
+        self.limpar()
+        # A thread só guarda uma referência fraca: termina quando a fila é descartada
+        self._parar = threading.Event()
+        threading.Thread(target=_bater, args=(weakref.ref(self), self._parar),
+                         name="mpi-tarefas-batimento", daemon=True).start()
+
+    def _conectar(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self._banco, timeout=30)
+        con.row_factory = sqlite3.Row
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    def _atualizar(self, id_tarefa: str, **campos):
+        atribuicoes = ", ".join(f"{c} = ?" for c in campos)
+        with closing(self._conectar()) as con, con:
+            con.execute(f"UPDATE tarefas SET {atribuicoes} WHERE id = ?",
+                        (*campos.values(), id_tarefa))
+
+    def _orfa(self, dono: str | None, batimento: float | None, agora: float) -> bool:
+        """Se uma tarefa ativa perdeu o dono (sem dono: criada antes desta coluna)."""
+        if dono == self.dono:
+            return False
+        if dono is None or batimento is None or agora - batimento > LIMITE_BATIMENTO:
+            return True
+        maquina, pid, _ = dono.rsplit(":", 2)
+        return maquina == socket.gethostname() and not _processo_vivo(int(pid))
+
+    def _recuperar(self):
+        """Marca como "interrompida" as tarefas ativas de donos encerrados."""
+        agora = time.time()
+        with closing(self._conectar()) as con, con:
+            orfas = [(_agora(), id_tarefa) for id_tarefa, dono, batimento in con.execute(
+                "SELECT id, dono, batimento FROM tarefas WHERE situacao IN (?, ?)",
+                SITUACOES_ATIVAS) if self._orfa(dono, batimento, agora)]
+            con.executemany("UPDATE tarefas SET situacao = 'interrompida', terminada = ? "
+                            "WHERE id = ? AND situacao IN ('pendente', 'executando')", orfas)
+
+    def _renovar(self):
+        """Renova o batimento das tarefas ativas desta fila."""
+        with closing(self._conectar()) as con, con:
+            con.execute("UPDATE tarefas SET batimento = ? WHERE dono = ? AND situacao IN (?, ?)",
+                        (time.time(), self.dono, *SITUACOES_ATIVAS))
+
+    def enviar(self, tipo: str, nome: str, dados, chave: str | None = None, **parametros) -> str:
+        """Registra e agenda uma tarefa; devolve o id na hora, sem esperar a execução.
+
+        `dados` é o conteúdo da entrada (bytes) ou o caminho de um arquivo. Com
+        `chave` (ex.: hash do arquivo), uma tarefa igual ainda ativa ou concluída
+        é reaproveitada em vez de executada de novo.
+        """
+        if tipo not in TIPOS:
+            raise ValueError(f"Tipo de tarefa desconhecido: {tipo}")
+        parametros = {"nome": nome, **parametros}
+        texto_parametros = json.dumps(parametros, sort_keys=True, ensure_ascii=False)
+        with self._trava:
+            if chave is not None:
+                with closing(self._conectar()) as con:
+                    existente = con.execute(
+                        "SELECT id FROM tarefas WHERE chave = ? AND tipo = ? AND parametros = ? "
+                        "AND situacao IN ('pendente', 'executando', 'concluida') "
+                        "ORDER BY criada DESC LIMIT 1", (chave, tipo, texto_parametros)).fetchone()
+                if existente:
+                    return existente["id"]
+
+            id_tarefa = uuid.uuid4().hex[:12]
+            pasta = os.path.join(self.diretorio, id_tarefa)
+            os.makedirs(pasta)
+            entrada = os.path.join(pasta, "entrada" + os.path.splitext(nome)[1].lower())
+            if isinstance(dados, (bytes, bytearray, memoryview)):
+                with open(entrada, "wb") as f:
+                    f.write(dados)
+            else:
+                shutil.copyfile(dados, entrada)
+
+            with closing(self._conectar()) as con, con:
+                con.execute("INSERT INTO tarefas (id, tipo, nome, chave, parametros, situacao, "
+                            "criada, dono, batimento) VALUES (?, ?, ?, ?, ?, 'pendente', ?, ?, ?)",
+                            (id_tarefa, tipo, nome, chave, texto_parametros, _agora(),
+                             self.dono, time.time()))
+        self._pool.submit(self._executar, id_tarefa, tipo, entrada, pasta, parametros)
+        return id_tarefa
+
+    def _executar(self, id_tarefa: str, tipo: str, entrada: str, pasta: str, parametros: dict):
+        self._atualizar(id_tarefa, situacao="executando", iniciada=_agora())
+        ultimo = 0.0
+
+        def progresso(fracao, mensagem):
+            nonlocal ultimo
+            agora = time.monotonic()
+            if agora - ultimo >= INTERVALO_PROGRESSO or fracao == 1.0:
+                ultimo = agora
+                self._atualizar(id_tarefa, progresso=min(fracao or 0.0, 1.0), mensagem=mensagem)
+
+        try:
+            with metricas.execucao(f"tarefa:{tipo}", tarefa=id_tarefa, arquivo=parametros["nome"]):
+                artefato = TIPOS[tipo](entrada, pasta, parametros, progresso)
+        except Exception as e:  # a falha fica registrada na tarefa
+            self._atualizar(id_tarefa, situacao="falhou", mensagem=f"{type(e).__name__}: {e}",
+                            terminada=_agora())
+        else:
+            self._atualizar(id_tarefa, situacao="concluida", progresso=1.0,
+                            artefato=artefato, terminada=_agora())
+        finally:
+            if os.path.exists(entrada):
+                os.remove(entrada)
+
+    # ---------- Consultas ----------
+    def consultar(self, id_tarefa: str) -> dict | None:
+        """Situação, progresso, mensagem e artefato de uma tarefa."""
+        with closing(self._conectar()) as con:
+            linha = con.execute("SELECT * FROM tarefas WHERE id = ?", (id_tarefa,)).fetchone()
+        return dict(linha) if linha else None
+
+    def listar(self, limite: int = 50) -> list:
+        """Tarefas mais recentes primeiro."""
+        with closing(self._conectar()) as con:
+            return [dict(linha) for linha in con.execute(
+                "SELECT * FROM tarefas ORDER BY criada DESC, rowid DESC LIMIT ?", (limite,))]
+
+    def ativas(self) -> int:
+        with closing(self._conectar()) as con:
+            (n,) = con.execute("SELECT COUNT(*) FROM tarefas WHERE situacao IN (?, ?)",
+                               SITUACOES_ATIVAS).fetchone()
+        return n
+
+    # ---------- Limpeza ----------
+    def remover(self, id_tarefa: str):
+        """Apaga uma tarefa terminada e os seus arquivos."""
+        tarefa = self.consultar(id_tarefa)
+        if tarefa is None or tarefa["situacao"] in SITUACOES_ATIVAS:
+            return
+        shutil.rmtree(os.path.join(self.diretorio, id_tarefa), ignore_errors=True)
+        with closing(self._conectar()) as con, con:
+            con.execute("DELETE FROM tarefas WHERE id = ?", (id_tarefa,))
+
+    def limpar(self, dias: int = RETENCAO_DIAS):
+        """Apaga as tarefas terminadas há mais de `dias` dias."""
+        limite = (datetime.datetime.now() - datetime.timedelta(days=dias)).isoformat()
+        with closing(self._conectar()) as con:
+            antigas = [i for (i,) in con.execute(
+                "SELECT id FROM tarefas WHERE terminada < ?", (limite,))]
+        for id_tarefa in antigas:
+            self.remover(id_tarefa)
+
+    def encerrar(self, esperar: bool = True):
+        self._pool.shutdown(wait=esperar)
+        self._parar.set()
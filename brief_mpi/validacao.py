@@ -0,0 +1,158 @@
+"""Validação e coerção das planilhas antes do cálculo.
+
+O esquema é conferido só pelo cabeçalho (ler_cabecalho), antes de ler o corpo
+do arquivo: uma planilha sem as colunas necessárias falha em milissegundos.
+Os nomes das colunas aceitam apelidos (ADL, dim1, AVD...). Os valores são
+convertidos de forma vetorizada ("0,5" -> 0.5), e os problemas de cada linha
+voltam como uma máscara booleana em vez de exceções.
+"""
+import unicodedata
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .colunas import COLUNA_DATA, COLUNA_INSTITUICAO, COLUNAS_IDENTIFICACAO
+from .encoding import COLUNA_COMORBIDADES, COLUNA_FARMACOS, COLUNAS_ITENS
+from .scoring import DOMAINS
+
+# Apelidos aceitos para cada dimensão (comparados sem acentos, maiúsculas ou espaços)
+APELIDOS = {
+    "ADL": ["dim1", "dimensao1", "avd", "abvd", "atividadesbasicasdevidadiaria"],
+    "IADL": ["dim2", "dimensao2", "aivd", "atividadesinstrumentaisdevidadiaria"],
+    "Mobility": ["dim3", "dimensao3", "mobilidade"],
+    "Cognitive": ["dim4", "dimensao4", "cognicao", "cognitivo", "estadocognitivo"],
+    "Nutritional": ["dim5", "dimensao5", "nutricao", "nutricional", "estadonutricional"],
+    "Comorbidity": ["dim6", "dimensao6", "comorbidade", "comorbidades"],
+    "Drugs": ["dim7", "dimensao7", "medicamentos", "farmacos", "polifarmacia"],
+    "Cohabitation": ["dim8", "dimensao8", "coabitacao", "cohabitacao"],
+}
+
+
+class ErroEsquema(ValueError):
+    """A planilha não tem as colunas necessárias para o cálculo."""
+
+
+def _chave(nome) -> str:
+    """Nome normalizado para comparação: sem acentos, minúsculo, só letras e dígitos."""
+    sem_acento = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode()
+    return "".join(c for c in sem_acento.lower() if c.isalnum())
+
+
+_APELIDO_PARA_DOMINIO = {_chave(a): d for d, apelidos in APELIDOS.items()
+                         for a in [d, *apelidos]}
+_CHAVES_ITENS = {_chave(c) for c in COLUNAS_ITENS}
+_COLUNAS_CONTEXTO = {*COLUNAS_IDENTIFICACAO, COLUNA_INSTITUICAO, COLUNA_DATA}
+
+
+# ---------- Cabeçalho ----------
+def ler_cabecalho(file, nome: str, aba=None) -> list:
+    """Nomes das colunas de um .csv ou .xlsx, sem ler o corpo do arquivo.
+
+    `file` pode ser um caminho, bytes ou um arquivo aberto (que volta ao início);
+    `aba` escolhe a aba do .xlsx (padrão: a primeira).
+    """
+    if isinstance(file, (bytes, bytearray)):
+        file = BytesIO(file)
+    if nome.lower().endswith(".csv"):
+        colunas = list(pd.read_csv(file, nrows=0).columns)
+    else:
+        from .xlsx import ler_cabecalho_xlsx
+
+        colunas = ler_cabecalho_xlsx(file, aba)
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return colunas
+
+
+def coluna_necessaria(coluna) -> bool:
+    """Se a coluna entra no cálculo ou identifica a avaliação (projeção na leitura).
+
+    Dimensões (com apelidos), itens do questionário, paciente, instituição e data;
+    as demais colunas da planilha podem ser puladas ao ler o arquivo.
+    """
+    chave = _chave(coluna)
+    return (chave in _APELIDO_PARA_DOMINIO or chave in _CHAVES_ITENS
+            or coluna in _COLUNAS_CONTEXTO)
+
+
+def mapear_colunas(colunas, destino: list = DOMAINS) -> dict:
+    """{coluna da planilha: nome padrão} para as dimensões (nomes em `destino`) e os itens."""
+    itens = {_chave(c): c for c in COLUNAS_ITENS}
+    mapa = {}
+    for coluna in colunas:
+        chave = _chave(coluna)
+        if chave in _APELIDO_PARA_DOMINIO:
+            novo = destino[DOMAINS.index(_APELIDO_PARA_DOMINIO[chave])]
+        elif chave in itens:
+            novo = itens[chave]
+        else:
+            continue
+        # A primeira coluna encontrada vale; as repetidas ficam como estão
+        if novo not in mapa.values() and (coluna == novo or novo not in colunas):
+            mapa[coluna] = novo
+    return mapa
+
+
+def validar_cabecalho(colunas, destino: list = DOMAINS, aceita_itens: bool = True) -> dict:
+    """Confere o esquema pelo cabeçalho e devolve o mapa de renomeação.
+
+    Vale a planilha com as 8 dimensões (com nomes ou apelidos) ou, se
+    `aceita_itens`, com as respostas item a item. Senão levanta ErroEsquema.
+    """
+    mapa = mapear_colunas(colunas, destino)
+    presentes = set(mapa.values())
+    faltando = [d for d in destino if d not in presentes]
+    if faltando and aceita_itens and all(c in presentes for c in COLUNAS_ITENS):
+        return mapa
+    if faltando:
+        raise ErroEsquema("Faltam as colunas das dimensões: " + ", ".join(faltando)
+                          + (" (ou as respostas item a item: " + ", ".join(COLUNAS_ITENS) + ")"
+                             if aceita_itens else ""))
+    return mapa
+
+
+# ---------- Valores ----------
+def _numerico(col: pd.Series) -> pd.Series:
+    """Converte para número aceitando vírgula decimal ("0,5"); o que não for número vira NaN."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col.astype(float)
+    texto = col.astype(str).str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto, errors="coerce")
+
+
+def validar(df: pd.DataFrame, destino: list = DOMAINS, aceita_itens: bool = True) -> tuple:
+    """Renomeia, converte e confere os valores de uma planilha.
+
+    Devolve (DataFrame convertido, máscara de erros). A máscara tem uma coluna
+    booleana por coluna conferida, alinhada às linhas: True onde o valor é
+    inválido (dimensão fora de 0/0.5/1 ou vazia, contagem não numérica ou
+    negativa, item sem resposta).
+    """
+    mapa = validar_cabecalho(df.columns, destino, aceita_itens)
+    df = df.rename(columns=mapa)
+    erros = {}
+    if all(d in df.columns for d in destino):
+        for d in destino:
+            df[d] = _numerico(df[d])
+            valores = df[d].to_numpy()
+            erros[d] = ~((valores == 0) | (valores == 0.5) | (valores == 1))
+    else:
+        for c in (COLUNA_COMORBIDADES, COLUNA_FARMACOS):
+            df[c] = _numerico(df[c])
+            erros[c] = ~(df[c] >= 0).to_numpy()
+        for c in COLUNAS_ITENS:
+            if c not in erros:
+                erros[c] = df[c].isna().to_numpy()
+    return df, pd.DataFrame(erros, index=df.index)
+
+
+def descrever_erros(erros: pd.DataFrame) -> pd.Series:
+    """Texto por linha com as colunas inválidas ("" nas linhas sem erro)."""
+    descricao = pd.Series("", index=erros.index, dtype=object)
+    com_erro = erros.to_numpy().any(axis=1)
+    if com_erro.any():
+        nomes = np.asarray(erros.columns, dtype=object)
+        descricao[com_erro] = ["Valor inválido em: " + ", ".join(nomes[linha])
+                               for linha in erros.to_numpy()[com_erro]]
+    return descricao
@@ -0,0 +1,371 @@
+"""Leitura rápida de .xlsx: XML da aba em fluxo, só com as colunas necessárias.
+
+O pd.read_excel (openpyxl) monta um objeto por célula de todas as colunas
+antes de entregar os dados. Aqui o XML da aba é descomprimido em blocos e as
+células são localizadas por expressão regular. Só as colunas pedidas
+(projeção) são capturadas, e a conversão é feita coluna a coluna com numpy.
+Os valores seguem o pd.read_excel: inteiros viram int64, datas viram datetime
+e células vazias viram NaN. Linhas sem nenhum valor nas colunas lidas e
+colunas sem nome no cabeçalho são descartadas.
+
+Planilhas fora do formato esperado (células sem a referência "A1", por
+exemplo) caem no openpyxl em modo somente leitura, com a mesma projeção.
+"""
+import html
+import posixpath
+import re
+import zipfile
+from itertools import islice
+from xml.etree.ElementTree import parse
+
+import numpy as np
+import pandas as pd
+
+# Bytes (descomprimidos) do XML da aba lidos por vez
+TAMANHO_BLOCO = 8 * 2**20
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PACOTE = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Formatos numéricos nativos do Excel que são datas/horas
+_FORMATOS_DATA = set(range(14, 23)) | {45, 46, 47}
+_PADRAO_DATA = re.compile(r"[dmyhs]", re.IGNORECASE)
+_EPOCA = pd.Timestamp("1899-12-30")
+
+_SI = re.compile(rb"<(?:\w+:)?si>(.*?)</(?:\w+:)?si>|<(?:\w+:)?si\s*/>", re.S)
+_FONETICA = re.compile(rb"<(?:\w+:)?rPh\b.*?</(?:\w+:)?rPh>", re.S)
+_TEXTO = re.compile(rb"<(?:\w+:)?t(?:\s[^>]*)?>([^<]*)</(?:\w+:)?t>")
+_RAIZ = re.compile(rb"<(\w+:)?worksheet\b")
+_ATRIBUTO_T = re.compile(rb'\bt="(\w+)"')
+_ATRIBUTO_S = re.compile(rb'\bs="(\d+)"')
+_CELULA = (rb'<{p}c r="({l})(\d+)"([^>]*?)(?:/>|>(?:<{p}f\b[^>]*/>|<{p}f\b.*?</{p}f>)?'
+           rb'(?:<{p}v>([^<]*)</{p}v>)?(?:<{p}is>(.*?)</{p}is>)?.*?</{p}c>)')
+
+
+class _FormatoNaoSuportado(Exception):
+    """O XML da aba não segue o padrão esperado pelo leitor rápido."""
+
+
+# ---------- Estrutura da pasta de trabalho ----------
+def _caminho_abas(zf: zipfile.ZipFile) -> dict:
+    """{nome da aba: caminho do XML dentro do zip}, na ordem da pasta de trabalho."""
+    rels = {r.get("Id"): r.get("Target")
+            for r in parse(zf.open("xl/_rels/workbook.xml.rels")).getroot()
+            if r.tag == _NS_PACOTE + "Relationship"}
+    abas = {}
+    for aba in parse(zf.open("xl/workbook.xml")).getroot().iter(_NS + "sheet"):
+        alvo = rels[aba.get(_NS_REL + "id")]
+        abas[aba.get("name")] = (alvo.lstrip("/") if alvo.startswith("/")
+                                 else posixpath.normpath(posixpath.join("xl", alvo)))
+    return abas
+
+
+def _escolher_aba(caminhos: dict, aba) -> str:
+    if aba is None:
+        return next(iter(caminhos.values()))
+    if isinstance(aba, int):
+        return list(caminhos.values())[aba]
+    if aba not in caminhos:
+        raise ValueError(f"Aba não encontrada: {aba} (abas: {', '.join(caminhos)})")
+    return caminhos[aba]
+
+
+def _texto(xml: bytes) -> str:
+    """Texto de um <si> ou <is>: junta os <t> (inclusive de texto formatado), sem a fonética."""
+    if b"rPh" in xml:
+        xml = _FONETICA.sub(b"", xml)
+    texto = b"".join(_TEXTO.findall(xml)).decode("utf-8")
+    return html.unescape(texto) if "&" in texto else texto
+
+
+def _textos_compartilhados(zf: zipfile.ZipFile) -> np.ndarray:
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return np.array([], dtype=object)
+    textos = [_texto(si) for si in _SI.findall(zf.read("xl/sharedStrings.xml"))]
+    return np.array(textos, dtype=object)
+
+
+def _estilos_data(zf: zipfile.ZipFile) -> set:
+    """Índices de estilo (atributo s das células) cujo formato é de data."""
+    if "xl/styles.xml" not in zf.namelist():
+        return set()
+    raiz = parse(zf.open("xl/styles.xml")).getroot()
+    datas = set(_FORMATOS_DATA)
+    for fmt in raiz.iter(_NS + "numFmt"):
+        codigo = re.sub(r'"[^"]*"|\[[^\]]*\]', "", fmt.get("formatCode", ""))
+        if _PADRAO_DATA.search(codigo):
+            datas.add(int(fmt.get("numFmtId")))
+    xfs = raiz.find(_NS + "cellXfs")
+    if xfs is None:
+        return set()
+    return {i for i, xf in enumerate(xfs) if int(xf.get("numFmtId", 0)) in datas}
+
+
+def abas(file) -> list:
+    """Nomes das abas de um .xlsx (caminho ou arquivo aberto), na ordem da pasta de trabalho."""
+    with zipfile.ZipFile(file) as zf:
+        return list(_caminho_abas(zf))
+
+
+# ---------- Conversão das células ----------
+def _tipo(atributos: bytes, estilos_data: set) -> bytes:
+    """Tipo efetivo da célula: o atributo t, com "data" para números em formato de data."""
+    t = _ATRIBUTO_T.search(atributos)
+    tipo = t.group(1) if t else b"n"
+    if tipo == b"n" and estilos_data:
+        s = _ATRIBUTO_S.search(atributos)
+        if s and int(s.group(1)) in estilos_data:
+            return b"data"
+    return tipo
+
+
+def _valor(tipo: bytes, v: bytes, inline: bytes, textos: np.ndarray):
+    if tipo == b"n":
+        numero = float(v)
+        return int(numero) if numero.is_integer() else numero
+    if tipo == b"s":
+        return textos[int(v)]
+    if tipo == b"inlineStr":
+        return _texto(inline)
+    if tipo == b"str":
+        texto = v.decode("utf-8")
+        return html.unescape(texto) if "&" in texto else texto
+    if tipo == b"b":
+        return v == b"1"
+    if tipo == b"data":
+        return _EPOCA + pd.to_timedelta(float(v), unit="D")
+    if tipo == b"d":
+        return pd.Timestamp(v.decode())
+    return np.nan  # "e": erro de fórmula
+
+
+def _coluna(n: int, posicoes, tipos, vs, inlines, textos: np.ndarray) -> pd.Series:
+    """Monta uma coluna de `n` linhas com os valores nas `posicoes` (NaN nas demais)."""
+    unicos = set(tipos.tolist())
+    if unicos == {b"n"}:
+        valores = np.full(n, np.nan)
+        valores[posicoes] = vs.astype(np.float64)
+        if len(posicoes) == n and (valores == np.floor(valores)).all():
+            return pd.Series(valores.astype(np.int64))
+        return pd.Series(valores)
+    if unicos == {b"data"}:
+        valores = np.full(n, np.datetime64("NaT"), dtype="datetime64[us]")
+        valores[posicoes] = (_EPOCA + pd.to_timedelta(vs.astype(np.float64), unit="D")).to_numpy()
+        return pd.Series(valores)
+    valores = np.full(n, np.nan, dtype=object)
+    if unicos == {b"s"}:
+        # Textos compartilhados ("Sim"/"Não" das respostas): indexação direta na tabela
+        valores[posicoes] = textos[vs.astype(np.int64)]
+        return pd.Series(valores).infer_objects()
+    if unicos == {b"inlineStr"}:
+        # Texto na própria célula: cada valor distinto é decodificado uma vez só
+        codigos, distintos = pd.factorize(inlines)
+        valores[posicoes] = np.array([_texto(x) for x in distintos], dtype=object)[codigos]
+        return pd.Series(valores).infer_objects()
+    valores[posicoes] = [_valor(t, v, i, textos) for t, v, i in zip(tipos, vs, inlines)]
+    if unicos == {b"b"} and len(posicoes) == n:
+        return pd.Series(valores.astype(bool))
+    return pd.Series(valores).infer_objects()
+
+
+def _quadro(celulas: list, letras: list, nomes: list, textos: np.ndarray, estilos_data: set,
+            tipos_atributos: dict) -> pd.DataFrame:
+    """DataFrame de um bloco de linhas a partir das células capturadas pela expressão regular."""
+    if not celulas:
+        return pd.DataFrame()
+    # Uma lista por grupo da expressão (zip(*celulas) é bem mais lento com milhões de células)
+    col, lin, atributos, vs, inlines = ([c[i] for c in celulas] for i in range(5))
+    # Agrupa as células por coluna uma vez (ordenação estável: as linhas seguem em ordem)
+    indice = {letra: i for i, letra in enumerate(letras)}
+    grupo = np.fromiter(map(indice.__getitem__, col), np.intp, len(col))
+    ordem = np.argsort(grupo, kind="stable")
+    limites = np.searchsorted(grupo[ordem], np.arange(len(letras) + 1))
+    linhas = np.array(lin).astype(np.int64)[ordem]
+    atributos, vs = np.array(atributos)[ordem], np.array(vs)[ordem]
+    inlines = np.array(inlines, dtype=object)[ordem]
+    com_valor = (vs != b"") | (inlines != b"")
+    rotulos = np.unique(linhas[com_valor])
+
+    colunas = {}
+    for nome, inicio, fim in zip(nomes, limites[:-1], limites[1:]):
+        trecho = slice(inicio, fim)
+        mascara = com_valor[trecho]
+        # Poucas combinações de atributos (t="s", s="3"...): o tipo é decidido uma vez por combinação
+        codigos, unicos = pd.factorize(atributos[trecho][mascara])
+        for a in unicos:
+            if a not in tipos_atributos:
+                tipos_atributos[a] = _tipo(a, estilos_data)
+        tipos = np.array([tipos_atributos[a] for a in unicos], dtype=object)[codigos]
+        colunas[nome] = _coluna(len(rotulos),
+                                np.searchsorted(rotulos, linhas[trecho][mascara]), tipos,
+                                vs[trecho][mascara], inlines[trecho][mascara], textos)
+    return pd.DataFrame(colunas, columns=nomes)
+
+
+def _nomes_unicos(nomes: list) -> list:
+    """Repete o pd.read_excel nos nomes duplicados: "x", "x.1", "x.2"..."""
+    vistos, unicos = {}, []
+    for nome in nomes:
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        vistos.setdefault(nome, 0)
+        unicos.append(nome)
+    return unicos
+
+
+def _nome_coluna(valor) -> str:
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+# ---------- Leitura ----------
+def _projetar(nomes: list, colunas) -> list:
+    """Posições, em `nomes`, das colunas pedidas (lista de nomes ou função nome -> bool)."""
+    if colunas is None:
+        return list(range(len(nomes)))
+    quer = colunas if callable(colunas) else set(colunas).__contains__
+    return [i for i, nome in enumerate(nomes) if quer(nome)]
+
+
+def _blocos_rapidos(file, colunas, aba):
+    """Gera o cabeçalho completo da aba e depois (DataFrame, fração lida) por bloco do XML."""
+    with zipfile.ZipFile(file) as zf:
+        caminho = _escolher_aba(_caminho_abas(zf), aba)
+        textos = _textos_compartilhados(zf)
+        estilos_data = _estilos_data(zf)
+        total = zf.getinfo(caminho).file_size
+        with zf.open(caminho) as xml:
+            bloco = xml.read(TAMANHO_BLOCO)
+            raiz = _RAIZ.search(bloco)
+            if raiz is None:
+                raise _FormatoNaoSuportado("sem o elemento worksheet")
+            prefixo = raiz.group(1) or b""
+            p = re.escape(prefixo)
+            fim_linha = b"</" + prefixo + b"row>"
+
+            # Cabeçalho: a primeira linha da aba
+            while fim_linha not in bloco:
+                mais = xml.read(TAMANHO_BLOCO)
+                if not mais:
+                    yield []
+                    return
+                bloco += mais
+            corte = bloco.index(fim_linha) + len(fim_linha)
+            todas = re.compile(_CELULA.replace(b"{p}", p).replace(b"{l}", rb"[A-Z]+"), re.S)
+            cabecalho = [(c[0], _valor(_tipo(c[2], estilos_data), c[3], c[4], textos))
+                         for c in todas.findall(bloco, 0, corte) if c[3] or c[4]]
+            if not cabecalho and re.search(rb"<" + p + rb"c[\s>/]", bloco[:corte]):
+                raise _FormatoNaoSuportado("células sem a referência A1")
+            nomes = _nomes_unicos([_nome_coluna(v) for _, v in cabecalho])
+            yield nomes
+
+            posicoes = _projetar(nomes, colunas)
+            if not posicoes:
+                return
+            letras = [cabecalho[i][0] for i in posicoes]
+            nomes = [nomes[i] for i in posicoes]
+            padrao = re.compile(_CELULA.replace(b"{p}", p).replace(b"{l}", b"|".join(letras)),
+                                re.S)
+            tipos_atributos = {}
+            lidos = corte
+            bloco = bloco[corte:]
+            while True:
+                mais = xml.read(TAMANHO_BLOCO)
+                bloco += mais
+                # Só linhas completas; o resto do bloco segue para a próxima leitura
+                corte = bloco.rfind(fim_linha) + len(fim_linha) if mais else len(bloco)
+                if corte >= len(fim_linha):
+                    lidos += corte
+                    quadro = _quadro(padrao.findall(bloco, 0, corte), letras, nomes, textos,
+                                     estilos_data, tipos_atributos)
+                    if len(quadro):
+                        yield quadro, min(lidos / total, 1.0) if total else None
+                    bloco = bloco[corte:]
+                if not mais:
+                    break
+
+
+def _blocos_openpyxl(file, colunas, aba, tamanho: int = 50_000):
+    """Mesma interface de _blocos_rapidos, com o openpyxl em modo somente leitura."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb[aba] if isinstance(aba, str) else wb.worksheets[aba or 0]
+        linhas = ws.iter_rows(values_only=True)
+        cabecalho = next(linhas, ())
+        indices = [i for i, c in enumerate(cabecalho) if c is not None]
+        nomes = _nomes_unicos([_nome_coluna(cabecalho[i]) for i in indices])
+        yield nomes
+
+        posicoes = _projetar(nomes, colunas)
+        indices = [indices[i] for i in posicoes]
+        nomes = [nomes[i] for i in posicoes]
+        total = (ws.max_row or 0) - 1
+        lidas = 0
+        while indices:
+            bloco = [[linha[i] if i < len(linha) else None for i in indices]
+                     for linha in islice(linhas, tamanho)]
+            if not bloco:
+                break
+            lidas += len(bloco)
+            bloco = [linha for linha in bloco if any(v is not None for v in linha)]
+            yield (pd.DataFrame.from_records(bloco, columns=nomes),
+                   min(lidas / total, 1.0) if total > 0 else None)
+    finally:
+        wb.close()
+
+
+def _blocos(file, colunas, aba):
+    """Leitor rápido ou, se o XML da aba não seguir o padrão esperado, o openpyxl."""
+    blocos = _blocos_rapidos(file, colunas, aba)
+    try:
+        nomes = next(blocos)
+    except _FormatoNaoSuportado:
+        if hasattr(file, "seek"):
+            file.seek(0)
+        blocos = _blocos_openpyxl(file, colunas, aba)
+        nomes = next(blocos)
+    return nomes, blocos
+
+
+def ler_xlsx_em_lotes(file, tamanho: int = 50_000, colunas=None, aba=None):
+    """Lê uma aba em lotes de até `tamanho` linhas, só com as `colunas` pedidas.
+
+    `colunas` é uma lista de nomes ou uma função nome -> bool (None = todas),
+    conferidos na primeira linha da aba, que é o cabeçalho. `aba` é o nome ou
+    a posição (padrão: a primeira). Gera pares (lote, fração lida), como
+    ingest.ler_em_lotes.
+    """
+    _, blocos = _blocos(file, colunas, aba)
+    pendente = None
+    for quadro, fracao in blocos:
+        pendente = quadro if pendente is None else pd.concat([pendente, quadro],
+                                                             ignore_index=True)
+        while len(pendente) >= tamanho:
+            yield pendente.iloc[:tamanho].reset_index(drop=True), fracao
+            pendente = pendente.iloc[tamanho:].reset_index(drop=True)
+    if pendente is not None and len(pendente):
+        yield pendente, fracao
+
+
+def ler_xlsx(file, colunas=None, aba=None) -> pd.DataFrame:
+    """Lê uma aba inteira (ver ler_xlsx_em_lotes); substitui o pd.read_excel no upload."""
+    nomes, blocos = _blocos(file, colunas, aba)
+    quadros = [quadro for quadro, _ in blocos]
+    if not quadros:
+        return pd.DataFrame(columns=[nomes[i] for i in _projetar(nomes, colunas)])
+    if len(quadros) == 1:
+        return quadros[0]
+    # Um bloco só com números numa coluna de texto deixaria a coluna concatenada como object
+    return pd.concat(quadros, ignore_index=True).infer_objects()
+
+
+def ler_cabecalho_xlsx(file, aba=None) -> list:
+    """Nomes das colunas (primeira linha da aba), sem ler o resto do XML."""
+    nomes, blocos = _blocos(file, None, aba)
+    blocos.close()
+    return nomes
@@ -1,210 +1,645 @@
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import A4
-
-# ---------- Funções auxiliares ----------
-def export_pdf(data: dict) -> BytesIO:
-    """Gera PDF simples com resumo"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    story = []
-    story.append(Paragraph("Relatório Brief-MPI", styles["Title"]))
-    story.append(Spacer(1, 12))
-    for k,v in data.items():
-        story.append(Paragraph(f"<b>{k}:</b> {v}", styles["Normal"]))
-        story.append(Spacer(1, 6))
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-def compute_brief_mpi_from_domains(domains: dict) -> dict:
-    """Recebe um dict com os 8 valores (0,0.5,1) e devolve escore + risco"""
-    vals = list(domains.values())
-    mpi_raw = sum(vals) / 8
-    if mpi_raw <= 0.33:
-        risk = 'Mild (MPI 1)'
-    elif mpi_raw <= 0.66:
-        risk = 'Moderate (MPI 2)'
-    else:
-        risk = 'High (MPI 3)'
-    return {"MPI": round(mpi_raw, 2), "risk": risk}
+import hashlib
+import io
+import os
+import tempfile
+from contextlib import closing
+
+from brief_mpi import metricas
+from brief_mpi.analise import TAMANHO_PAGINA, amostra, contar, pagina, resumo_coorte
+from brief_mpi.cache_coorte import CacheCoortes, chave_coorte
+from brief_mpi.colunas import COLUNA_ERROS, coluna_paciente
+from brief_mpi.encoding import (COLUNA_COHABITACAO, COLUNA_COMORBIDADES, COLUNA_FARMACOS,
+                                CORTES_COMORBIDADES, CORTES_FARMACOS, ITENS_SIM_NAO,
+                                VALOR_COHABITACAO, VALOR_POR_CONTAGEM, valor_por_cortes)
+from brief_mpi.export import FORMATOS, Exportador, exportar
+from brief_mpi.incremental import COLUNA_SITUACAO, mudaram_de_faixa, pontuar_incremental
+from brief_mpi.ingest import pontuar_em_lotes, pontuar_lote
+from brief_mpi.scoring import DOMAINS, RISCOS, VERSAO_REGRAS, compute_brief_mpi_lookup
+from brief_mpi.validacao import ErroEsquema, coluna_necessaria, ler_cabecalho, validar_cabecalho
+from brief_mpi.store import (conectar, distribuicao_atual, historico_paciente,
+                             listar_instituicoes, salvar_avaliacoes, ultimas_avaliacoes,
+                             versao_banco)
 
 # ---------- Avaliação individual ----------
-def avaliacao_individual():
-    with st.expander("Responder às dimensões do Brief-MPI"):
-    #st.subheader("Responder às dimensões do Brief-MPI")
-
-        # ADL
-        container = st.container(border=True)
-        #with st.expander("Atividades básicas de vida diária (ADL)"):
-        container.markdown("### Atividades básicas de vida diária (ADL)")
-        cols = container.columns(3, border=True)
-        adl_items = [
-            cols[0].radio("Comer sozinho?", ["Sim", "Não"], key="adl1"),
-            cols[1].radio("Vestir-se sozinho?", ["Sim", "Não"], key="adl2"),
-            cols[2].radio("Controle de urina/fezes?", ["Sim", "Não"], key="adl3"),
-        ]
-        adl_score = sum([1 if x=="Sim" else 0 for x in adl_items])
-        adl_value = 0 if adl_score == 3 else 0.5 if adl_score in [1,2] else 1
-
-        st.divider()
-
-        # IADL
-        container =st.container(border=True)
-        container.markdown("### Atividades instrumentais (IADL)")
-        cols = container.columns(3, border=True)
-        iadl_items = [
-            cols[0].radio("Usa telefone sozinho?", ["Sim", "Não"], key="iadl1"),
-            cols[1].radio("Responsável pela medicação?", ["Sim", "Não"], key="iadl2"),
-            cols[2].radio("Faz compras sozinho?", ["Sim", "Não"], key="iadl3"),
-        ]
-        iadl_score = sum([1 if x=="Sim" else 0 for x in iadl_items])
-        iadl_value = 0 if iadl_score == 3 else 0.5 if iadl_score in [1,2] else 1
-
-        st.divider()
-
-        # Mobilidade
-        container = st.container(border=True)
-        container.markdown("### Mobilidade")
-        cols = container.columns(3, border=True)
-        mobility_items = [
-            cols[0].radio("Levantar-se sozinho?", ["Sim", "Não"], key="mob1"),
-            cols[1].radio("Andar 3 metros?", ["Sim", "Não"], key="mob2"),
-            cols[2].radio("Subir/descer escadas?", ["Sim", "Não"], key="mob3"),
-        ]
-        mobility_score = sum([1 if x=="Sim" else 0 for x in mobility_items])
-        mobility_value = 0 if mobility_score >= 2 else 0.5 if mobility_score == 1 else 1
-
-        st.divider()
-
-        # Cognição
-        container = st.container(border=True)
-        container.markdown("### Cognição")
-        cols = container.columns(3, border=True)
-        cognitive_items = [
-            cols[0].radio("Sabe a data?", ["Sim", "Não"], key="cog1"),
-            cols[1].radio("Sabe a idade correta?", ["Sim", "Não"], key="cog2"),
-            cols[2].radio("Conta de 20 para trás de 3 em 3?", ["Sim", "Não"], key="cog3"),
-        ]
-        cognitive_score = sum([0 if x=="Sim" else 1 for x in cognitive_items])
-        cognitive_value = 0 if cognitive_score == 0 else 0.5 if cognitive_score == 1 else 1
-
-        st.divider()
+# Cada seção é um st.fragment: responder a uma pergunta reexecuta só a seção
+# dela (e não o cabeçalho, o logo e as demais seções). O valor de cada domínio
+# fica em st.session_state, lido pelo cálculo do MPI.
+SECOES_SIM_NAO = {
+    "ADL": ("Atividades básicas de vida diária (ADL)", ["Sim", "Não"],
+            ["Comer sozinho?", "Vestir-se sozinho?", "Controle de urina/fezes?"]),
+    "IADL": ("Atividades instrumentais (IADL)", ["Sim", "Não"],
+             ["Usa telefone sozinho?", "Responsável pela medicação?", "Faz compras sozinho?"]),
+    "Mobility": ("Mobilidade", ["Sim", "Não"],
+                 ["Levantar-se sozinho?", "Andar 3 metros?", "Subir/descer escadas?"]),
+    "Cognitive": ("Cognição", ["Sim", "Não"],
+                  ["Sabe a data?", "Sabe a idade correta?", "Conta de 20 para trás de 3 em 3?"]),
+    "Nutritional": ("Estado nutricional", ["Não", "Sim"],
+                    ["Perda de peso 3 meses?", "IMC < 21?", "Ingestão alimentar diminuída?"]),
+}
+
+
+def guardar_dominio(container, dominio: str, valor: float):
+    """Guarda o valor do domínio para o cálculo e mostra-o na própria seção."""
+    valor = int(valor) if float(valor).is_integer() else float(valor)
+    st.session_state[f"dominio_{dominio}"] = valor
+    container.caption(f"Valor do domínio: **{valor}**")
+
+
+@st.fragment
+def secao_sim_nao(dominio: str):
+    titulo, opcoes, perguntas = SECOES_SIM_NAO[dominio]
+    container = st.container(border=True)
+    container.markdown(f"### {titulo}")
+    cols = container.columns(3, border=True)
+    respostas = [col.radio(pergunta, opcoes, key=item)
+                 for col, pergunta, item in zip(cols, perguntas, ITENS_SIM_NAO[dominio])]
+    sim = respostas.count("Sim")
+    # Na cognição conta-se os erros (respostas diferentes de "Sim")
+    contagem = len(respostas) - sim if dominio == "Cognitive" else sim
+    guardar_dominio(container, dominio, VALOR_POR_CONTAGEM[dominio][contagem])
+
+
+@st.fragment
+def secao_comorbidades():
+    tile = st.container(height=180, border=True)
+    tile.markdown("### Comorbidades")
+    n = tile.number_input("Nº de doenças crônicas:", min_value=0, step=1, key=COLUNA_COMORBIDADES)
+    guardar_dominio(tile, "Comorbidity", valor_por_cortes(CORTES_COMORBIDADES, n))
+
+
+@st.fragment
+def secao_farmacos():
+    tile = st.container(height=180, border=True)
+    tile.markdown("### Medicamentos")
+    n = tile.number_input("Nº de fármacos (princípios ativos):", min_value=0, step=2,
+                          key=COLUNA_FARMACOS)
+    guardar_dominio(tile, "Drugs", valor_por_cortes(CORTES_FARMACOS, n))
+
+
+@st.fragment
+def secao_cohabitacao():
+    tile = st.container(height=180, border=True)
+    tile.markdown("### Co-habitação")
+    cohab = tile.radio("Vive com:", ["Com família", "Instituição", "Sozinho"],
+                       key=COLUNA_COHABITACAO)
+    guardar_dominio(tile, "Cohabitation", VALOR_COHABITACAO.get(cohab, 1))
+
+
+@st.fragment
+def resultado_avaliacao():
+    """Identificação, cálculo e downloads (também reexecutados sozinhos)"""
+    col1, col2, col3 = st.columns(3)
+    paciente = col1.text_input("Identificação do paciente")
+    instituicao = col2.text_input("Instituição")
+    salvar = col3.checkbox("Salvar no histórico", value=True,
+                           help="Requer a identificação do paciente.")
+
+    if st.button("Calcular MPI"):
+        domains = {d: st.session_state[f"dominio_{d}"] for d in DOMAINS}
+        res = compute_brief_mpi_lookup(domains)
+        st.success(f"MPI = {res['MPI']} → {res['risk']}")
+
+        if salvar and paciente:
+            avaliacao = pd.DataFrame([{"Paciente": paciente, "Instituição": instituicao or None,
+                                       **domains, **res}])
+            with closing(conectar()) as con:
+                salvar_avaliacoes(con, avaliacao, fonte="avaliação individual")
+            st.caption(f"Avaliação de {paciente} salva no histórico.")
+
+        # PDF: gerado (e o ReportLab carregado) só quando o botão é clicado
+        st.download_button("⬇️ Baixar relatório em PDF",
+                           data=lambda: relatorio_pdf({**domains, **res}),
+                           file_name="mpi_report.pdf", mime="application/pdf",
+                           on_click="ignore")
+
+        # CSV
+        csv = pd.DataFrame([{**domains, **res}]).to_csv(index=False).encode("utf-8")
+        st.download_button("⬇️ Baixar relatório em CSV", data=csv,
+                           file_name="mpi_report.csv", mime="text/csv", on_click="ignore")
+
+
+def relatorio_pdf(dados: dict) -> bytes:
+    from brief_mpi.reports import export_pdf
+
+    return export_pdf(dados).getvalue()
 
-        # Nutrição
-        container = st.container(border=True)
-        container.markdown("### Estado nutricional")
-        cols = container.columns(3, border=True)
-        nutritional_items = [
-            cols[0].radio("Perda de peso 3 meses?", ["Não", "Sim"], key="nut1"),
-            cols[1].radio("IMC < 21?", ["Não", "Sim"], key="nut2"),
-            cols[2].radio("Ingestão alimentar diminuída?", ["Não", "Sim"], key="nut3"),
-        ]
-        nutritional_score = sum([1 if x=="Sim" else 0 for x in nutritional_items])
-        nutritional_value = 0 if nutritional_score == 0 else 0.5 if nutritional_score == 1 else 1
-
-        st.divider()
 
+def avaliacao_individual():
+    with st.expander("Responder às dimensões do Brief-MPI"):
+        for dominio in SECOES_SIM_NAO:
+            secao_sim_nao(dominio)
+            st.divider()
 
-        # Comorbidades
         col1, col2, col3 = st.columns(3)
-        
         with col1:
-            tile = col1.container(height=180, border=True)
-            tile.markdown("### Comorbidades")
-            comorbidities_count = tile.number_input("Nº de doenças crônicas:", min_value=0, step=1)
-            comorb_value = 0 if comorbidities_count == 0 else 0.5 if comorbidities_count in [1,2] else 1
-
-        # Fármacos 
+            secao_comorbidades()
         with col2:
-            tile = col2.container(height=180, border=True)
-            tile.markdown("### Medicamentos")
-            drugs_count = tile.number_input("Nº de fármacos (princípios ativos):", min_value=0, step=2)
-            drugs_value = 0 if drugs_count <= 3 else 0.5 if drugs_count <= 6 else 1
-        
-        # Co-habitação
-        with col3:     
-            tile = col3.container(height=180, border=True)
-            tile.markdown("### Co-habitação")
-            cohab = tile.radio("Vive com:", ["Com família", "Instituição", "Sozinho"])
-            cohab_value = 0 if cohab=="Com família" else 0.5 if cohab=="Instituição" else 1
-            
- 
+            secao_farmacos()
+        with col3:
+            secao_cohabitacao()
         st.divider()
 
-        if st.button("Calcular MPI"):
-            domains = {
-                "ADL": adl_value,
-                "IADL": iadl_value,
-                "Mobility": mobility_value,
-                "Cognitive": cognitive_value,
-                "Nutritional": nutritional_value,
-                "Comorbidity": comorb_value,
-                "Drugs": drugs_value,
-                "Cohabitation": cohab_value,
-            }
-            res = compute_brief_mpi_from_domains(domains)
-            st.success(f"MPI = {res['MPI']} → {res['risk']}")
-
-            # PDF
-            pdf_buffer = export_pdf({**domains, **res})
-            st.download_button("⬇️ Baixar relatório em PDF", data=pdf_buffer,
-                               file_name="mpi_report.pdf", mime="application/pdf")
-
-            # CSV
-            csv = pd.DataFrame([{**domains, **res}]).to_csv(index=False).encode("utf-8")
-            st.download_button("⬇️ Baixar relatório em CSV", data=csv,
-                               file_name="mpi_report.csv", mime="text/csv")
+        resultado_avaliacao()
 
 # ---------- Carregar planilha ----------
 def carregar_planilha():
     st.subheader("Carregar planilha com 8 dimensões já calculadas")
+    st.caption("Também são aceitas as respostas item a item do questionário "
+               "(colunas adl1…nut3, comorbidities_count, drugs_count e cohab).")
+
+    files = st.file_uploader("Selecione um ou mais arquivos .csv ou .xlsx (um por instituição)",
+                             type=["csv","xlsx"], accept_multiple_files=True)
+    streaming = st.checkbox("Modo streaming (arquivos grandes)",
+                            help="Lê e calcula em lotes, gravando os resultados em disco. "
+                                 "Vale para um arquivo por vez.")
+    segundo_plano = st.checkbox("Processar em segundo plano",
+                                help="Envia o arquivo para a fila de tarefas: a página continua "
+                                     "livre e o resultado fica em ⏳ Tarefas para download.")
+    incremental = st.checkbox("Recalcular só o que mudou desde o último envio",
+                              help="Compara cada paciente com a última avaliação salva no "
+                                   "histórico e calcula apenas as linhas novas ou alteradas.")
+    formato = st.selectbox("Formato de saída", list(FORMATOS),
+                           format_func=lambda f: FORMATOS[f][0])
+    todas_colunas = st.checkbox("Manter todas as colunas da planilha",
+                                help="Por padrão só são lidas as colunas usadas no cálculo e na "
+                                     "identificação (paciente, instituição e data), o que deixa "
+                                     "a leitura de planilhas grandes bem mais rápida.")
+    file = files[0] if len(files) == 1 else None
+    aba = escolher_aba(file) if file else None
+    if file and not esquema_valido(file, aba):
+        return
+    if len(files) > 1:
+        carregar_varias_planilhas(files, formato)
+    elif file and segundo_plano:
+        enviar_para_fila(file, formato, aba, todas_colunas)
+    elif file and streaming:
+        carregar_planilha_streaming(file, formato, aba, todas_colunas)
+    elif file and incremental:
+        carregar_planilha_incremental(file, formato, aba, todas_colunas)
+    elif file:
+        chave = hash_upload(file)
+        res_df = processar_upload(chave, file.name, aba, todas_colunas, file)
+        # O resultado muda com a aba e as colunas lidas, não só com o arquivo
+        resultado = f"{chave}|{aba}|{todas_colunas}"
+
+        st.write("Prévia dos resultados:")
+        st.dataframe(res_df.head())
+
+        linhas_com_erro(res_df)
+        painel_coorte(resultado, res_df)
+
+        # Exportar resultados
+        dados = exportar_upload(resultado, formato, res_df)
+        st.download_button(f"⬇️ Baixar resultados em {FORMATOS[formato][0]}", data=dados,
+                           file_name=f"mpi_results{FORMATOS[formato][1]}", mime=FORMATOS[formato][2])
+
+        salvar_no_historico(res_df, file.name)
+        relatorios_em_lote(res_df)
+
+def escolher_aba(file):
+    """Aba a ler de um .xlsx com mais de uma (None = a primeira)"""
+    if not file.name.endswith(".xlsx"):
+        return None
+    from brief_mpi.xlsx import abas
+
+    nomes = abas(file)
+    file.seek(0)
+    if len(nomes) == 1:
+        return None
+    return st.selectbox("Aba da planilha", nomes)
+
+def esquema_valido(file, aba=None) -> bool:
+    """Confere as colunas pelo cabeçalho, antes de ler (e calcular) o arquivo inteiro"""
+    try:
+        validar_cabecalho(ler_cabecalho(file, file.name, aba))
+    except ErroEsquema as e:
+        st.error(f"{file.name}: {e}")
+        return False
+    return True
+
+def linhas_com_erro(res_df: pd.DataFrame):
+    """Mostra as linhas que ficaram sem MPI por terem valores inválidos"""
+    erros = res_df[res_df[COLUNA_ERROS] != ""]
+    if not erros.empty:
+        st.warning(f"{len(erros):,} linhas com valores inválidos ficaram sem MPI.")
+        tabela_paginada(erros, "erros")
+
+def carregar_planilha_incremental(file, formato, aba=None, todas_colunas=False):
+    """Reaproveita o resultado dos pacientes que não mudaram desde a última avaliação salva"""
+    chave = hash_upload(file)
+    df = ler_upload(chave, file.name, aba, todas_colunas, file)
+    if coluna_paciente(df.columns) is None:
+        st.warning("A comparação com o histórico precisa de uma coluna Paciente, Nome ou ID.")
+        return
+    with closing(conectar()) as con:
+        versao = versao_banco(con)
+    res_df = processar_incremental(chave, versao, file.name, aba, todas_colunas, file)
+
+    situacao = res_df[COLUNA_SITUACAO].value_counts()
+    faixa = mudaram_de_faixa(res_df)
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Novos", f"{situacao['novo']:,}")
+    c2.metric("Alterados", f"{situacao['alterado']:,}")
+    c3.metric("Mudaram de faixa", f"{faixa.sum():,}")
+    c4.metric("Inalterados (não recalculados)", f"{situacao['inalterado']:,}")
+
+    linhas_com_erro(res_df)
+    aba_faixa, aba_novos, aba_alterados, aba_todos = st.tabs(
+        ["Mudaram de faixa", "Novos", "Alterados", "Todos"])
+    with aba_faixa:
+        tabela_paginada(res_df[faixa], "faixa")
+    with aba_novos:
+        tabela_paginada(res_df[res_df[COLUNA_SITUACAO] == "novo"], "novos")
+    with aba_alterados:
+        tabela_paginada(res_df[res_df[COLUNA_SITUACAO] == "alterado"], "alterados")
+    with aba_todos:
+        painel_coorte(f"{chave}|{aba}|{todas_colunas}|{versao}", res_df)
+
+    # O resultado depende do histórico, então a exportação é feita só no clique
+    st.download_button(f"⬇️ Baixar resultados em {FORMATOS[formato][0]}",
+                       data=lambda: exportar(res_df, formato).ler(),
+                       file_name=f"mpi_results{FORMATOS[formato][1]}", mime=FORMATOS[formato][2])
+
+    # Só as linhas novas ou alteradas viram avaliações novas (e novos relatórios)
+    mudaram = res_df[res_df[COLUNA_SITUACAO] != "inalterado"]
+    salvar_no_historico(mudaram, file.name)
+    relatorios_em_lote(mudaram)
+
+def carregar_varias_planilhas(files, formato):
+    """Pontua várias planilhas em paralelo e consolida por instituição"""
+    chaves = tuple(hash_upload(f) for f in files)
+    res_df, erros = processar_varias(chaves, tuple(f.name for f in files), files)
+    for nome, erro in erros.items():
+        st.error(f"{nome}: {erro}")
+    if res_df.empty:
+        return
+
+    linhas_com_erro(res_df)
+    painel_coorte("|".join(chaves), res_df)
+
+    # Exportar resultados consolidados
+    dados = exportar_upload("|".join(chaves), formato, res_df)
+    st.download_button(f"⬇️ Baixar resultados em {FORMATOS[formato][0]}", data=dados,
+                       file_name=f"mpi_results{FORMATOS[formato][1]}", mime=FORMATOS[formato][2])
+
+    salvar_no_historico(res_df, "várias planilhas")
+    relatorios_em_lote(res_df)
+
+# ---------- Painel da coorte ----------
+@st.cache_data(max_entries=8, ttl=3600, show_spinner=False)
+def resumir_coorte(chave: str, _res_df: pd.DataFrame) -> dict:
+    """Agregados da coorte (analise.resumo_coorte), calculados uma vez por resultado"""
+    return resumo_coorte(_res_df)
+
+def painel_coorte(chave: str, res_df: pd.DataFrame):
+    """Resumo da coorte e as linhas em páginas: o que vai ao navegador não cresce com a planilha"""
+    resumo = resumir_coorte(chave, res_df)
+    faixas = resumo["faixas"]
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Pacientes", f"{resumo['pacientes']:,}")
+    c2.metric("MPI médio", f"{resumo['mpi_medio']:.2f}" if resumo["validas"] else "—")
+    c3.metric("Alto risco (MPI 3)", f"{faixas.iloc[-1] / max(resumo['validas'], 1):.1%}")
+    c4.metric("Sem MPI (valores inválidos)", f"{resumo['pacientes'] - resumo['validas']:,}")
+
+    col1, col2 = st.columns(2)
+    col1.write("Pacientes por faixa de MPI")
+    col1.bar_chart(faixas)
+    col2.write("Distribuição do MPI")
+    col2.bar_chart(resumo["histograma"].set_axis(
+        [f"{v:.2f}" for v in resumo["histograma"].index]))
+
+    st.write("Prevalência de cada valor por dimensão")
+    st.dataframe(resumo["dominios"].rename(columns=str).style.format("{:.1%}"))
+    if resumo["grupos"] is not None:
+        st.write("Pacientes por instituição e faixa de MPI")
+        st.dataframe(resumo["grupos"])
+
+    st.write("Pacientes")
+    c1, c2 = st.columns(2)
+    visao = c1.radio("Linhas", ["Por página", "Amostra aleatória"], horizontal=True,
+                     key=f"visao_{chave}")
+    faixa = c2.selectbox("Faixa", ["Todas", *RISCOS], key=f"faixa_{chave}")
+    faixa = None if faixa == "Todas" else faixa
+    if visao == "Amostra aleatória":
+        st.dataframe(amostra(res_df, faixa=faixa))
+    else:
+        tabela_paginada(res_df, f"coorte_{chave}", faixa)
+
+def tabela_paginada(df: pd.DataFrame, chave: str, faixa: str | None = None):
+    """Mostra uma página de TAMANHO_PAGINA linhas por vez, em vez da tabela inteira"""
+    n = contar(df, faixa)
+    paginas = max(-(-n // TAMANHO_PAGINA), 1)
+    numero = 1
+    if paginas > 1:
+        numero = st.number_input(f"Página (de {paginas:,})", min_value=1, max_value=paginas,
+                                 value=1, key=f"pagina_{chave}_{faixa}")
+    st.dataframe(pagina(df, numero - 1, faixa=faixa))
+    if paginas > 1:
+        st.caption(f"Linhas {(numero - 1) * TAMANHO_PAGINA + 1:,} a "
+                   f"{min(numero * TAMANHO_PAGINA, n):,} de {n:,}"
+                   + (f" ({faixa})" if faixa else ""))
+
+# ---------- Histórico ----------
+def salvar_no_historico(res_df: pd.DataFrame, fonte: str):
+    """Grava os resultados da planilha no banco de avaliações"""
+    with st.expander("💾 Salvar no histórico"):
+        if coluna_paciente(res_df.columns) is None:
+            st.warning("A planilha precisa de uma coluna Paciente, Nome ou ID para ser salva.")
+            return
+        data = st.date_input("Data das avaliações (se a planilha não tiver a coluna Data)")
+        if st.button(f"Salvar {res_df['MPI'].notna().sum():,} avaliações"):
+            with closing(conectar()) as con:
+                n = salvar_avaliacoes(con, res_df, data=data, fonte=fonte)
+            st.success(f"{n:,} avaliações salvas.")
+
+def historico():
+    st.subheader("Histórico de avaliações")
+    with closing(conectar()) as con:
+        paciente = st.text_input("Identificação do paciente")
+        if paciente:
+            hist = historico_paciente(con, paciente)
+            if hist.empty:
+                st.info("Nenhuma avaliação encontrada para este paciente.")
+            else:
+                st.line_chart(hist, x="data", y="mpi")
+                st.dataframe(hist.drop(columns="id"))
 
-    file = st.file_uploader("Selecione um arquivo .csv ou .xlsx", type=["csv","xlsx"])
-    if file:
-        if file.name.endswith(".csv"):
-            df = pd.read_csv(file)
+        st.divider()
+        st.write("Distribuição atual (última avaliação de cada paciente):")
+        instituicao = st.selectbox("Instituição", ["Todas", *listar_instituicoes(con)])
+        dist = distribuicao_atual(con, None if instituicao == "Todas" else instituicao)
+        if not dist.empty:
+            st.dataframe(dist.pivot_table(index="instituicao", columns="risco", values="pacientes",
+                                          aggfunc="sum", fill_value=0))
+
+# ---------- Relatórios em lote ----------
+def relatorios_em_lote(res_df: pd.DataFrame):
+    """Gera um PDF por paciente, em paralelo, reunidos num arquivo ZIP"""
+    res_df = res_df[res_df["MPI"].notna()]
+    with st.expander("📄 Relatórios PDF de todos os pacientes"):
+        workers = st.number_input("Nº de processos", min_value=1,
+                                  value=os.cpu_count() or 1, step=1)
+        if st.button(f"Gerar {len(res_df):,} relatórios (ZIP)"):
+            from brief_mpi.reports import gerar_relatorios_zip
+
+            barra = st.progress(0.0, text="Gerando relatórios...")
+            colunas = list(res_df.columns)
+            registros = (dict(zip(colunas, valores))
+                         for valores in res_df.itertuples(index=False, name=None))
+
+            zip_file = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+            stats = gerar_relatorios_zip(
+                registros, zip_file, workers=int(workers),
+                progresso=lambda n: barra.progress(n / len(res_df), text=f"{n:,} relatórios gerados"))
+            barra.progress(1.0, text=f"{stats['relatorios']:,} relatórios gerados")
+            st.caption(f"{stats['relatorios']:,} relatórios em {stats['segundos']} s "
+                       f"({stats['relatorios_por_segundo']} por segundo com {stats['processos']} processos)")
+
+            def ler_zip():
+                zip_file.seek(0)
+                return zip_file.read()
+
+            st.download_button("⬇️ Baixar relatórios (ZIP)", data=ler_zip,
+                               file_name="mpi_relatorios.zip", mime="application/zip")
+
+        if st.button("Gerar em segundo plano"):
+            id_tarefa = fila_tarefas().enviar("relatorios", "relatorios.parquet",
+                                              exportar(res_df, "parquet").ler(),
+                                              workers=int(workers))
+            st.session_state.setdefault("tarefas", []).append(id_tarefa)
+            st.success(f"Tarefa {id_tarefa} enviada; acompanhe em ⏳ Tarefas.")
+
+# ---------- Tarefas em segundo plano ----------
+@st.cache_resource
+def fila_tarefas():
+    """Uma fila por processo do servidor (tarefas.FilaTarefas), compartilhada pelas sessões"""
+    from brief_mpi.tarefas import FilaTarefas
+
+    return FilaTarefas()
+
+def enviar_para_fila(file, formato, aba=None, todas_colunas=False):
+    """Pontua a planilha numa tarefa em segundo plano, sem ocupar a sessão"""
+    if st.button("Enviar para a fila de tarefas"):
+        # Mesmo arquivo e parâmetros: a fila devolve a tarefa já existente
+        id_tarefa = fila_tarefas().enviar("pontuar", file.name, file.getvalue(),
+                                          chave=hash_upload(file), formato=formato, aba=aba,
+                                          todas_colunas=todas_colunas)
+        if id_tarefa not in st.session_state.setdefault("tarefas", []):
+            st.session_state["tarefas"].append(id_tarefa)
+    if st.session_state.get("tarefas"):
+        painel_tarefas(st.session_state["tarefas"])
+
+@st.fragment(run_every="2s")
+def painel_tarefas(ids: list | None = None):
+    """Andamento das tarefas; só este trecho é reexecutado a cada consulta"""
+    tarefas = fila_tarefas().listar()
+    if ids is not None:
+        tarefas = [t for t in tarefas if t["id"] in ids]
+    if not tarefas:
+        st.info("Nenhuma tarefa enviada.")
+    for t in tarefas:
+        titulo = f"{t['nome']} · {t['tipo']} · {t['criada'].replace('T', ' ')}"
+        if t["situacao"] in ("pendente", "executando"):
+            st.progress(t["progresso"], text=f"{titulo} — {t['mensagem'] or t['situacao']}")
+        elif t["situacao"] == "concluida" and t["artefato"] and os.path.exists(t["artefato"]):
+            st.download_button(f"⬇️ {titulo} — {t['mensagem']}", data=ler_artefato(t["artefato"]),
+                               file_name=os.path.basename(t["artefato"]),
+                               mime=mime_artefato(t["artefato"]), key=f"baixar_{t['id']}")
         else:
-            df = pd.read_excel(file)
-
-        st.write("Prévia da planilha:")
-        st.dataframe(df.head())
-
-        results = []
-        for _, row in df.iterrows():
-            domains = {
-                "ADL": row["ADL"],
-                "IADL": row["IADL"],
-                "Mobility": row["Mobility"],
-                "Cognitive": row["Cognitive"],
-                "Nutritional": row["Nutritional"],
-                "Comorbidity": row["Comorbidity"],
-                "Drugs": row["Drugs"],
-                "Cohabitation": row["Cohabitation"]
-            }
-            res = compute_brief_mpi_from_domains(domains)
-            results.append(res)
-
-        res_df = pd.concat([df.reset_index(drop=True), pd.DataFrame(results)], axis=1)
-        st.dataframe(res_df)
-
-        # Exportar CSV
-        csv = res_df.to_csv(index=False).encode("utf-8")
-        st.download_button("⬇️ Baixar resultados em CSV", data=csv,
-                           file_name="mpi_results.csv", mime="text/csv")
+            st.error(f"{titulo} — {t['situacao']}: {t['mensagem'] or ''}")
+
+def ler_artefato(caminho: str):
+    """Leitura do artefato adiada para o clique no download"""
+    def ler():
+        with open(caminho, "rb") as f:
+            return f.read()
+    return ler
+
+def mime_artefato(caminho: str) -> str:
+    ext = os.path.splitext(caminho)[1]
+    for _, extensao, mime in FORMATOS.values():
+        if ext == extensao:
+            return mime
+    return "application/zip"
+
+# ---------- Cache de resultados ----------
+def hash_upload(file) -> str:
+    """Hash do conteúdo do arquivo + versão das regras, usado como chave do cache"""
+    # Calculado uma vez por envio: reler um arquivo de vários GB a cada rerun custa segundos
+    hashes = st.session_state.setdefault("hash_upload", {})
+    if file.file_id not in hashes:
+        h = hashlib.sha256(file.getbuffer())
+        h.update(VERSAO_REGRAS.encode())
+        if len(hashes) >= 16:
+            hashes.clear()
+        hashes[file.file_id] = h.hexdigest()
+    return hashes[file.file_id]
+
+def ler_planilha(nome: str, aba, todas_colunas: bool, file) -> pd.DataFrame:
+    """Lê a planilha enviada (só as colunas necessárias, salvo todas_colunas)"""
+    file.seek(0)
+    colunas = None if todas_colunas else coluna_necessaria
+    with metricas.trecho("ler_planilha", bytes=getattr(file, "size", None), arquivo=nome) as t:
+        if nome.endswith(".csv"):
+            df = pd.read_csv(file, usecols=colunas)
+        else:
+            from brief_mpi.xlsx import ler_xlsx
+
+            df = ler_xlsx(file, colunas=colunas, aba=aba)
+        t.registrar(linhas=len(df))
+    return df
+
+@st.cache_data(max_entries=8, ttl=3600, show_spinner="Lendo planilha...")
+def ler_upload(chave: str, nome: str, aba, todas_colunas: bool, _file) -> pd.DataFrame:
+    """ler_planilha em cache; uma vez por conteúdo"""
+    return ler_planilha(nome, aba, todas_colunas, _file)
+
+@st.cache_resource
+def cache_coortes() -> CacheCoortes:
+    return CacheCoortes()
+
+@st.cache_resource(max_entries=8, ttl=3600, show_spinner="Calculando MPI...")
+def processar_upload(chave: str, nome: str, aba, todas_colunas: bool, _file) -> pd.DataFrame:
+    """Lê e pontua a planilha; roda uma única vez por conteúdo (e versão das regras)
+
+    O resultado vem do cache de coortes em disco, mapeado em memória e somente
+    leitura: as sessões (e os demais processos) que abrem a mesma planilha
+    usam as mesmas páginas, sem ler nem pontuar de novo. Por isso é um
+    cache_resource (o mesmo objeto para todas as sessões), e não um cache_data,
+    que entregaria uma cópia a cada sessão.
+    """
+    return cache_coortes().obter_ou_calcular(
+        chave_coorte(chave, aba, todas_colunas),
+        lambda: pontuar_lote(ler_planilha(nome, aba, todas_colunas, _file)))
+
+@st.cache_data(max_entries=8, ttl=3600, show_spinner="Comparando com o histórico...")
+def processar_incremental(chave: str, versao: int, nome: str, aba, todas_colunas: bool,
+                          _file) -> pd.DataFrame:
+    """Pontua só as linhas novas ou alteradas; refeito quando o histórico muda (versao)"""
+    df = ler_upload(chave, nome, aba, todas_colunas, _file)
+    precisa_dominios = not all(d in df.columns for d in DOMAINS)
+    with closing(conectar()) as con:
+        anteriores = ultimas_avaliacoes(con, df[coluna_paciente(df.columns)],
+                                        dominios=precisa_dominios)
+    return pontuar_incremental(df, anteriores)
+
+@st.cache_data(max_entries=8, ttl=3600, show_spinner="Calculando MPI das instituições...")
+def processar_varias(chaves: tuple, nomes: tuple, _files) -> tuple:
+    """Lê e pontua vários arquivos num pool de processos; em cache como processar_upload"""
+    from brief_mpi.batch import pontuar_arquivos
+
+    return pontuar_arquivos([(f.name, f.getvalue()) for f in _files])
+
+@st.cache_data(max_entries=8, ttl=3600, show_spinner=False)
+def exportar_upload(chave: str, formato: str, _res_df: pd.DataFrame) -> bytes:
+    """Serializa os resultados no formato escolhido; também fica em cache"""
+    return exportar(_res_df, formato).ler()
+
+def carregar_planilha_streaming(file, formato, aba=None, todas_colunas=False):
+    """Calcula o MPI lote a lote, sem manter a planilha inteira em memória.
+
+    O arquivo exportado fica na sessão: os reruns (outro widget, o próprio
+    download) o reaproveitam e só um novo arquivo, aba, formato ou escolha de
+    colunas lê e calcula tudo de novo.
+    """
+    chave = f"{hash_upload(file)}|{aba}|{todas_colunas}|{formato}"
+    anterior = st.session_state.get("streaming")
+    if anterior is None or anterior[0] != chave:
+        # Descarta o resultado anterior antes de gravar o novo (o temporário é liberado)
+        st.session_state.pop("streaming", None)
+        st.session_state["streaming"] = (chave, *pontuar_streaming(file, formato, aba,
+                                                                   todas_colunas))
+    _, exp, linhas, previa = st.session_state["streaming"]
+    if anterior is not None and anterior[0] == chave:
+        st.progress(1.0, text=f"{linhas:,} linhas processadas")
+
+    if previa is not None:
+        st.write("Prévia dos resultados:")
+        st.dataframe(previa)
+
+    # Exportar resultados (já gravados no arquivo temporário)
+    botao_download(exp)
+
+def pontuar_streaming(file, formato, aba, todas_colunas) -> tuple:
+    """(Exportador com os resultados, nº de linhas, prévia) de uma leitura em lotes"""
+    barra = st.progress(0.0, text="Processando planilha...")
+
+    def progresso(linhas, fracao):
+        barra.progress(fracao or 0.0, text=f"{linhas:,} linhas processadas")
+
+    previa = []
+    def pontuar(lote):
+        res = pontuar_lote(lote)
+        if not previa:
+            previa.append(res.head())
+        return res
+
+    file.seek(0)
+    exp = Exportador(formato)
+    linhas = pontuar_em_lotes(file, file.name, exp, pontuar=pontuar, progresso=progresso,
+                              colunas=None if todas_colunas else coluna_necessaria, aba=aba)
+    barra.progress(1.0, text=f"{linhas:,} linhas processadas")
+    exp.fechar()
+    return exp, linhas, previa[0] if previa else None
+
+def botao_download(exp: Exportador):
+    """Botão de download servido direto do arquivo exportado, lido só no clique."""
+    st.download_button(f"⬇️ Baixar resultados em {FORMATOS[exp.formato][0]}", data=exp.ler,
+                       file_name=f"mpi_results{exp.extensao}", mime=exp.mime,
+                       on_click="ignore")
+
+# ---------- Painel de desempenho ----------
+def painel_desempenho():
+    """Tempos da última execução e das anteriores (só com MPI_METRICAS ligado)"""
+    execucoes = metricas.ultimas_execucoes()
+    with st.sidebar.expander("⏱️ Desempenho (admin)"):
+        if not execucoes:
+            st.caption("Nenhuma execução medida ainda.")
+            return
+        ultima = execucoes[0]
+        st.metric(f"Última execução · {ultima['execucao']}", f"{ultima['segundos'] * 1000:.0f} ms")
+        if ultima["trechos"]:
+            trechos = pd.DataFrame(ultima["trechos"])
+            trechos["ms"] = (trechos.pop("segundos") * 1000).round(1)
+            st.dataframe(trechos, hide_index=True)
+        memoria = [f"{rotulo}: {ultima[c]} MB" for c, rotulo in
+                   (("pico_memoria_mb", "pico na execução"), ("rss_maximo_mb", "pico do processo"))
+                   if c in ultima]
+        if memoria:
+            st.caption(" · ".join(memoria))
+        st.caption(f"Registro em {metricas.ARQUIVO_PADRAO}")
+        st.dataframe(pd.DataFrame([{"execucao": e["execucao"], "data": e["data"],
+                                    "ms": round(e["segundos"] * 1000, 1),
+                                    "trechos": len(e["trechos"])} for e in execucoes]),
+                     hide_index=True)
 
 # ---------- App principal ----------
+LOGO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo", "logo_projeto.png")
+
+@st.cache_resource
+def logo(largura: int) -> bytes:
+    """PNG do logo já na largura exibida, uma vez por processo
+
+    Passando o caminho do arquivo, o Streamlit relê e reduz o original
+    (1920x1200) em toda execução do script: ~0,25 s por rerun.
+    """
+    from PIL import Image
+
+    with Image.open(LOGO) as im:
+        im.thumbnail((largura, largura))
+        png = io.BytesIO()
+        im.save(png, "PNG", optimize=True)
+    return png.getvalue()
+
 
 st.set_page_config(page_title="MPI", 
                    page_icon="🗂️",
                    layout="wide")
 
 
-st.logo(image="logo/logo_projeto.png", size="large", link=None, icon_image=None)
+st.logo(image=logo(400), size="large", link=None, icon_image=None)
 
 
 col1, col2, col3 = st.columns(3)
@@ -213,7 +648,7 @@ with col1:
 with col2:
     st.text("")    
 with col3:
-    st.image("logo/logo_projeto.png", width=200)
+    st.image(logo(200), width=200)
 
 
 st.divider(width="stretch")
@@ -232,10 +667,19 @@ st.markdown(multi)
 st.divider(width="stretch")
 
 
-mode = st.sidebar.radio("Escolha o modo:", ["📂 Carregar planilha", "📝 Avaliação individual"])
+mode = st.sidebar.radio("Escolha o modo:", ["📂 Carregar planilha", "📝 Avaliação individual",
+                                            "📈 Histórico", "⏳ Tarefas"])
 
-if mode == "📂 Carregar planilha":
-    carregar_planilha()
-else:
-    avaliacao_individual()
+with metricas.execucao(mode):
+    if mode == "📂 Carregar planilha":
+        carregar_planilha()
+    elif mode == "📈 Histórico":
+        historico()
+    elif mode == "⏳ Tarefas":
+        st.subheader("Tarefas em segundo plano")
+        painel_tarefas()
+    else:
+        avaliacao_individual()
+if metricas.ativo():
+    painel_desempenho()
 st.divider(width="stretch")
\ No newline at end of file
@@ -1,22 +1,101 @@
 import streamlit as st
 import pandas as pd
-from fpdf import FPDF
 import io
 
-# Função para calcular o MPI a partir das 8 dimensões
-def calcular_mpi(dimensoes: list) -> float:
-    return round(sum(dimensoes) / len(dimensoes), 2)
-
-def interpretar_mpi(mpi: float) -> str:
-    if mpi <= 0.33:
-        return "Baixo risco (MPI 1)"
-    elif mpi <= 0.66:
-        return "Risco moderado (MPI 2)"
+from brief_mpi.analise import TAMANHO_PAGINA, pagina, resumo_coorte
+from brief_mpi.colunas import COLUNA_ERROS, COLUNA_INSTITUICAO
+from brief_mpi.export import FORMATOS, Exportador, exportar
+from brief_mpi.ingest import pontuar_em_lotes
+from brief_mpi.scoring import (DOMAINS, RISCOS_PT, ROTULO_PT, compute_brief_mpi_batch,
+                               compute_brief_mpi_lookup)
+from brief_mpi.validacao import (ErroEsquema, coluna_necessaria, descrever_erros,
+                                 ler_cabecalho, validar, validar_cabecalho)
+
+# Função para calcular o MPI a partir das 8 dimensões (na ordem de DOMAINS)
+def calcular_mpi(dimensoes: list) -> dict:
+    """MPI e Classificação (rótulo em português) pelo núcleo de brief_mpi.scoring"""
+    res = compute_brief_mpi_lookup(dict(zip(DOMAINS, dimensoes)))
+    return {"MPI": res["MPI"], "Classificação": ROTULO_PT[res["risk"]]}
+
+DIMENSOES = [f"dim{i}" for i in range(1, 9)]
+
+def pontuar_dimensoes(df: pd.DataFrame) -> pd.DataFrame:
+    """Acrescenta MPI e Classificação a uma planilha com as colunas dim1..dim8 (ou apelidos)"""
+    df, erros = validar(df, DIMENSOES, aceita_itens=False)
+    invalidas = erros.to_numpy().any(axis=1)
+    res = compute_brief_mpi_batch(df[DIMENSOES].set_axis(DOMAINS, axis=1))
+    df["MPI"] = res["MPI"].mask(invalidas)
+    df["Classificação"] = res["risk"].cat.rename_categories(RISCOS_PT).mask(invalidas)
+    df[COLUNA_ERROS] = descrever_erros(erros)
+    return df
+
+@st.cache_data(max_entries=4, ttl=3600, show_spinner="Calculando o MPI...")
+def pontuar_planilha(file_id: str, nome: str, todas_colunas: bool, _file) -> pd.DataFrame:
+    """Lê e pontua a planilha uma vez por envio (trocar de página não recalcula)"""
+    colunas = None if todas_colunas else coluna_necessaria
+    if nome.endswith(".csv"):
+        df = pd.read_csv(_file, usecols=colunas)
     else:
-        return "Alto risco (MPI 3)"
-
-# Função para gerar relatório PDF
+        from brief_mpi.xlsx import ler_xlsx
+
+        df = ler_xlsx(_file, colunas=colunas)
+    return pontuar_dimensoes(df)
+
+def pontuar_streaming(uploaded_file, formato: str, todas_colunas: bool) -> tuple:
+    """(Exportador, nº de linhas) do modo streaming, guardados na sessão.
+
+    Os reruns (outro widget, o próprio download) reaproveitam o arquivo
+    exportado; só outro envio, formato ou escolha de colunas recalcula tudo.
+    """
+    chave = f"{uploaded_file.file_id}|{formato}|{todas_colunas}"
+    barra = st.progress(0.0, text="Processando planilha...")
+    if st.session_state.get("streaming", (None,))[0] != chave:
+        st.session_state.pop("streaming", None)  # libera o temporário anterior
+        uploaded_file.seek(0)
+        saida = Exportador(formato)
+        linhas = pontuar_em_lotes(
+            uploaded_file, uploaded_file.name, saida, pontuar=pontuar_dimensoes,
+            colunas=None if todas_colunas else coluna_necessaria,
+            progresso=lambda n, f: barra.progress(f or 0.0, text=f"{n:,} linhas processadas"))
+        saida.fechar()
+        st.session_state["streaming"] = (chave, saida, linhas)
+    _, saida, linhas = st.session_state["streaming"]
+    barra.progress(1.0, text=f"{linhas:,} linhas processadas")
+    return saida, linhas
+
+def resumo_planilha(df: pd.DataFrame):
+    """Resumo da coorte (analise.resumo_coorte) e as linhas em páginas, não a tabela inteira"""
+    resumo = resumo_coorte(df[DIMENSOES].set_axis(DOMAINS, axis=1).assign(MPI=df["MPI"]))
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Pacientes", f"{resumo['pacientes']:,}")
+    c2.metric("MPI médio", f"{resumo['mpi_medio']:.2f}" if resumo["validas"] else "—")
+    c3.metric("Sem MPI (valores inválidos)", f"{resumo['pacientes'] - resumo['validas']:,}")
+    st.bar_chart(resumo["faixas"].set_axis(RISCOS_PT))
+
+    paginas = max(-(-len(df) // TAMANHO_PAGINA), 1)
+    numero = 1
+    if paginas > 1:
+        numero = st.number_input(f"Página (de {paginas:,})", min_value=1, max_value=paginas,
+                                 value=1)
+    st.dataframe(pagina(df, numero - 1))
+    if paginas > 1:
+        st.caption(f"Linhas {(numero - 1) * TAMANHO_PAGINA + 1:,} a "
+                   f"{min(numero * TAMANHO_PAGINA, len(df)):,} de {len(df):,}")
+
+def esquema_valido(uploaded_file) -> bool:
+    """Confere as colunas dim1..dim8 só pelo cabeçalho, antes de ler o arquivo"""
+    try:
+        validar_cabecalho(ler_cabecalho(uploaded_file, uploaded_file.name),
+                          DIMENSOES, aceita_itens=False)
+    except ErroEsquema as e:
+        st.error(f"A planilha deve conter as colunas: dim1, dim2, ..., dim8 ({e})")
+        return False
+    return True
+
+# Função para gerar relatório PDF (o FPDF só é carregado quando o relatório é pedido)
 def gerar_pdf(nome, instituicao, dimensoes, mpi, interpretacao):
+    from fpdf import FPDF
+
     buffer = io.BytesIO()
     pdf = FPDF()
     pdf.add_page()
@@ -48,32 +127,46 @@ opcao = st.sidebar.radio("Escolha o modo de uso:",
 if opcao == "📂 Carregar Planilha":
     st.header("Carregar Planilha com Dimensões")
     uploaded_file = st.file_uploader("Carregue um arquivo CSV ou Excel", type=["csv", "xlsx"])
-
-    if uploaded_file:
-        if uploaded_file.name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
-
-        st.write("Pré-visualização dos dados carregados:")
-        st.dataframe(df.head())
-
-        if all(col in df.columns for col in [f"dim{i}" for i in range(1, 9)]):
-            df["MPI"] = df[[f"dim{i}" for i in range(1, 9)]].mean(axis=1).round(2)
-            df["Classificação"] = df["MPI"].apply(interpretar_mpi)
-
-            st.success("MPI calculado com sucesso!")
-            st.dataframe(df)
-
-            # Exportar CSV
-            csv_buffer = io.BytesIO()
-            df.to_csv(csv_buffer, index=False)
-            st.download_button("📥 Baixar resultados em CSV", 
-                               data=csv_buffer.getvalue(), 
-                               file_name="resultados_mpi.csv", 
-                               mime="text/csv")
-        else:
-            st.error("A planilha deve conter as colunas: dim1, dim2, ..., dim8")
+    streaming = st.checkbox("Modo streaming (arquivos grandes)")
+    formato = st.selectbox("Formato de saída", list(FORMATOS),
+                           format_func=lambda f: FORMATOS[f][0])
+    todas_colunas = st.checkbox("Manter todas as colunas da planilha",
+                                help="Por padrão só são lidas as dimensões e as colunas de "
+                                     "identificação (paciente, instituição e data); as demais "
+                                     "ficam fora do resultado e do download.")
+
+    # Colunas conferidas pelo cabeçalho, antes de ler o arquivo inteiro
+    if uploaded_file and not esquema_valido(uploaded_file):
+        uploaded_file = None
+
+    if uploaded_file and streaming:
+        saida, linhas = pontuar_streaming(uploaded_file, formato, todas_colunas)
+        st.success("MPI calculado com sucesso!")
+        st.download_button(f"📥 Baixar resultados em {FORMATOS[formato][0]}",
+                           data=saida.ler,
+                           file_name=f"resultados_mpi{saida.extensao}",
+                           mime=saida.mime, on_click="ignore")
+
+    elif uploaded_file:
+        df = pontuar_planilha(uploaded_file.file_id, uploaded_file.name, todas_colunas,
+                              uploaded_file)
+
+        st.success("MPI calculado com sucesso!")
+        invalidas = (df[COLUNA_ERROS] != "").sum()
+        if invalidas:
+            st.warning(f"{invalidas:,} linhas com valores inválidos ficaram sem MPI.")
+        if COLUNA_INSTITUICAO in df.columns:
+            from brief_mpi.batch import resumo_por_instituicao
+
+            st.write("Pacientes por instituição e classificação:")
+            st.dataframe(resumo_por_instituicao(df, "Classificação"))
+        resumo_planilha(df)
+
+        # Exportar resultados (gerado só no clique: trocar de página não reexporta a coorte)
+        st.download_button(f"📥 Baixar resultados em {FORMATOS[formato][0]}",
+                           data=lambda: exportar(df, formato).ler(),
+                           file_name=f"resultados_mpi{FORMATOS[formato][1]}",
+                           mime=FORMATOS[formato][2], on_click="ignore")
 
 # --- MODO 2: INSERIR MANUALMENTE ---
 elif opcao == "✍️ Inserir Manualmente":
@@ -89,8 +182,8 @@ elif opcao == "✍️ Inserir Manualmente":
         dimensoes.append(val)
 
     if st.button("Calcular MPI"):
-        mpi = calcular_mpi(dimensoes)
-        interpretacao = interpretar_mpi(mpi)
+        res = calcular_mpi(dimensoes)
+        mpi, interpretacao = res["MPI"], res["Classificação"]
 
         st.success(f"📊 MPI = {mpi} → {interpretacao}")
 
@@ -111,123 +204,8 @@ elif opcao == "✍️ Inserir Manualmente":
                            file_name="mpi_paciente.csv", 
                            mime="text/csv")
 
-        # Exportar PDF
-        pdf_buffer = gerar_pdf(nome, instituicao, dimensoes, mpi, interpretacao)
+        # Exportar PDF (gerado só quando o botão é clicado)
         st.download_button("📄 Baixar Relatório em PDF", 
-                           data=pdf_buffer, 
+                           data=lambda: gerar_pdf(nome, instituicao, dimensoes, mpi, interpretacao),
                            file_name="mpi_relatorio.pdf", 
                            mime="application/pdf")
-
-
-
-import streamlit as st
-import pandas as pd
-from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-
-# ---------- Funções auxiliares ----------
-from typing import Dict, Any
-def compute_brief_mpi_from_domains(domains: Dict[str, Any]) -> Dict[str, Any]:
-    """Recebe um dicionário com as 8 dimensões (já codificadas como 0,0.5,1) e retorna MPI e risco."""
-    vals = list(domains.values())
-    mpi_raw = sum(vals) / 8
-    if mpi_raw <= 0.33:
-        risk = 'Mild (MPI 1)'
-    elif mpi_raw <= 0.66:
-        risk = 'Moderate (MPI 2)'
-    else:
-        risk = 'High (MPI 3)'
-    return {"MPI": round(mpi_raw, 2), "risk": risk}
-
-def export_pdf(data: Dict[str, Any]) -> BytesIO:
-    """Gera PDF simples com resumo"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    story = []
-    story.append(Paragraph("Relatório Brief-MPI", styles["Title"]))
-    story.append(Spacer(1, 12))
-    for k,v in data.items():
-        story.append(Paragraph(f"<b>{k}:</b> {v}", styles["Normal"]))
-        story.append(Spacer(1, 6))
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-# ---------- App ----------
-st.title("Brief-MPI App")
-
-mode = st.sidebar.radio("Escolha o modo:", ["📂 Carregar planilha", "📝 Avaliação individual"])
-
-if mode == "📂 Carregar planilha":
-    st.subheader("Carregar planilha com 8 dimensões já calculadas")
-
-    file = st.file_uploader("Selecione um arquivo .csv ou .xlsx", type=["csv","xlsx"])
-    if file:
-        if file.name.endswith(".csv"):
-            df = pd.read_csv(file)
-        else:
-            df = pd.read_excel(file)
-
-        st.write("Prévia da planilha:")
-        st.dataframe(df.head())
-
-        # Espera que as colunas sejam ADL, IADL, Mobility, Cognitive, Nutritional, Comorbidity, Drugs, Cohab
-        results = []
-        for _, row in df.iterrows():
-            domains = {
-                "ADL": row["ADL"],
-                "IADL": row["IADL"],
-                "Mobility": row["Mobility"],
-                "Cognitive": row["Cognitive"],
-                "Nutritional": row["Nutritional"],
-                "Comorbidity": row["Comorbidity"],
-                "Drugs": row["Drugs"],
-                "Cohabitation": row["Cohabitation"]
-            }
-            res = compute_brief_mpi_from_domains(domains)
-            results.append(res)
-
-        res_df = pd.concat([df.reset_index(drop=True), pd.DataFrame(results)], axis=1)
-        st.dataframe(res_df)
-
-        # Exportar CSV
-        csv = res_df.to_csv(index=False).encode("utf-8")
-        st.download_button("⬇️ Baixar resultados em CSV", data=csv, file_name="mpi_results.csv", mime="text/csv")
-
-elif mode == "📝 Avaliação individual":
-    st.subheader("Responder as dimensões")
-
-    adl = st.selectbox("ADL (0=alto risco, 0.5=médio, 1=baixo)", [0,0.5,1])
-    iadl = st.selectbox("IADL", [0,0.5,1])
-    mobility = st.selectbox("Mobilidade", [0,0.5,1])
-    cognitive = st.selectbox("Cognitivo", [0,0.5,1])
-    nutritional = st.selectbox("Nutrição", [0,0.5,1])
-    comorbidity = st.selectbox("Comorbidades", [0,0.5,1])
-    drugs = st.selectbox("Nº de fármacos", [0,0.5,1])
-    cohab = st.selectbox("Co-habitação", [0,0.5,1])
-
-    if st.button("Calcular MPI"):
-        domains = {
-            "ADL": adl,
-            "IADL": iadl,
-            "Mobility": mobility,
-            "Cognitive": cognitive,
-            "Nutritional": nutritional,
-            "Comorbidity": comorbidity,
-            "Drugs": drugs,
-            "Cohabitation": cohab,
-        }
-        res = compute_brief_mpi_from_domains(domains)
-        st.success(f"MPI = {res['MPI']} → {res['risk']}")
-
-        # Exportar PDF
-        pdf_buffer = export_pdf({**domains, **res})
-        st.download_button("⬇️ Baixar relatório em PDF", data=pdf_buffer, file_name="mpi_report.pdf", mime="application/pdf")
-
-        # Exportar CSV
-        csv = pd.DataFrame([{**domains, **res}]).to_csv(index=False).encode("utf-8")
-        st.download_button("⬇️ Baixar relatório em CSV", data=csv, file_name="mpi_report.csv", mime="text/csv")
\ No newline at end of file
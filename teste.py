@@ -1,13 +1,16 @@
 import streamlit as st
 import pandas as pd
 from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.pagesizes import A4
+
+from brief_mpi.scoring import compute_brief_mpi_from_domains
 
 # ---------- Funções auxiliares ----------
 def export_pdf(data: dict) -> BytesIO:
-    """Gera PDF simples com resumo"""
+    """Gera PDF simples com resumo (o ReportLab só é carregado aqui)"""
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.pagesizes import A4
+
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     styles = getSampleStyleSheet()
@@ -21,17 +24,6 @@ def export_pdf(data: dict) -> BytesIO:
     buffer.seek(0)
     return buffer
 
-def compute_brief_mpi_from_domains(domains: dict) -> dict:
-    vals = list(domains.values())
-    mpi_raw = sum(vals) / 8
-    if mpi_raw <= 0.33:
-        risk = 'Mild (MPI 1)'
-    elif mpi_raw <= 0.66:
-        risk = 'Moderate (MPI 2)'
-    else:
-        risk = 'High (MPI 3)'
-    return {"MPI": round(mpi_raw, 2), "risk": risk}
-
 # ---------- Perguntas e lógica ----------
 def avaliacao_individual():
     st.subheader("Responder às dimensões do Brief-MPI")
@@ -157,8 +149,8 @@ def avaliacao_individual():
         st.success(f"MPI = {res['MPI']} → {res['risk']}")
 
         # PDF
-        pdf_buffer = export_pdf({**domains, **res})
-        st.download_button("⬇️ Baixar relatório em PDF", data=pdf_buffer, file_name="mpi_report.pdf", mime="application/pdf")
+        st.download_button("⬇️ Baixar relatório em PDF",
+                           data=lambda: export_pdf({**domains, **res}), file_name="mpi_report.pdf", mime="application/pdf")
 
         # CSV
         csv = pd.DataFrame([{**domains, **res}]).to_csv(index=False).encode("utf-8")
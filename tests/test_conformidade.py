@@ -0,0 +1,38 @@
+"""Conformidade dos caminhos de cálculo (as mesmas verificações de `python -m brief_mpi verificar`)."""
+from brief_mpi.scoring import (DOMAINS, N_COMBINACOES, RISCOS, combinacoes,
+                               compute_brief_mpi_from_domains, verificar_tabela)
+
+
+# ---------- Tabela de consulta ----------
+def test_tabela_confere_com_calculo_escalar():
+    assert verificar_tabela() == []
+
+
+def test_consulta_reversa():
+    todas = combinacoes()
+    assert len(todas) == N_COMBINACOES
+    altas = combinacoes(risco=RISCOS[-1])
+    assert len(altas) == (todas["risk"] == RISCOS[-1]).sum()
+    for _, linha in altas.iterrows():
+        assert compute_brief_mpi_from_domains(linha[DOMAINS].to_dict())["risk"] == RISCOS[-1]
+
+
+# ---------- Núcleo compartilhado ----------
+def test_escalar_lote_e_tabela_conferem():
+    """Os três caminhos, nas combinações e em valores fora da grade."""
+    from brief_mpi.scoring import verificar_conformidade
+
+    assert verificar_conformidade() == []
+
+
+def test_regras_embutidas_conferem_com_pontuar_lote():
+    from brief_mpi.regras import verificar_regras
+
+    assert verificar_regras() == []
+
+
+def test_exportacao_em_lotes():
+    from brief_mpi.export import verificar_exportacao
+
+    assert verificar_exportacao() == []
+